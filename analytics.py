@@ -0,0 +1,226 @@
+# Soulful Academy — Coach analytics
+# Materialized rollups of stored records, so the analytics page never re-reads the records.
+#   rollup — (instrument, day, coach, metric, bucket, status) -> count, sum, sum of squares (distributions)
+#   stats  — the same without the bucket, for averages / status mix / daily trend
+#   dims   — (instrument, coach, day) seen, for the filter widgets
+# Rows are kept apart per instrument (questionnaire version): bands, statuses and scales are its own.
+# Any date range / coach selection is a small GROUP BY over these.
+# save_local updates the rollups for each new row; rebuild() streams the whole store in chunks.
+#
+#   python analytics.py rebuild data/records.db
+
+import argparse, datetime as dt, math, sqlite3, sys, threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import DEFAULT_INSTRUMENT, Instrument, band_labels, get_instrument, status_labels
+from store import DATA_DIR, TRAIT_COLUMNS, CHAKRA_COLUMNS, RecordStore, open_store
+
+ROLLUP_PATH = DATA_DIR / "rollups.db"
+BUCKET = 0.5          # histogram resolution; statuses are kept exactly, independent of the buckets
+METRICS = TRAIT_COLUMNS + CHAKRA_COLUMNS
+CHAKRA_STATUSES = ["Blocked", "Balanced", "Overactive"]
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name].fillna("").astype(str) if name in df.columns else pd.Series("", index=df.index)
+
+def _day(df: pd.DataFrame) -> pd.Series:
+    # Session date as typed on the form (dd-mm-yyyy); fall back to when the row was saved
+    day = pd.to_datetime(_col(df, "date"), format="%d-%m-%Y", errors="coerce")
+    saved = pd.to_datetime(_col(df, "created_at"), errors="coerce", utc=True)
+    day = day.dt.strftime("%Y-%m-%d")
+    return day.fillna(saved.dt.strftime("%Y-%m-%d")).fillna("")
+
+def _labels(inst: Instrument, v: np.ndarray, is_trait: np.ndarray) -> np.ndarray:
+    # Trait bands / chakra statuses by the instrument's own cut-offs
+    r = inst.trait_range
+    return np.where(is_trait, band_labels(np.clip(v, -r, r), inst.trait_bands), status_labels(v, *inst.chakra_balanced))
+
+def aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    # records -> rollup rows (instrument, day, coach, metric, bucket, status, n, total, total_sq)
+    metrics = [m for m in METRICS if m in df.columns]
+    if df.empty or not metrics:
+        return pd.DataFrame(columns=["instrument", "day", "coach", "metric", "bucket", "status", "n", "total", "total_sq"])
+    base = pd.DataFrame({"instrument": _col(df, "instrument").str.strip().replace("", DEFAULT_INSTRUMENT),
+                         "day": _day(df), "coach": _col(df, "coach").str.strip()})
+    long = base.join(df[metrics].astype(float)).melt(id_vars=["instrument", "day", "coach"], var_name="metric", value_name="v")
+    long = long.dropna(subset=["v"])
+    v = long["v"].to_numpy()
+    is_trait = long["metric"].str.startswith("trait_").to_numpy()
+    status = np.empty(len(long), dtype=object)
+    keys = long["instrument"].to_numpy()
+    for key in np.unique(keys):   # a few instruments at most: labelled one at a time
+        mask = keys == key
+        status[mask] = _labels(get_instrument(key), v[mask], is_trait[mask])
+    long["status"] = status
+    long["bucket"] = np.floor(v / BUCKET) * BUCKET
+    long["v_sq"] = v * v
+    g = long.groupby(["instrument", "day", "coach", "metric", "bucket", "status"], sort=False)
+    return g.agg(n=("v", "size"), total=("v", "sum"), total_sq=("v_sq", "sum")).reset_index()
+
+def _row_day(row: Dict[str, object]) -> str:
+    # Same rules as _day, for one record without pandas
+    try:
+        return dt.datetime.strptime(str(row.get("date") or ""), "%d-%m-%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+    try:
+        saved = dt.datetime.fromisoformat(str(row.get("created_at") or ""))
+        return (saved.astimezone(dt.timezone.utc) if saved.tzinfo else saved).strftime("%Y-%m-%d")
+    except ValueError:
+        return ""
+
+def aggregate_rows(rows: Sequence[Dict[str, object]]) -> List[tuple]:
+    # aggregate() for a handful of records (one per save_local): plain Python, no DataFrame overhead
+    acc: Dict[tuple, List[float]] = {}
+    for row in rows:
+        inst = get_instrument(str(row.get("instrument") or "").strip() or None)
+        day, coach = _row_day(row), str(row.get("coach") or "").strip()
+        metrics = [m for m in METRICS if row.get(m) not in (None, "") and row[m] == row[m]]
+        v = np.array([float(row[m]) for m in metrics])
+        is_trait = np.array([m.startswith("trait_") for m in metrics], dtype=bool)
+        for m, x, s in zip(metrics, v.tolist(), _labels(inst, v, is_trait).tolist()):
+            a = acc.setdefault((inst.key, day, coach, m, math.floor(x / BUCKET) * BUCKET, s), [0, 0.0, 0.0])
+            a[0] += 1; a[1] += x; a[2] += x * x
+    return [k + tuple(a) for k, a in acc.items()]
+
+class Rollups:
+    def __init__(self, path=ROLLUP_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        cols = [r[1] for r in self._conn.execute("PRAGMA table_info(rollup)")]
+        if cols and "instrument" not in cols:   # rollups from before per-instrument keys: rebuilt when empty
+            for table in ("rollup", "stats", "dims"): self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS rollup (
+            instrument TEXT, day TEXT, coach TEXT, metric TEXT, bucket REAL, status TEXT,
+            n INTEGER, total REAL, total_sq REAL,
+            PRIMARY KEY (instrument, day, coach, metric, bucket, status))""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rollup_metric_day ON rollup (instrument, metric, day)")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS stats (
+            instrument TEXT, day TEXT, coach TEXT, metric TEXT, status TEXT,
+            n INTEGER, total REAL, total_sq REAL,
+            PRIMARY KEY (instrument, day, coach, metric, status))""")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS dims (instrument TEXT, coach TEXT, day TEXT, PRIMARY KEY (instrument, coach, day))")
+
+    def _merge(self, agg: List[tuple]) -> None:
+        # agg: (instrument, day, coach, metric, bucket, status, n, total, total_sq) rows
+        upsert = "n = n + excluded.n, total = total + excluded.total, total_sq = total_sq + excluded.total_sq"
+        self._conn.executemany(
+            f"INSERT INTO rollup VALUES (?,?,?,?,?,?,?,?,?) ON CONFLICT (instrument, day, coach, metric, bucket, status) "
+            f"DO UPDATE SET {upsert}", agg)
+        stats: Dict[tuple, List[float]] = {}
+        for inst, day, coach, metric, _, status, n, total, total_sq in agg:
+            s = stats.setdefault((inst, day, coach, metric, status), [0, 0.0, 0.0])
+            s[0] += n; s[1] += total; s[2] += total_sq
+        self._conn.executemany(
+            f"INSERT INTO stats VALUES (?,?,?,?,?,?,?,?) ON CONFLICT (instrument, day, coach, metric, status) DO UPDATE SET {upsert}",
+            [k + tuple(s) for k, s in stats.items()])
+        self._conn.executemany("INSERT OR IGNORE INTO dims VALUES (?,?,?)", {(r[0], r[2], r[1]) for r in agg})
+
+    def update(self, rows: Sequence[Dict[str, object]]) -> None:
+        agg = aggregate_rows(rows) if len(rows) <= 100 else list(aggregate(pd.DataFrame(list(rows))).itertuples(index=False, name=None))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._merge(agg)
+            self._conn.execute("COMMIT")
+
+    def rebuild(self, store: RecordStore, chunksize: int = 50_000) -> int:
+        n = 0
+        cols = ["date", "created_at", "coach", "instrument"] + METRICS
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for table in ("rollup", "stats", "dims"): self._conn.execute(f"DELETE FROM {table}")
+            for chunk in store.iter_chunks(chunksize, columns=cols):
+                self._merge(list(aggregate(chunk).itertuples(index=False, name=None)))
+                n += len(chunk)
+            self._conn.execute("COMMIT")
+        return n
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM dims LIMIT 1").fetchone() is None
+
+    # -------------------- Queries --------------------
+    def _where(self, coaches: Optional[Iterable[str]], start: Optional[str], end: Optional[str],
+               metric: Optional[str] = None, status: Optional[str] = None,
+               instrument: Optional[str] = None) -> Tuple[str, list]:
+        clauses, args = ["instrument = ?"], [instrument or DEFAULT_INSTRUMENT]
+        if metric: clauses.append("metric = ?"); args.append(metric)
+        if status: clauses.append("status = ?"); args.append(status)
+        if start: clauses.append("day >= ?"); args.append(start)
+        if end: clauses.append("day <= ?"); args.append(end)
+        coaches = list(coaches or [])
+        if coaches:
+            clauses.append(f"coach IN ({','.join('?' * len(coaches))})"); args += coaches
+        return " WHERE " + " AND ".join(clauses), args
+
+    def _query(self, sql: str, args: list) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=args)
+
+    def instruments(self) -> List[str]:
+        return self._query("SELECT DISTINCT instrument FROM dims ORDER BY instrument", [])["instrument"].tolist()
+
+    def coaches(self) -> List[str]:
+        return self._query("SELECT DISTINCT coach FROM dims ORDER BY coach", [])["coach"].tolist()
+
+    def day_range(self) -> Tuple[Optional[str], Optional[str]]:
+        r = self._query("SELECT MIN(day) AS lo, MAX(day) AS hi FROM dims WHERE day != ''", []).iloc[0]
+        return r["lo"], r["hi"]
+
+    # Queries cover one instrument (default soulful@1): scores of different versions don't mix
+    def submissions(self, coaches=None, start=None, end=None, instrument: Optional[str] = None) -> int:
+        # every record adds exactly one entry to the first metric
+        where, args = self._where(coaches, start, end, METRICS[0], instrument=instrument)
+        return int(self._query(f"SELECT COALESCE(SUM(n), 0) AS n FROM stats{where}", args)["n"].iloc[0])
+
+    def summary(self, coaches=None, start=None, end=None, instrument: Optional[str] = None) -> pd.DataFrame:
+        where, args = self._where(coaches, start, end, instrument=instrument)
+        df = self._query(f"SELECT metric, SUM(n) AS n, SUM(total) AS total, SUM(total_sq) AS total_sq "
+                         f"FROM stats{where} GROUP BY metric", args)
+        df["mean"] = df["total"] / df["n"]
+        df["std"] = np.sqrt(np.maximum(df["total_sq"] / df["n"] - df["mean"] ** 2, 0))
+        order = {m: i for i, m in enumerate(METRICS)}
+        return df.sort_values("metric", key=lambda s: s.map(order))[["metric", "n", "mean", "std"]].reset_index(drop=True)
+
+    def distribution(self, metric: str, coaches=None, start=None, end=None, status: Optional[str] = None,
+                     instrument: Optional[str] = None) -> pd.DataFrame:
+        where, args = self._where(coaches, start, end, metric, status, instrument)
+        return self._query(f"SELECT bucket, SUM(n) AS n FROM rollup{where} GROUP BY bucket ORDER BY bucket", args)
+
+    def status_counts(self, coaches=None, start=None, end=None, prefix: str = "chakra_",
+                      instrument: Optional[str] = None) -> pd.DataFrame:
+        where, args = self._where(coaches, start, end, instrument=instrument)
+        where += " AND metric LIKE ?"
+        df = self._query(f"SELECT metric, status, SUM(n) AS n FROM stats{where} GROUP BY metric, status", args + [prefix + "%"])
+        return df.pivot(index="metric", columns="status", values="n").fillna(0).astype(int)
+
+    def daily(self, metric: str, coaches=None, start=None, end=None, instrument: Optional[str] = None) -> pd.DataFrame:
+        where, args = self._where(coaches, start, end, metric, instrument=instrument)
+        df = self._query(f"SELECT day, SUM(n) AS n, SUM(total) AS total FROM stats{where} GROUP BY day ORDER BY day", args)
+        df["mean"] = df["total"] / df["n"]
+        return df[["day", "n", "mean"]]
+
+    def close(self) -> None:
+        self._conn.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy analytics rollups.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="recompute rollups from the record store")
+    r.add_argument("store", nargs="?", default=str(DATA_DIR / "records.db"))
+    r.add_argument("--rollups", default=str(ROLLUP_PATH))
+    args = ap.parse_args(argv)
+    store = open_store(args.store)
+    n = Rollups(args.rollups).rebuild(store)
+    store.close()
+    print(f"rolled up {n} records into {args.rollups}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# Soulful Academy — HTTP API (headless)
+# Partner forms post answers + client meta and get back scores or the PDF. Same instruments,
+# remedy tables and build_pdf as the Streamlit app.
+#
+#   POST /score    {"instrument": "soulful@1",                       (optional, default instrument)
+#                   "respondents": [{"answers": ..., "meta": {...}}, ...]}
+#                  -> {"instrument": ..., "results": [{traits, trait_bands, chakras, chakra_status, verdict, remedies}]}
+#   POST /report   {"instrument": ..., "answers": ..., "meta": {...}} -> application/pdf
+#                  (compact PDF like the app's; "compact": false embeds the logo at full resolution)
+#   GET  /health   instruments, render queue depth, PDF cache stats
+#
+# "answers" is either a list in the instrument's answer-column order (q1..q10, Root_1..Crown_3)
+# or an object keyed by those columns. Scoring runs in a thread; PDFs render in a bounded
+# process pool (render_pool.py), so a slow render never holds up /score. When the render
+# queue is full /report answers 503 with Retry-After.
+#
+#   uvicorn api:create_app --factory --port 8600
+#   SOULFUL_API_WORKERS=4 SOULFUL_API_MAX_PENDING=32 uvicorn api:create_app --factory
+#
+# The app (render pool, data/pdf_cache) is built only when served: importing api starts nothing.
+#
+# Tests and partners' CI can call it in-process, without a socket:
+#   from starlette.testclient import TestClient; TestClient(api.create_app()).post("/score", json=...)
+# (TestClient needs httpx; tests/test_api.py drives every route this way)
+
+import asyncio, os
+from urllib.parse import quote
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from scoring import TRAITS, CHAKRAS, Instrument, get_instrument, instruments
+from remedies import MYAURABLISS, chakra_long_remedy
+from pdf_cache import ReportCache
+from render_pool import RenderPool
+from report import LOGO_PATH, load_logo, report_filename
+from store import META_COLUMNS
+from metrics import span
+
+MAX_BATCH = 10_000   # respondents per /score request
+RETRY_AFTER = 2      # seconds, sent with 503 when the render queue is full
+
+class ApiError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status, self.detail = status, detail
+
+# -------------------- Input --------------------
+def _instrument(body: Dict) -> Instrument:
+    key = body.get("instrument")
+    if key is not None and not isinstance(key, str): raise ApiError(422, "instrument must be a string (id@version)")
+    if key is not None and key not in instruments():
+        raise ApiError(404, f"unknown instrument {key!r} (available: {', '.join(instruments())})")
+    return get_instrument(key)
+
+def _answers(inst: Instrument, respondents: List[Dict]) -> np.ndarray:
+    cols, (lo, hi) = inst.answer_columns, inst.scale
+    rows = []
+    for i, r in enumerate(respondents):
+        a = r.get("answers") if isinstance(r, dict) else None
+        if isinstance(a, dict):
+            missing = [c for c in cols if c not in a]
+            if missing: raise ApiError(422, f"respondent {i}: missing answers {', '.join(missing)}")
+            a = [a[c] for c in cols]
+        if not isinstance(a, list) or len(a) != len(cols):
+            raise ApiError(422, f"respondent {i}: expected {len(cols)} answers ({inst.key})")
+        if not all(isinstance(v, int) and not isinstance(v, bool) and lo <= v <= hi for v in a):
+            raise ApiError(422, f"respondent {i}: answers must be integers {lo}..{hi}")
+        rows.append(a)
+    return np.array(rows, dtype=np.int8).reshape(len(rows), len(cols))
+
+def _meta(r: Dict) -> Dict[str,str]:
+    meta = r.get("meta") or {}
+    if not isinstance(meta, dict): raise ApiError(422, "meta must be an object")
+    return {k: (str(meta.get(k) or "").strip() or ("" if k in ("email","phone") else "—")) for k in META_COLUMNS}
+
+def _flag(body: Dict, key: str, default: bool) -> bool:
+    v = body.get(key, default)
+    if not isinstance(v, bool): raise ApiError(400, f"{key} must be true or false")
+    return v
+
+def _attachment(filename: str) -> str:
+    # Client names can be any script; header values must be latin-1, so add an RFC 5987 UTF-8 form
+    ascii_name = filename.encode("ascii", "replace").decode().replace("?", "_").replace('"', "_")
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+async def _json(request: Request) -> Dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ApiError(400, "body must be JSON")
+    if not isinstance(body, dict): raise ApiError(400, "body must be a JSON object")
+    return body
+
+# -------------------- Scoring --------------------
+def score_respondents(inst: Instrument, respondents: List[Dict]) -> List[Dict]:
+    s = inst.score(_answers(inst, respondents))
+    results = []
+    for i in range(len(respondents)):
+        status = dict(zip(CHAKRAS, s.chakra_status[i].tolist()))
+        results.append({
+            "traits": s.trait_dict(i), "trait_bands": dict(zip(TRAITS, s.trait_bands[i].tolist())),
+            "chakras": s.chakra_dict(i), "chakra_status": status, "verdict": str(s.verdicts[i]),
+            "remedies": {ch: {"text": chakra_long_remedy(st, ch), "crystals": MYAURABLISS.get(ch, [])}
+                         for ch, st in status.items()}})
+    return results
+
+# -------------------- App --------------------
+def create_app(pool: Optional[RenderPool] = None, logo_path: str = LOGO_PATH) -> Starlette:
+    workers = int(os.environ.get("SOULFUL_API_WORKERS", 0)) or None
+    max_pending = int(os.environ.get("SOULFUL_API_MAX_PENDING", 0)) or None
+    pool = pool or RenderPool(workers, max_pending, cache=ReportCache())
+    logo = load_logo(logo_path)
+
+    async def score(request: Request) -> Response:
+        body = await _json(request)
+        respondents = body.get("respondents")
+        if not isinstance(respondents, list) or not respondents:
+            raise ApiError(422, "respondents must be a non-empty list")
+        if len(respondents) > MAX_BATCH:
+            raise ApiError(413, f"at most {MAX_BATCH} respondents per request")
+        inst = _instrument(body)
+        with span("api.score", respondents=len(respondents)):
+            results = await run_in_threadpool(score_respondents, inst, respondents)
+        return JSONResponse({"instrument": inst.key, "results": results})
+
+    async def report(request: Request) -> Response:
+        body = await _json(request)
+        inst = _instrument(body)
+        meta, compact = _meta(body), _flag(body, "compact", True)
+        s = await run_in_threadpool(inst.score, _answers(inst, [body]))
+        with span("api.report") as sp:
+            job = pool.submit(s.trait_dict(0), s.chakra_dict(0), logo, meta, compact,
+                              instrument=inst.key)
+            if job is None:
+                raise ApiError(503, "report renderers are busy, retry shortly")
+            try:
+                pdf = await asyncio.shield(asyncio.wrap_future(job))   # a dropped client must not cancel a shared job
+            except Exception as e:   # raised in the render worker; the client gets JSON, not a bare 500
+                raise ApiError(500, f"report rendering failed: {type(e).__name__}: {e}")
+            sp["bytes"] = len(pdf)
+        return Response(pdf, media_type="application/pdf",
+                        headers={"Content-Disposition": _attachment(report_filename(meta))})
+
+    async def health(request: Request) -> Response:
+        return JSONResponse({"status": "ok", "instruments": list(instruments()), "render_pending": pool.pending(),
+                             "render_rejected": pool.rejected, "pdf_cache": pool.cache.stats() if pool.cache else None})
+
+    async def api_error(request: Request, exc: ApiError) -> Response:
+        headers = {"Retry-After": str(RETRY_AFTER)} if exc.status == 503 else None
+        return JSONResponse({"error": exc.detail}, status_code=exc.status, headers=headers)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        yield
+        await run_in_threadpool(pool.shutdown)
+
+    return Starlette(routes=[Route("/score", score, methods=["POST"]), Route("/report", report, methods=["POST"]),
+                             Route("/health", health)],
+                     exception_handlers={ApiError: api_error}, lifespan=lifespan)
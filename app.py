@@ -1,30 +1,40 @@
 # Soulful Academy — Personality + Chakra Scan (Full App)
 # Flow: Form → Analyze (screen) → Download PDF
-# Includes: CSV saving (optional), Paid-gating stub, Branded PDF
+# Includes: Local record store (optional), Paid gating (payments.py), Branded PDF
 
-import io, os, base64, datetime as dt
-from dataclasses import dataclass
+import os, base64, datetime as dt
+from concurrent.futures import Future
 from typing import Dict, List, Tuple, Optional
-from pathlib import Path
 
-import numpy as np
 import pandas as pd
 import streamlit as st
 
-# ReportLab (PDF)
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle, Image, PageBreak
-from reportlab.graphics.shapes import Drawing, Rect
-from reportlab.graphics.charts.barcharts import VerticalBarChart
+from scoring import DEFAULT_INSTRUMENT, get_instrument, instruments, verdict
+from remedies import chakra_long_remedy, ordinal
+from pdf_cache import ReportCache
+from render_pool import RenderPool
+from store import CSV_PATH, DB_PATH, CsvStore, SqliteStore, migrate_csv, record_row
+from archive import with_archive
+from analytics import Rollups
+from history import ClientHistory
+from norms import Norms
+from mailer import Mailer, report_email
+from payments import Checkouts, PaymentError, checkout_url, gate_from_env
+import metrics
+from metrics import span
 
 # -------------------- Settings --------------------
 APP_TITLE = "Soulful Academy — Personality + Chakra Scan"
 LOGO_PATH = "assets/soulful_logo.png"   # place your logo here
-SAVE_TO_CSV = True                      # set False to disable local CSV saving
-PAID_GATE_ENABLED = True               # set True to require payment before PDF download (stub)
+SAVE_LOCAL = True                       # set False to disable local record saving
+STORE_BACKEND = "sqlite"                # "sqlite" (data/records.db) or "csv" (data/records.csv)
+PAID_GATE_ENABLED = True               # set True to require payment before PDF download (provider via env, see payments.py)
+PAYMENT_LINK = os.environ.get("SOULFUL_PAYMENT_LINK", "")   # checkout page; it redirects back with ?session_id=...
+INSTRUMENT = DEFAULT_INSTRUMENT         # questionnaire version (instruments/*.json); ?instrument=<id@version> overrides
+PDF_COMPACT = True                      # logo downscaled to print size: ~12x smaller PDF; no logo, no gain (report.py)
+METRICS_PORT = 0                        # >0 serves stage timings at http://localhost:<port>/metrics (see metrics.py)
+EMAIL_REPORTS = True                    # "Email PDF" button next to Download; sent in the background (mailer.py, SMTP via env)
+NORMS_BY = None                         # percentiles among all clients; "coach" or "gender" compares within that group
 
 # Colors / theme
 PRIMARY_PURPLE = "#4B0082"
@@ -35,25 +45,20 @@ CTA_GOLD_1     = "#FFD86F"
 CTA_GOLD_2     = "#FFB347"
 TEXT_VIOLET    = "#2D033B"
 
-# Chakra colors
-CHAKRA_COLORS = {
-    "Root": "#EA4335", "Sacral": "#F4A261", "Solar Plexus": "#E9C46A",
-    "Heart": "#34A853", "Throat": "#4285F4", "Third Eye": "#7E57C2", "Crown": "#B39DDB"
-}
-
 st.set_page_config(page_title=APP_TITLE, page_icon="🔮", layout="centered")
 
-# -------------------- Logo load --------------------
-logo_bytes: Optional[bytes] = None
-logo_html = ""
-if os.path.exists(LOGO_PATH):
-    with open(LOGO_PATH, "rb") as f:
-        logo_bytes = f.read()
-        b64 = base64.b64encode(logo_bytes).decode("utf-8")
-        logo_html = f"<div class='header-logo' style=\"background-image:url(data:image/png;base64,{b64})\"></div>"
-
-# -------------------- CSS --------------------
-st.markdown(f"""
+# -------------------- Logo + CSS --------------------
+# Built once per process (not on every rerun); restart the app after replacing the logo.
+@st.cache_resource
+def load_assets() -> Tuple[Optional[bytes], str, str]:
+    logo_bytes: Optional[bytes] = None
+    logo_html = ""
+    if os.path.exists(LOGO_PATH):
+        with open(LOGO_PATH, "rb") as f:
+            logo_bytes = f.read()
+            b64 = base64.b64encode(logo_bytes).decode("utf-8")
+            logo_html = f"<div class='header-logo' style=\"background-image:url(data:image/png;base64,{b64})\"></div>"
+    css = f"""
 <style>
 body {{
   background: linear-gradient(135deg, {LAVENDER}, {SOFT_GOLD_BG});
@@ -91,19 +96,42 @@ section.main > div {{ max-width: 980px; }}
   box-shadow:0 10px 24px rgba(255,184,71,.35); text-transform:uppercase; letter-spacing:.4px;
 }}
 </style>
-""", unsafe_allow_html=True)
-
-# -------------------- Header --------------------
-st.markdown(f"""
+"""
+    header = f"""
 <div class='header-band'>
   {logo_html}
   <h1>🔮 Personality + Chakra Scan</h1>
   <p>Discover your personality type & chakra balance — powered by Soulful Academy.</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+    return logo_bytes, css, header
+
+logo_bytes, page_css, header_html = load_assets()
+st.markdown(page_css, unsafe_allow_html=True)
+
+# -------------------- Header --------------------
+st.markdown(header_html, unsafe_allow_html=True)
 
 # -------------------- Form --------------------
-with st.form("client_form"):
+requested = st.query_params.get("instrument", INSTRUMENT)
+instrument = get_instrument(requested if requested in instruments() else INSTRUMENT)
+SCALE = list(range(instrument.scale[0], instrument.scale[1]+1))
+MID = SCALE[len(SCALE)//2]
+
+# Left/right statement rows, built once per instrument: one element per item instead of two columns + two writes
+@st.cache_resource
+def pair_html(key: str) -> List[str]:
+    return [f"<div style='display:flex;justify-content:space-between;gap:16px'>"
+            f"<span>{it.left}</span><span style='text-align:right'>{it.right}</span></div>" for it in get_instrument(key).items]
+
+def dot_radio(key: str, default: int = MID) -> int:
+    val = st.session_state.get(key, default)
+    idx = SCALE.index(val) if val in SCALE else SCALE.index(default)
+    val = st.radio("", SCALE, index=idx, key=f"_r_{key}", horizontal=True, label_visibility="collapsed")
+    st.session_state[key] = val
+    return val
+
+with st.form("client_form"), span("form"):
     c1, c2 = st.columns([1.2, 1])
     full_name = c1.text_input("Full Name")
     email     = c2.text_input("Email Address")
@@ -118,396 +146,286 @@ with st.form("client_form"):
     st.divider()
 
     st.header("Part 1 · Personality")
-    st.caption("For each pair: 1 = left statement, 7 = right statement.")
-
-    @dataclass
-    class Item:
-        left: str
-        right: str
-        trait: str
-        reverse: bool = False
-
-    PERSONALITY_ITEMS: List[Item] = [
-        Item("I am often disorganized", "I keep myself organized", "C"),
-        Item("I decide with my head", "I decide with my heart", "A", True),
-        Item("I prefer trusted methods", "I like to innovate", "O", True),
-        Item("I keep thoughts to myself", "I speak up", "E"),
-        Item("I avoid attention", "I enjoy attention", "E"),
-        Item("I pursue my own goals", "I look for ways to help others", "A", True),
-        Item("I let others start conversations", "I start conversations", "E"),
-        Item("I like ideas that are easy", "I like ideas that are complex", "O"),
-        Item("I can be careless", "I follow through on tasks", "C"),
-        Item("I distrust people easily", "I trust people easily", "A"),
-    ]
-
-    def dot_radio(key: str, default: int = 4) -> int:
-        opts = list(range(1,8))
-        idx = opts.index(st.session_state.get(key, default))
-        val = st.radio("", opts, index=idx, key=f"_r_{key}", horizontal=True, label_visibility="collapsed")
-        st.session_state[key] = val
-        return val
-
-    responses: List[Tuple[Item,int]] = []
-    for i, item in enumerate(PERSONALITY_ITEMS, start=1):
-        lc, rc = st.columns(2)
-        with lc: st.write(item.left)
-        with rc: st.write(f"<div style='text-align:right'>{item.right}</div>", unsafe_allow_html=True)
-        responses.append((item, dot_radio(f"q{i}", 4)))
+    st.caption(f"For each pair: {SCALE[0]} = left statement, {SCALE[-1]} = right statement.")
+
+    answers: List[int] = []   # same order as instrument.answer_columns
+    for i, row in enumerate(pair_html(instrument.key), start=1):
+        st.markdown(row, unsafe_allow_html=True)
+        answers.append(dot_radio(f"q{i}"))
         st.markdown("---")
 
     st.header("Part 2 · Chakra Scan")
-    st.caption("Rate each (1 = Strongly Disagree, 7 = Strongly Agree). Higher is healthier.")
-
-    CHAKRA_QUESTIONS: Dict[str, List[str]] = {
-        "Root": ["I feel safe and grounded in daily life.","I keep consistent routines (sleep, food, movement).","I manage money and basic needs calmly."],
-        "Sacral": ["I allow myself pleasure and creativity.","My relationships feel warm and emotionally alive.","I express feelings without guilt or shame."],
-        "Solar Plexus": ["I take decisive action toward goals.","I keep healthy boundaries and say no when needed.","I trust my capability to handle challenges."],
-        "Heart": ["I forgive myself and others with ease.","I feel connected to people and life.","I practice gratitude and compassion daily."],
-        "Throat": ["I speak my truth calmly and clearly.","I listen well and communicate honestly.","I express my needs without fear."],
-        "Third Eye": ["I reflect and learn from patterns in my life.","I visualize outcomes before I act.","I trust my intuition when logic is equal."],
-        "Crown": ["I feel guided by a higher purpose.","I spend time in silence or meditation.","I experience moments of awe or connection."],
-    }
-
-    chakra_scores: Dict[str, List[int]] = {k: [] for k in CHAKRA_QUESTIONS}
-    for ch, qs in CHAKRA_QUESTIONS.items():
+    st.caption(f"Rate each ({SCALE[0]} = Strongly Disagree, {SCALE[-1]} = Strongly Agree). Higher is healthier.")
+
+    for ch, qs in instrument.chakra_questions.items():
         st.subheader(ch)
         for j, q in enumerate(qs, start=1):
             st.write(q)
-            chakra_scores[ch].append(dot_radio(f"{ch}_{j}", 4))
+            answers.append(dot_radio(f"{ch}_{j}"))
         st.markdown("---")
 
     submitted = st.form_submit_button("🔎 Analyze")
 
-# -------------------- Scoring helpers --------------------
-@st.cache_data
-def score_personality(items: List[Tuple[Item,int]]) -> Dict[str,float]:
-    vals={t:[] for t in "OCEAN"}
-    for it,val in items:
-        v=(val-4)  # -3..+3 centered
-        if it.reverse: v=-v
-        vals[it.trait].append(v)
-    return {t: float(np.mean(v)) if v else 0 for t,v in vals.items()}
-
-def summarize_trait(name:str,score:float)->str:
-    bands=[(-3,-1.6,"Low"),(-1.6,-0.5,"Below Avg"),(-0.5,0.5,"Balanced"),(0.5,1.6,"High"),(1.6,3.1,"Very High")]
-    label=next(lbl for lo,hi,lbl in bands if lo<=score<hi)
-    return f"{label}"
-
-@st.cache_data
-def score_chakras(scores: Dict[str, List[int]]) -> Dict[str, float]:
-    return {k: float(np.mean(v)) if v else 0.0 for k, v in scores.items()}
-
-def chakra_status(v: float) -> str:
-    return "Balanced" if 3.8 <= v <= 5.8 else ("Overactive" if v > 5.8 else "Blocked")
-
-MYAURABLISS = {
-    "Root": ["Red Jasper","Hematite","Black Tourmaline"],
-    "Sacral": ["Carnelian","Orange Calcite","Moonstone"],
-    "Solar Plexus": ["Citrine","Tiger's Eye","Yellow Aventurine"],
-    "Heart": ["Rose Quartz","Green Aventurine","Malachite"],
-    "Throat": ["Sodalite","Blue Apatite","Aquamarine"],
-    "Third Eye": ["Amethyst","Lapis Lazuli","Lepidolite"],
-    "Crown": ["Clear Quartz","Amethyst","Selenite"],
-}
-
-def short_remedy(status: str, chakra: str) -> str:
-    base = {
-      "Root":"Grounding walk, red foods",
-      "Sacral":"Creative play, water ritual",
-      "Solar Plexus":"Power poses, celebrate small wins",
-      "Heart":"Gratitude + forgiveness",
-      "Throat":"Speak your truth / sing",
-      "Third Eye":"Visualization + journaling",
-      "Crown":"Silence, service, prayer",
-    }
-    return f"{base.get(chakra,'')} • Crystals: {', '.join(MYAURABLISS.get(chakra, []))}"
-
-def chakra_long_remedy(status: str, chakra: str) -> str:
-    tips = {
-      "Root": "Stabilize your base: consistent meals, sleep, and movement. Walk barefoot, breathe into the belly, and repeat ‘I am safe’.",
-      "Sacral": "Unfreeze emotions gently: sway/dance, warm showers, and creative expression. Let joy be allowed, not earned.",
-      "Solar Plexus": "Rebuild power with small promises kept. Micro-wins restore confidence; practice firm, kind boundaries.",
-      "Heart": "Release resentment with daily gratitude. Ho’oponopono on the name that triggers tightness in the chest.",
-      "Throat": "Practice clear, calm requests. Journal the truth you’re afraid to say, then voice a kinder, shorter version.",
-      "Third Eye": "Track patterns. 5-minute nightly visualization of tomorrow’s ‘best next step’.",
-      "Crown": "10 minutes of silence, witness thoughts pass, place a clear quartz near crown while breathing slowly.",
-    }
-    return f"{status}. {tips.get(chakra,'')}"
-
-# Optional: local CSV persistence
-def save_local(meta: Dict[str,str], traits: Dict[str,float], chakras: Dict[str,float]):
-    if not SAVE_TO_CSV: return
-    Path("data").mkdir(exist_ok=True)
-    row = {**meta,
-           **{f"trait_{k}":round(v,3) for k,v in traits.items()},
-           **{f"chakra_{k}":round(v,3) for k,v in chakras.items()}}
-    file = Path("data/records.csv")
-    df = pd.DataFrame([row])
-    if file.exists():
-        df.to_csv(file, mode="a", header=False, index=False)
+# Rendered PDFs keyed by content, so reruns and repeat downloads don't rebuild the document
+@st.cache_resource
+def get_report_cache():
+    return ReportCache()
+
+# PDFs render in a bounded process pool shared by all sessions (see render_pool.py)
+@st.cache_resource
+def get_render_pool():
+    return RenderPool(cache=get_report_cache())
+
+# Optional: local persistence (one store per process, shared by all sessions)
+@st.cache_resource
+def get_store():
+    if STORE_BACKEND == "csv": return with_archive(CsvStore())   # months compacted by archive.py stay readable
+    fresh = not DB_PATH.exists()
+    store = SqliteStore()
+    if fresh and CSV_PATH.exists(): migrate_csv(CSV_PATH, store)   # first run after switching from CSV
+    return with_archive(store)
+
+@st.cache_resource
+def get_rollups():
+    rollups = Rollups()
+    if rollups.is_empty(): rollups.rebuild(get_store())   # records saved before rollups existed
+    return rollups
+
+# Earlier sessions per client (email/phone), for the progress charts
+@st.cache_resource
+def get_history():
+    history = ClientHistory()
+    if history.is_empty(): history.rebuild(get_store())   # records saved before the index existed
+    return history
+
+# Percentile norms: one quantile sketch per score column and group (see norms.py)
+@st.cache_resource
+def get_norms():
+    norms = Norms()
+    if norms.is_empty(): norms.rebuild(get_store())   # records saved before norms existed
+    return norms
+
+# Outgoing report emails: a persistent queue drained by one background sender per process
+@st.cache_resource
+def get_mailer():
+    return Mailer().start()
+
+# Checkout verification: one provider call per checkout session, shared by all sessions (see payments.py)
+@st.cache_resource
+def get_payment_gate():
+    return gate_from_env()   # None until SOULFUL_PAYMENT_PROVIDER is set
+
+# Results waiting for their checkout, keyed by the reference the payment link carries
+@st.cache_resource
+def get_checkouts():
+    return Checkouts()
+
+# Cache, render-queue and mail-queue gauges next to the stage timings; optional scrape endpoint
+@st.cache_resource
+def start_metrics():
+    cache, pool = get_report_cache(), get_render_pool()
+    metrics.add_collector(lambda: {f"pdf_cache_{k}": v for k, v in cache.stats().items()})
+    metrics.add_collector(lambda: {"render_pending": pool.pending(), "render_rejected": pool.rejected})
+    if EMAIL_REPORTS:
+        mailer = get_mailer()
+        metrics.add_collector(lambda: {f"mail_{k}": v for k, v in mailer.stats().items()})
+    gate = get_payment_gate()
+    if gate is not None: metrics.add_collector(lambda: {f"payment_{k}": v for k, v in gate.stats().items()})
+    return metrics.serve(METRICS_PORT) if METRICS_PORT else None
+
+start_metrics()
+
+def save_local(meta: Dict[str,str], traits: Dict[str,float], chakras: Dict[str,float], instrument_key: str):
+    if not SAVE_LOCAL: return
+    # rollups, history and norms first: a first-time rebuild must not see this row
+    store, rollups, history, norms = get_store(), get_rollups(), get_history(), get_norms()
+    with span("save_local"):
+        row = record_row(meta, traits, chakras, instrument_key)
+        store.append(row)
+        rollups.update([row])   # keeps the Coach Analytics page current without re-reading records
+        history.add([row])
+        norms.update([row])
+
+def pdf_job(traits: Dict[str,float], chakras: Dict[str,float], meta: Dict[str,str]) -> Optional[Future]:
+    # One render job per analysis; None while the pool is at capacity (retried by the poller)
+    if st.session_state.get("pdf_job") is None:
+        st.session_state["pdf_job"] = get_render_pool().submit(traits, chakras, logo_bytes, meta, PDF_COMPACT,
+                                                               st.session_state.get("history"),
+                                                               st.session_state.get("percentiles"),
+                                                               st.session_state.get("result_instrument"))
+    return st.session_state["pdf_job"]
+
+@st.fragment(run_every=0.5)
+def pdf_progress(traits: Dict[str,float], chakras: Dict[str,float], meta: Dict[str,str]):
+    job = pdf_job(traits, chakras, meta)
+    if job is not None and job.done(): st.rerun()   # full rerun swaps this poller for the download button
+    with st.status("Preparing your PDF…", state="running"):
+        if job is None: st.write("All report renderers are busy — yours starts as soon as one frees up.")
+        elif job.running(): st.write("Rendering…")
+        else: st.write(f"Queued ({get_render_pool().pending()} reports in progress)")
+
+def pdf_download(traits: Dict[str,float], chakras: Dict[str,float], meta: Dict[str,str]):
+    job = pdf_job(traits, chakras, meta)
+    if job is None or not job.done():
+        pdf_progress(traits, chakras, meta)
+    elif job.exception() is not None:
+        st.error(f"PDF generation failed: {job.exception()}")
     else:
-        df.to_csv(file, index=False)
+        from report import report_filename   # ReportLab stays unloaded until a PDF is needed
+        pdf = job.result()
+        with span("download", bytes=len(pdf)):
+            st.download_button(
+                "📄 Download Full PDF",
+                data=pdf,
+                file_name=report_filename(meta),
+                mime="application/pdf",
+                on_click="ignore"
+            )
+        if EMAIL_REPORTS and "@" in meta.get("email", ""):
+            email_report(pdf, meta)
+
+def email_report(pdf: bytes, meta: Dict[str,str]):
+    # Queues the PDF and returns at once; the mailer's thread does the SMTP work
+    from report import report_filename
+    if st.session_state.get("emailed") is None and st.button(f"📧 Email PDF to {meta['email']}"):
+        subject, body = report_email(meta)
+        with span("mail.enqueue", bytes=len(pdf)):
+            st.session_state["emailed"] = get_mailer().enqueue(meta["email"], subject, body, pdf, report_filename(meta))
+    if st.session_state.get("emailed") is not None:
+        st.success(f"Report queued for {meta['email']}.")
+
+def checkout_id() -> Optional[str]:
+    return st.query_params.get("session_id") or st.query_params.get("razorpay_payment_id")
+
+def restore_checkout():
+    # Back from checkout, usually in a new tab with an empty session: a checkout that paid for the
+    # configured purchase brings back the results it was for (already saved; not saved again)
+    gate, session_id = get_payment_gate(), checkout_id()
+    if gate is None or not session_id or "result" in st.session_state: return
+    try:
+        with span("payment.verify"):
+            ent = gate.verify(session_id)
+    except PaymentError as e:
+        st.error(f"Couldn't confirm your payment just now ({e}). Please reload in a moment.")
+        return
+    pending = get_checkouts().load(ent.reference) if ent is not None and ent.reference else None
+    if pending is None:
+        st.warning("This checkout's results have expired; please run the analysis again." if ent is not None and ent.reference
+                   else "This checkout isn't a completed payment for the report.")
+        return
+    st.session_state["result"] = (pending["traits"], pending["chakras"], pending["meta"])
+    st.session_state["result_instrument"], st.session_state["labels"] = pending["instrument"], tuple(pending["labels"])
+    st.session_state["history"], st.session_state["percentiles"] = pending["history"], pending["percentiles"]
+    st.session_state["checkout_ref"], st.session_state["paid_token"] = ent.reference, gate.token(ent)
+
+def paid() -> bool:
+    # A signed token for this result's checkout reference; a checkout id in the URL is verified once
+    gate = get_payment_gate()
+    if gate is None: return bool(st.session_state.get("paid"))
+    ref = st.session_state.get("checkout_ref")
+    if not ref: return False
+    try:
+        with span("payment.verify"):
+            token = gate.check(checkout_id(), ref, st.session_state.get("paid_token"))
+    except PaymentError as e:
+        st.error(f"Couldn't confirm your payment just now ({e}). Please try again in a moment.")
+        return False
+    if token: st.session_state["paid_token"] = token
+    return token is not None
+
+def pending_checkout(traits: Dict[str,float], chakras: Dict[str,float], meta: Dict[str,str]) -> Optional[str]:
+    # Keeps this result for the return from checkout; its reference travels in the payment link
+    if not (PAID_GATE_ENABLED and get_payment_gate()): return None
+    return get_checkouts().save({"traits": traits, "chakras": chakras, "meta": meta, "instrument": instrument.key,
+                                 "labels": st.session_state["labels"],
+                                 "history": st.session_state["history"], "percentiles": st.session_state["percentiles"]})
 
 # -------------------- On-screen results + PDF --------------------
 if submitted:
-    traits  = score_personality(responses)
-    chakras = score_chakras(chakra_scores)
+    meta = {"client": (full_name or "—").strip(), "coach": (coach or "—").strip(),
+            "date": (sdate or "—").strip(), "gender": gender,
+            "intent": (intent or "—").strip(), "email": (email or "").strip(), "phone": (phone or "").strip()}
+    with span("score", instrument=instrument.key):
+        scores = instrument.score(answers)   # one matrix product for the whole questionnaire
+    traits, chakras = scores.trait_dict(0), scores.chakra_dict(0)
+    # Bands and statuses by this instrument's cut-offs
+    st.session_state["labels"] = (dict(zip(traits, map(str, scores.trait_bands[0]))),
+                                  dict(zip(chakras, map(str, scores.chakra_status[0]))))
+    st.session_state["result"] = (traits, chakras, meta)
+    with span("history"):
+        st.session_state["history"] = get_history().sessions(meta) if SAVE_LOCAL else []   # before this scan is saved
+    with span("norms"):
+        norms = get_norms()
+        if SAVE_LOCAL: norms.refresh()   # picks up rows another process (ingest.py) saved meanwhile
+        st.session_state["percentiles"] = norms.percentiles(traits, chakras, meta, NORMS_BY, instrument.key) if SAVE_LOCAL else {}
+    st.session_state["result_instrument"] = instrument.key
+    st.session_state["checkout_ref"] = pending_checkout(traits, chakras, meta)   # a new report needs its own payment
+    for key in ("pdf_job", "emailed", "paid_token"): st.session_state.pop(key, None)
+else:
+    restore_checkout()
+
+# Results stay on screen across reruns (e.g. the one that shows the finished PDF)
+if "result" in st.session_state:
+    traits, chakras, meta = st.session_state["result"]
+    bands, status = st.session_state["labels"]
+    result_inst = get_instrument(st.session_state.get("result_instrument"))
+    (lo, hi), r = result_inst.scale, result_inst.trait_range
+    pct = st.session_state.get("percentiles") or {}
+    def rank(key: str) -> str: return ordinal(pct[key]) if key in pct else "—"
 
     # Personality screen
     st.subheader("Personality Profile (Big Five style)")
-    def verdict(ts: Dict[str,float]) -> str:
-        o, c, e, a = ts.get("O",0), ts.get("C",0), ts.get("E",0), ts.get("A",0)
-        if c>1.0 and o>0.5: return "Organized Visionary"
-        if e>1.0 and a>0.5: return "Warm Communicator"
-        if o>1.2 and c<-0.5: return "Creative Explorer"
-        if c>1.2 and e<-0.5: return "Calm Strategist"
-        return "Balanced Builder"
     st.write(f"**Verdict:** {verdict(traits)}")
 
     df_traits = pd.DataFrame(
-        [{"Trait": k, "Score (-3..+3)": round(v,2), "Band": summarize_trait(k,v)} for k,v in traits.items()]
+        [{"Trait": k, f"Score (-{r:g}..+{r:g})": round(v,2), "Band": bands[k], "Percentile": rank(f"trait_{k}")}
+         for k,v in traits.items()]
     )
     st.dataframe(df_traits, use_container_width=True)
 
     # Chakra screen
     st.subheader("Chakra Snapshot")
-    def status(v): return "Balanced" if 3.8<=v<=5.8 else ("Overactive" if v>5.8 else "Blocked")
     rows=[]
     for ch,v in chakras.items():
-        rows.append({"Chakra": ch, "Avg (1–7)": round(v,1), "%": round(v/7*100), "Status": status(v)})
+        rows.append({"Chakra": ch, f"Avg ({lo}–{hi})": round(v,1), "%": result_inst.scale_pct(v), "Status": status[ch],
+                     "Percentile": rank(f"chakra_{ch}")})
     st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    if pct: st.caption(f"Percentile: share of our clients{f' (same {NORMS_BY})' if NORMS_BY else ''} scoring lower.")
+
+    # Progress over time (returning clients)
+    history = st.session_state.get("history") or []
+    if history:
+        st.subheader("Progress Over Time")
+        sessions = history + [{"label": "Today", "traits": traits, "chakras": chakras}]
+        index = [f"{i}. {s['label']}" for i, s in enumerate(sessions, start=1)]   # dates can repeat
+        st.caption(f"This session compared with the previous {len(history)}.")
+        st.line_chart(pd.DataFrame([s["chakras"] for s in sessions], index=index))
+        st.line_chart(pd.DataFrame([s["traits"] for s in sessions], index=index))
 
     st.subheader("Key Remedies (Summary)")
     for ch,v in chakras.items():
-        st.markdown(f"**{ch}** — *{status(v)}*, score {v:.1f}")
-        st.write(chakra_long_remedy(status(v), ch))
-
-    # Meta + save
-    meta = {"client": (full_name or "—").strip(), "coach": (coach or "—").strip(),
-            "date": (sdate or "—").strip(), "gender": gender,
-            "intent": (intent or "—").strip(), "email": (email or "").strip(), "phone": (phone or "").strip()}
-    save_local(meta, traits, chakras)
-
-    # Paid gating (stub)
-    if PAID_GATE_ENABLED and not st.session_state.get("paid"):
-        st.warning("Payment required to download the full PDF. (Integrate Stripe/Razorpay and set PAID_GATE_ENABLED=True)")
+        st.markdown(f"**{ch}** — *{status[ch]}*, score {v:.1f}")
+        st.write(chakra_long_remedy(status[ch], ch))
+
+    if submitted: save_local(meta, traits, chakras, instrument.key)   # once per Analyze, not on later reruns
+
+    # Paid gating
+    if PAID_GATE_ENABLED and not paid():
+        st.warning("Payment required to download the full PDF." +
+                   ("" if get_payment_gate() else " (Set SOULFUL_PAYMENT_PROVIDER to verify checkouts; see payments.py)"))
+        ref = st.session_state.get("checkout_ref")
+        if PAYMENT_LINK and ref:
+            st.link_button("💳 Pay to unlock the PDF", checkout_url(PAYMENT_LINK, ref))
+            st.caption("Checkout opens in a new tab and brings this report back there once paid.")
     else:
-        # Build and offer PDF
-        pdf_bytes = None
-
-        # -------- PDF builder ----------
-        def build_pdf(traits: Dict[str,float],
-                      chakras: Dict[str,float],
-                      logo: Optional[bytes],
-                      meta: Dict[str,str]) -> bytes:
-            buf = io.BytesIO()
-            doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=28, rightMargin=28, topMargin=28, bottomMargin=28)
-
-            styles = getSampleStyleSheet()
-            H1 = ParagraphStyle("H1", parent=styles["Title"], fontSize=22, leading=26, textColor=colors.HexColor("#212121"), alignment=0)
-            H2 = ParagraphStyle("H2", parent=styles["Heading2"], fontSize=16, leading=20, textColor=colors.HexColor("#311B92"))
-            NORMAL = styles["Normal"]
-            SMALL  = ParagraphStyle("SMALL", parent=NORMAL, fontSize=9, leading=12, textColor=colors.HexColor("#616161"))
-            CELL   = ParagraphStyle("CELL", parent=NORMAL, fontSize=10, leading=13)
-            CELL_SM= ParagraphStyle("CELL_SM", parent=NORMAL, fontSize=9, leading=12)
-
-            story = []
-
-            def footer(canvas, doc_):
-                canvas.setFont("Helvetica", 8)
-                canvas.setFillColor(colors.HexColor("#666666"))
-                w, _ = A4
-                canvas.drawRightString(w-28, 18, f"Page {doc_.page}")
-                canvas.drawString(28, 18, "Soulful Academy • What You Seek Is Seeking You")
-
-            # Cover
-            left_cell = [Image(io.BytesIO(logo), width=90, height=90)] if logo else []
-            header = Table([[left_cell, Paragraph("<b>Soulful Academy — Chakra & Personality Report</b>", H1)]],
-                           colWidths=[3.0*cm, 14.0*cm])
-            header.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
-            story += [header, Spacer(1,6), Paragraph("A diagnostic report you can email to the client.", SMALL), Spacer(1,14)]
-
-            details = [
-                [Paragraph("<b>Client</b>", CELL_SM),          Paragraph(meta.get("client","—"), CELL_SM)],
-                [Paragraph("<b>Email</b>", CELL_SM),           Paragraph(meta.get("email",""), CELL_SM)],
-                [Paragraph("<b>Phone</b>", CELL_SM),           Paragraph(meta.get("phone",""), CELL_SM)],
-                [Paragraph("<b>Coach / Healer</b>", CELL_SM),  Paragraph(meta.get("coach","—"), CELL_SM)],
-                [Paragraph("<b>Session Date</b>", CELL_SM),    Paragraph(meta.get("date","—"), CELL_SM)],
-                [Paragraph("<b>Gender</b>", CELL_SM),          Paragraph(meta.get("gender","—"), CELL_SM)],
-                [Paragraph("<b>Intent / Focus</b>", CELL_SM),  Paragraph(meta.get("intent","—"), CELL_SM)],
-            ]
-            dtbl = Table(details, colWidths=[4.0*cm, 12.8*cm])
-            dtbl.setStyle(TableStyle([
-                ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#CCCCCC")),
-                ("BACKGROUND",(0,0),(0,-1),colors.HexColor("#EEE7FF")),
-                ("TEXTCOLOR",(0,0),(0,-1),colors.HexColor("#311B92")),
-                ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
-                ("WORDWRAP",(0,0),(-1,-1),"CJK"),
-            ]))
-            story += [dtbl, PageBreak()]
-
-            # Personality
-            def personality_verdict(ts: Dict[str,float]) -> str:
-                o, c, e, a = ts.get("O",0), ts.get("C",0), ts.get("E",0), ts.get("A",0)
-                if c>1.0 and o>0.5: return "Organized Visionary"
-                if e>1.0 and a>0.5: return "Warm Communicator"
-                if o>1.2 and c<-0.5: return "Creative Explorer"
-                if c>1.2 and e<-0.5: return "Calm Strategist"
-                return "Balanced Builder"
-
-            story += [Paragraph("Personality Profile (Big Five style)", H2), Spacer(1,6)]
-            story += [Paragraph(f"<b>What kind of personality are you?</b> {personality_verdict(traits)}", NORMAL), Spacer(1,8)]
-
-            pdata = [[Paragraph("<b>Trait</b>", CELL), Paragraph("<b>Score (-3..+3)</b>", CELL), Paragraph("<b>Summary</b>", CELL)]]
-            for t,v in traits.items():
-                pdata.append([Paragraph(t, CELL), Paragraph(f"{v:.2f}", CELL), Paragraph(summarize_trait(t, v), CELL)])
-            ptable = Table(pdata, colWidths=[3.0*cm, 3.5*cm, 11.5*cm])
-            ptable.setStyle(TableStyle([
-                ("BACKGROUND",(0,0),(-1,0),colors.HexColor("#EDE7F6")),
-                ("TEXTCOLOR",(0,0),(-1,0),colors.HexColor("#311B92")),
-                ("FONTNAME",(0,0),(-1,0),"Helvetica-Bold"),
-                ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#BBBBBB")),
-                ("VALIGN",(0,0),(-1,-1),"TOP"),
-                ("WORDWRAP",(0,0),(-1,-1),"CJK"),
-                ("ROWBACKGROUNDS",(0,1),(-1,-1),[colors.whitesmoke, colors.HexColor("#FAFAFA")]),
-            ]))
-            story += [ptable, Spacer(1,8)]
-
-            story += [Paragraph("<b>How to align with other personalities</b>", NORMAL)]
-            for tip in [
-                "With high-C (organized) people: agree on clear timelines and definitions of done.",
-                "With high-O (creative) people: brainstorm first, then lock one experiment to ship.",
-                "With high-E (expressive) people: allow talk-time, then summarize next actions.",
-                "With high-A (kind) people: invite honest feedback and set gentle boundaries.",
-            ]:
-                story.append(Paragraph("• "+tip, SMALL))
-            story.append(PageBreak())
-
-            # Big Summary
-            story += [
-                Paragraph("<b>Quick Reading</b>", H2),
-                Paragraph(
-                    "Start with the lowest blocked chakra and move upward. Use the crystal suggestions, pair with 108× Ho’oponopono on the main person/event linked to that chakra, and soften any overactive areas with grounding, slow breathing and clear boundaries.",
-                    NORMAL
-                ),
-                Spacer(1,6),
-                Paragraph("<b>Follow-up & Home Practice (7-Day Plan)</b>", H2),
-                Paragraph(
-                    "1) Day 1–2: Chakra awareness — 7–11 minutes Root→Crown meditation. "
-                    "2) Day 3–4: Emotional cleaning — journal ‘Who/what am I still holding in this chakra?’ + 108× Ho’oponopono. "
-                    "3) Day 5: Crystal activation — wear/place suggested MyAuraBliss crystal for 11 minutes. "
-                    "4) Day 6: Relationship repair — speak your truth (Throat/Heart). "
-                    "5) Day 7: Integration — repeat meditation and note shifts.",
-                    SMALL
-                ),
-                Spacer(1,6),
-                Paragraph("<b>Affirmations for Client</b>", H2),
-                Paragraph(
-                    "I am safe. I allow myself to receive love, support and money. My power is gentle and firm. "
-                    "My heart forgives and moves forward. My voice is heard. My mind is clear. I am divinely guided and supported.",
-                    SMALL
-                ),
-                Spacer(1,6),
-                Paragraph("<b>Crystal Support (MyAuraBliss)</b>", H2),
-                Paragraph(
-                    "Choose bracelet/crystal for the chakras that showed Blocked or Overactive. Wear daily for 21 days, cleanse on full moon, and charge with the affirmation above.",
-                    SMALL
-                ),
-                PageBreak()
-            ]
-
-            # Chakra Dashboard (no overlap)
-            story += [Paragraph("Chakra Dashboard", H2), Spacer(1,4)]
-
-            def bar_row(name: str, val: float) -> Table:
-                pct = max(0, min(100, round(val/7*100)))
-                col = colors.HexColor(CHAKRA_COLORS.get(name, "#777"))
-                barw = 300
-                d = Drawing(barw, 14)
-                d.add(Rect(0, 0, barw, 14, fillColor=colors.HexColor("#EEEEEE"), strokeColor=None))
-                d.add(Rect(0, 0, barw*(pct/100), 14, fillColor=col, strokeColor=None))
-                stat = chakra_status(val)
-                why  = Paragraph(f"{stat} — score {val:.1f}", SMALL)
-                summ = Paragraph(short_remedy(stat, name), SMALL)
-                t = Table([[Paragraph(f"<b>{name}</b>", CELL), d, Paragraph(f"{pct}%", SMALL), why, summ]],
-                          colWidths=[2.6*cm, 8.6*cm, 1.2*cm, 3.5*cm, 5.1*cm])
-                t.setStyle(TableStyle([
-                    ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
-                    ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#DDDDDD")),
-                    ("WORDWRAP",(0,0),(-1,-1),"CJK"),
-                ]))
-                return t
-
-            for ch, val in chakras.items():
-                story.append(bar_row(ch, val))
-                story.append(Spacer(1,4))
-
-            story.append(Spacer(1,6))
-            story.append(Paragraph("<b>Chakra balance snapshot (1–7)</b>", NORMAL))
-            chart = Drawing(420, 160)
-            bc = VerticalBarChart()
-            bc.x = 40; bc.y = 30; bc.height = 110; bc.width = 340
-            bc.data = [tuple(chakras[k] for k in chakras.keys())]
-            bc.categoryAxis.categoryNames = list(chakras.keys())
-            bc.valueAxis.valueMin = 0; bc.valueAxis.valueMax = 7; bc.valueAxis.valueStep = 1
-            bc.barWidth = 18
-            bc.bars[0].fillColor = colors.HexColor("#6E3CBC")
-            chart.add(bc)
-            story.append(chart)
-            story.append(PageBreak())
-
-            # Chakra Remedy Cards (fill pages with bigger text)
-            items = list(chakras.items())
-
-            def chakra_cards(title_txt: str, subset: List[Tuple[str,float]]):
-                story.append(Paragraph(title_txt, H2))
-                for ch, val in subset:
-                    stat = chakra_status(val)
-                    pct  = round(val/7*100)
-                    card = Table([
-                        [Paragraph(f"<b>{ch}</b>", CELL),
-                         Paragraph(f"Avg: {val:.1f} (≈{pct}%)<br/>{stat}", CELL)]
-                    ], colWidths=[8.0*cm, 8.0*cm])
-                    card.setStyle(TableStyle([
-                        ("BOX",(0,0),(-1,-1),0.5,colors.HexColor("#CFCFCF")),
-                        ("BACKGROUND",(0,0),(-1,0),colors.whitesmoke),
-                        ("VALIGN",(0,0),(-1,-1),"TOP"),
-                    ]))
-                    story.append(card)
-                    story.append(Spacer(1,4))
-                    longp = [
-                      Paragraph(chakra_long_remedy(stat, ch), CELL_SM),
-                      Paragraph(f"Crystals: {', '.join(MYAURABLISS.get(ch, []))}<br/>"
-                                "Daily: 7–11 min chakra breath • 108× Ho’oponopono on the main person/event • "
-                                "Journal 3 changes you notice", CELL_SM)
-                    ]
-                    desc = Table([longp], colWidths=[8.0*cm, 8.0*cm])
-                    desc.setStyle(TableStyle([
-                        ("BOX",(0,0),(-1,-1),0.25,colors.HexColor("#E0E0E0")),
-                        ("VALIGN",(0,0),(-1,-1),"TOP"),
-                        ("WORDWRAP",(0,0),(-1,-1),"CJK"),
-                    ]))
-                    story.append(desc)
-                    story.append(Spacer(1,8))
-
-            chakra_cards("Chakra Remedies — Part 1", items[:3]); story.append(PageBreak())
-            chakra_cards("Chakra Remedies — Part 2", items[3:5]); story.append(PageBreak())
-            chakra_cards("Chakra Remedies — Part 3", items[5:])
-
-            doc.build(story, onFirstPage=footer, onLaterPages=footer)
-            return buf.getvalue()
-
-        pdf_bytes = build_pdf(traits, chakras, logo_bytes, meta)
-        st.download_button(
-            "📄 Download Full PDF",
-            data=pdf_bytes,
-            file_name=f"SoulfulAcademy_Report_{(meta['client'] or 'Client').replace(' ','_')}.pdf",
-            mime="application/pdf"
-        )
+        pdf_download(traits, chakras, meta)
 
 # -------------------- Payment (notes)
 # To make paid:
-# 1) Implement Stripe or Razorpay Checkout server endpoint (best: cloud function)
-# 2) After successful payment, set st.session_state['paid'] = True (via redirect with session_id verification)
-# 3) Flip PAID_GATE_ENABLED = True above to gate the Download button
+# 1) Create a Stripe Payment Link / Checkout (or Razorpay payment link) whose success URL is this app,
+#    e.g. https://<app>/?session_id={CHECKOUT_SESSION_ID}, and set SOULFUL_PAYMENT_LINK to it; the app
+#    appends client_reference_id=<checkout reference> (Razorpay: pass it as notes[reference])
+# 2) Set SOULFUL_PAYMENT_PROVIDER plus the provider's key, SOULFUL_PAYMENT_AMOUNT/_CURRENCY (the price a
+#    checkout must have paid), SOULFUL_STRIPE_PAYMENT_LINK_ID and SOULFUL_PAYMENT_SECRET (payments.py)
+# 3) Keep PAID_GATE_ENABLED = True above to gate the Download button
 
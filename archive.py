@@ -0,0 +1,325 @@
+# Soulful Academy — Record archive
+# Closed months of records as compressed columnar files, so analysis stops re-parsing one
+# ever-growing CSV. compact() moves every row saved before a month (default: the current one)
+# out of the store into Parquet (zstd) files, one per month and coach per compaction:
+#   data/archive/month=2026-09/coach=Asha/part-<compaction>.parquet
+# The store keeps the hot tail (this month) and stays appendable as before. open_store() returns
+# ArchivedStore, one RecordStore over archive + tail, once the archive has files, so rollup /
+# history / norms rebuilds and exports see every record. Reads memory-map the files and decode
+# only the requested columns; read() also skips months and coaches outside the query.
+#
+# A row's month is when it was saved (created_at, UTC), else its session date; rows with
+# neither are archived as "0000-00". Compaction is crash-safe: parts are written as .tmp, then
+# _compaction.json records them and the cutoff before they are renamed and the store is trimmed.
+# The next compact() replays a journal it finds (renames the rest, trims), so a crash never
+# archives a row twice; .tmp parts without a journal are dropped. Needs pyarrow (pip install pyarrow).
+#
+#   python archive.py compact data/records.csv
+#   python archive.py compact data/records.db --before 2026-07
+#   python archive.py info
+
+import argparse, datetime as dt, json, os, re, sys, uuid
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from store import DATA_DIR, NUMERIC_PREFIXES, CsvStore, RecordStore, SqliteStore, _file_lock, _q, _typed
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+ARCHIVE_DIR = DATA_DIR / "archive"   # shared by both backends: it holds rows that left either store
+JOURNAL = "_compaction.json"
+UNDATED = "0000-00"
+CHUNKSIZE = 50_000
+
+def _require_pyarrow() -> None:
+    if pa is None: raise RuntimeError("the record archive needs pyarrow (pip install pyarrow)")
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name].fillna("").astype(str) if name in df.columns else pd.Series("", index=df.index)
+
+def months(df: pd.DataFrame) -> pd.Series:
+    # "YYYY-MM" per record: saved month (created_at is UTC ISO), else the dd-mm-yyyy session date
+    saved = _col(df, "created_at").str.slice(0, 7)
+    session = pd.to_datetime(_col(df, "date"), format="%d-%m-%Y", errors="coerce").dt.strftime("%Y-%m")
+    return saved.where(saved.str.match(r"^\d{4}-\d{2}$"), session.fillna(UNDATED))
+
+def month(created_at, date) -> str:
+    # months() for one row (the SQL function used to trim the SQLite store)
+    saved = str(created_at or "")[:7]
+    if re.match(r"^\d{4}-\d{2}$", saved): return saved
+    try:
+        return dt.datetime.strptime(str(date or ""), "%d-%m-%Y").strftime("%Y-%m")
+    except ValueError:
+        return UNDATED
+
+def _schema(columns: Sequence[str]) -> "pa.Schema":
+    return pa.schema([(c, pa.int64() if c == "schema_version" else pa.float64() if c.startswith(NUMERIC_PREFIXES)
+                       else pa.string()) for c in columns])
+
+def _table(chunk: pd.DataFrame, schema: "pa.Schema") -> "pa.Table":
+    df = _typed(chunk.reindex(columns=schema.names))
+    for f in schema:
+        if pa.types.is_string(f.type): df[f.name] = df[f.name].where(df[f.name].isna(), df[f.name].astype(str))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+# -------------------- Archive files --------------------
+class Archive:
+    def __init__(self, path=ARCHIVE_DIR):
+        _require_pyarrow()
+        self.path = Path(path)
+
+    def files(self, start: Optional[str] = None, end: Optional[str] = None,
+              coaches: Optional[Iterable[str]] = None) -> List[Path]:
+        # Parts in [start, end] ("YYYY-MM", inclusive) for the given coaches, pruned by directory name
+        wanted = set(coaches) if coaches else None
+        out = []
+        for d in sorted(self.path.glob("month=*/coach=*")):
+            m, coach = d.parent.name[len("month="):], unquote(d.name[len("coach="):])
+            if (start and m < start) or (end and m > end) or (wanted is not None and coach not in wanted): continue
+            out += sorted(d.glob("*.parquet"))
+        return out
+
+    def _dataset(self, files: List[Path]) -> "ds.Dataset":
+        # Memory-mapped; one schema across parts so columns added later read as null in older months
+        local = fs.LocalFileSystem(use_mmap=True)
+        schema = pa.unify_schemas([pq.read_schema(f, memory_map=True) for f in files])
+        return ds.dataset([str(f) for f in files], schema=schema, format="parquet", filesystem=local)
+
+    def iter_chunks(self, chunksize: int = CHUNKSIZE, columns: Optional[Sequence[str]] = None,
+                    files: Optional[List[Path]] = None) -> Iterator[pd.DataFrame]:
+        files = self.files() if files is None else files
+        if not files: return
+        data = self._dataset(files)
+        cols = [c for c in columns if c in data.schema.names] if columns else None
+        for batch in data.to_batches(columns=cols, batch_size=chunksize):
+            if batch.num_rows: yield batch.to_pandas()
+
+    def read(self, columns: Optional[Sequence[str]] = None, start: Optional[str] = None, end: Optional[str] = None,
+             coaches: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        files = self.files(start, end, coaches)
+        if not files: return pd.DataFrame(columns=list(columns or []))
+        data = self._dataset(files)
+        return data.to_table(columns=[c for c in columns if c in data.schema.names] if columns else None).to_pandas()
+
+    def count(self) -> int:
+        return sum(pq.ParquetFile(f, memory_map=True).metadata.num_rows for f in self.files())
+
+    def months(self) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for f in self.files():
+            m = f.parent.parent.name[len("month="):]
+            out[m] = out.get(m, 0) + pq.ParquetFile(f, memory_map=True).metadata.num_rows
+        return out
+
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.files())
+
+def _publish(path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists(): os.replace(tmp, path)
+
+class _Writers:
+    # One open ParquetWriter per (month, coach) for a compaction; files stay .tmp until commit()
+    def __init__(self, root: Path, schema: "pa.Schema", tag: str):
+        self.root, self.schema, self.tag = root, schema, tag
+        self._open: Dict[Tuple[str, str], Tuple[Path, "pq.ParquetWriter"]] = {}
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame, month_of: pd.Series) -> None:
+        coach = _col(chunk, "coach")
+        for (m, c), part in chunk.groupby([month_of, coach], sort=False):
+            if (m, c) not in self._open:
+                path = self.root / f"month={m}" / f"coach={quote(c, safe='')}" / f"part-{self.tag}.parquet"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                self._open[(m, c)] = (path, pq.ParquetWriter(tmp, self.schema, compression="zstd"))
+            self._open[(m, c)][1].write_table(_table(part, self.schema))
+            self.rows += len(part)
+
+    def close(self) -> List[str]:
+        # Finishes the .tmp files; returns the parts commit() publishes, relative to the archive
+        for _, w in self._open.values(): w.close()
+        return [path.relative_to(self.root).as_posix() for path, _ in self._open.values()]
+
+    def commit(self) -> None:
+        for path, _ in self._open.values(): _publish(path)
+
+    def abort(self) -> None:
+        for path, w in self._open.values():
+            w.close()
+            path.with_name(path.name + ".tmp").unlink(missing_ok=True)
+
+# -------------------- Compaction --------------------
+def _journal(archive: Path, entry: Optional[Dict[str, object]]) -> None:
+    path = archive / JOURNAL
+    if entry is None:
+        path.unlink(missing_ok=True)
+        return
+    tmp = path.with_name(JOURNAL + ".tmp")
+    tmp.write_text(json.dumps(entry))
+    os.replace(tmp, path)
+
+def _commit(writers: _Writers, entry: Dict[str, object]) -> None:
+    # Journal before publishing: from here on a crash leaves an entry that compact() replays
+    entry["parts"] = writers.close()
+    _journal(writers.root, entry)
+    writers.commit()
+
+def _compact_csv(store: CsvStore, before: str, writers_for) -> int:
+    # One pass under the store's lock: rows before `before` to the writers (None: drop them,
+    # when finishing an interrupted trim), the rest to the new tail file
+    header, moved = store._header(), 0
+    if header is None: return 0
+    tail = store.path.with_name(store.path.name + ".tmp")
+    with _file_lock(store.lock_path):
+        writers = writers_for(header) if writers_for else None
+        try:
+            with open(tail, "w", newline="", encoding="utf-8") as out:
+                pd.DataFrame(columns=header).to_csv(out, index=False, lineterminator="\r\n")   # as csv.writer
+                for chunk in pd.read_csv(store.path, dtype=str, keep_default_na=False, chunksize=CHUNKSIZE):
+                    m = months(chunk)
+                    closed = (m < before).to_numpy()
+                    if writers is not None and closed.any(): writers.write(chunk[closed], m[closed])
+                    chunk[~closed].to_csv(out, index=False, header=False, lineterminator="\r\n")
+                    moved += int(closed.sum())
+        except BaseException:
+            if writers is not None: writers.abort()
+            tail.unlink(missing_ok=True)
+            raise
+        if writers is not None: _commit(writers, {"store": str(store.path), "before": before})
+        os.replace(tail, store.path)   # the trim: archived rows leave the CSV
+    return moved
+
+def _compact_sqlite(store: SqliteStore, before: str, writers_for, max_id: Optional[int] = None) -> int:
+    # Rows up to the current last id only, so rows saved meanwhile are neither archived nor trimmed
+    conn = store._connect()
+    conn.create_function("archive_month", 2, month, deterministic=True)
+    try:
+        if max_id is None: max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0]
+        where = "id <= ? AND archive_month(created_at, date) < ?"
+        if writers_for:
+            writers = writers_for(store.columns)
+            try:
+                for chunk in pd.read_sql_query(f"SELECT {', '.join(map(_q, store.columns))} FROM records WHERE {where} ORDER BY id",
+                                               conn, params=(max_id, before), chunksize=CHUNKSIZE):
+                    writers.write(chunk, months(chunk))
+            except BaseException:
+                writers.abort()
+                raise
+            _commit(writers, {"store": str(store.path), "before": before, "max_id": max_id})
+        conn.execute("BEGIN IMMEDIATE")
+        moved = conn.execute(f"DELETE FROM records WHERE {where}", (max_id, before)).rowcount
+        conn.execute("COMMIT")
+        return moved
+    finally:
+        conn.close()
+
+def _replay(root: Path, store: RecordStore, entry: Dict[str, object]) -> int:
+    # Finish a journaled compaction: publish parts still .tmp, then trim the store (again, if it was)
+    if Path(str(entry["store"])).resolve() != store.path.resolve():
+        raise RuntimeError(f"{root / JOURNAL}: finish the interrupted compaction of {entry['store']} first "
+                           f"(python archive.py compact {entry['store']})")
+    for part in entry.get("parts", []): _publish(root / part)
+    if isinstance(store, CsvStore): return _compact_csv(store, str(entry["before"]), None)
+    return _compact_sqlite(store, str(entry["before"]), None, int(entry["max_id"]))
+
+def compact(store: RecordStore, before: Optional[str] = None, archive_path=ARCHIVE_DIR) -> Dict[str, object]:
+    # store: the tail (CsvStore / SqliteStore), not an ArchivedStore
+    _require_pyarrow()
+    if isinstance(store, ArchivedStore): store = store.tail
+    before = before or dt.datetime.now(dt.timezone.utc).strftime("%Y-%m")
+    if not re.match(r"^\d{4}-\d{2}$", before): raise ValueError(f"--before must be YYYY-MM, not {before!r}")
+    root = Path(archive_path)
+    root.mkdir(parents=True, exist_ok=True)
+    pending = root / JOURNAL
+    if pending.exists():
+        _replay(root, store, json.loads(pending.read_text()))
+        _journal(root, None)
+    for tmp in root.glob("month=*/coach=*/*.parquet.tmp"): tmp.unlink()   # parts of a run that never committed
+    made: List[_Writers] = []
+    def writers_for(columns: Sequence[str]) -> _Writers:
+        made.append(_Writers(root, _schema(columns), f"{dt.datetime.now(dt.timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"))
+        return made[-1]
+    if isinstance(store, CsvStore): moved = _compact_csv(store, before, writers_for)
+    else: moved = _compact_sqlite(store, before, writers_for)
+    _journal(root, None)
+    return {"archived": made[0].rows if made else 0, "trimmed": moved, "before": before,
+            "parts": len(made[0]._open) if made else 0}
+
+# -------------------- Unified reads --------------------
+class ArchivedStore(RecordStore):
+    # The archive's closed months followed by the store's hot tail, as one store; appends go to the tail
+    def __init__(self, tail: RecordStore, archive: Archive):
+        self.tail, self.archive = tail, archive
+        self.path = tail.path
+
+    def append_many(self, rows) -> None:
+        self.tail.append_many(rows)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        parts = [df for df in (self.archive.read(), self.tail.to_dataframe()) if len(df)]
+        return pd.concat(parts, ignore_index=True) if parts else self.tail.to_dataframe()
+
+    def iter_chunks(self, chunksize: int = CHUNKSIZE, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        yield from self.archive.iter_chunks(chunksize, columns)
+        yield from self.tail.iter_chunks(chunksize, columns)
+
+    def read(self, columns: Optional[Sequence[str]] = None, start: Optional[str] = None, end: Optional[str] = None,
+             coaches: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        # Records of the months [start, end] and coaches asked for, reading only `columns`
+        need = list(columns) + [c for c in ("created_at", "date", "coach") if c not in columns] if columns else None
+        tail = pd.concat(list(self.tail.iter_chunks(CHUNKSIZE, need)) or [pd.DataFrame(columns=need or [])], ignore_index=True)
+        m, keep = months(tail), pd.Series(True, index=tail.index)
+        if start: keep &= m >= start
+        if end: keep &= m <= end
+        if coaches: keep &= _col(tail, "coach").isin(list(coaches))
+        parts = [df for df in (self.archive.read(columns, start, end, coaches), tail[keep].reindex(columns=list(columns) if columns else tail.columns))
+                 if len(df)]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=list(columns or []))
+
+    def count(self) -> int:
+        return self.archive.count() + self.tail.count()
+
+    def close(self) -> None:
+        self.tail.close()
+
+def has_archive(path=ARCHIVE_DIR) -> bool:
+    return any(Path(path).glob("month=*/coach=*/*.parquet"))
+
+def with_archive(store: RecordStore) -> RecordStore:
+    # The store as open_store returns it: archive + tail once anything was compacted next to it
+    archive = store.path.parent / ARCHIVE_DIR.name
+    return ArchivedStore(store, Archive(archive)) if has_archive(archive) else store
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy record archive.")
+    ap.add_argument("--archive", default=str(ARCHIVE_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="move closed months of records into the archive")
+    c.add_argument("store", nargs="?", default=str(DATA_DIR / "records.db"))
+    c.add_argument("--before", help="archive rows saved before this month, YYYY-MM (default: the current month)")
+    sub.add_parser("info", help="archived rows per month")
+    args = ap.parse_args(argv)
+    if args.cmd == "compact":
+        store = CsvStore(args.store) if args.store.endswith(".csv") else SqliteStore(args.store)
+        r = compact(store, args.before, args.archive)
+        store.close()
+        print(f"archived {r['archived']} rows from before {r['before']} into {r['parts']} files; {args.store} keeps the rest")
+        return 0
+    archive = Archive(args.archive)
+    per_month = archive.months()
+    for m, n in per_month.items(): print(f"{m}  {n:>9}")
+    print(f"{sum(per_month.values())} rows, {len(archive.files())} files, {archive.size() / 1e6:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# Soulful Academy — Benchmark suite
+# Synthetic respondents from a fixed seed; every run measures the same work.
+#   scoring — scalar helpers (score_personality/score_chakras) and the batch matrix, 1 → 1M respondents
+#   store   — save_local path (record append + rollups, history, norms updates) per backend, rows/s
+#   pdf     — build_pdf latency (cold, median, p95), Python peak memory, PDF size without a logo; compact_*
+#             for compact=True, logo_* with a logo (--logo, report.LOGO_PATH, else a generated 0.9 MB PNG)
+#   history — client history lookup (p50) as the index grows 10k → --history-rows, and one add
+#   norms   — percentile lookup for one report and one save_local update, with 100k clients sketched
+#   archive — reading the columns a norms rebuild needs from --archive-rows records: CSV vs archive, and sizes
+#   payment — gated download: first check of a checkout (provider round trip), warm cache, signed token
+#   rerun   — app.py cold start, median rerun and median form submit through Streamlit's AppTest (bench_app.py)
+#
+#   python bench.py --out bench.json                       # run everything, write JSON
+#   python bench.py --only scoring,pdf
+#   python bench.py --out new.json --baseline bench.json   # flag regressions (exit 1)
+#
+# Metric names carry their direction: *_per_s is higher-is-better, everything else lower.
+
+import argparse, datetime as dt, io, json, os, platform, statistics, subprocess, sys, tempfile, time, tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from scoring import PERSONALITY_ITEMS, CHAKRA_QUESTIONS, ANSWER_COLUMNS, score_batch, score_personality, score_chakras
+import metrics
+
+SECTIONS = ["scoring", "store", "pdf", "history", "norms", "archive", "payment", "rerun"]
+SEED = 20240601
+
+def _answers(n: int, seed: int = SEED) -> np.ndarray:
+    return np.random.default_rng(seed).integers(1, 8, size=(n, len(ANSWER_COLUMNS)), dtype=np.int8)
+
+def _best(fn: Callable[[], object], repeat: int = 5, min_sample: float = 0.05) -> float:
+    # Seconds per call: best of `repeat` samples, each looping fn until it lasts min_sample
+    # (like timeit's autorange), so tiny calls aren't lost in timer and scheduler noise
+    number, t0 = 1, time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    if first > 0.5: repeat = min(repeat, 2)
+    while number * first < min_sample: number *= 2
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        times.append((time.perf_counter() - t0) / number)
+    return min(times)
+
+# -------------------- Scoring --------------------
+def _scalar(x: np.ndarray) -> None:
+    np_ = len(PERSONALITY_ITEMS)
+    for row in x.tolist():
+        score_personality(list(zip(PERSONALITY_ITEMS, row[:np_])))
+        k, chakras = np_, {}
+        for ch, qs in CHAKRA_QUESTIONS.items():
+            chakras[ch] = row[k:k+len(qs)]; k += len(qs)
+        score_chakras(chakras)
+
+def bench_scoring(max_n: int, scalar_max_n: int = 10_000) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    n = 1
+    while n <= max_n:
+        x = _answers(n)
+        out[f"batch_{n}_ms"] = _best(lambda: score_batch(x)) * 1000
+        if n <= scalar_max_n:   # the per-respondent path is ~10⁴/s; beyond this it only burns time
+            out[f"scalar_{n}_ms"] = _best(lambda: _scalar(x)) * 1000
+        n *= 100 if n < 10_000 else 10
+    return out
+
+# -------------------- Store --------------------
+def _rows(n: int) -> List[Dict[str, object]]:
+    from store import record_row
+    s = score_batch(_answers(n, SEED + 1))
+    meta = lambda i: {"client": f"Client {i}", "coach": f"Coach {i % 7}", "date": f"{1 + i % 28:02d}-01-2026",
+                      "gender": "Other", "intent": "bench", "email": f"c{i}@example.com", "phone": f"{i:010d}"}
+    return [record_row(meta(i), s.trait_dict(i), s.chakra_dict(i)) for i in range(n)]
+
+def bench_store(n: int) -> Dict[str, float]:
+    # What save_local does per submission: append, then update rollups, client history and norms
+    from store import CsvStore, SqliteStore
+    from analytics import Rollups
+    from history import ClientHistory
+    from norms import Norms
+    rows, out = _rows(n), {}
+    for name, make in (("sqlite", lambda d: SqliteStore(d / "records.db")), ("csv", lambda d: CsvStore(d / "records.csv"))):
+        with tempfile.TemporaryDirectory() as tmp:
+            d = Path(tmp)
+            store, rollups, history, norms = make(d), Rollups(d / "rollups.db"), ClientHistory(d / "history.db"), Norms(d / "norms.db")
+            t0 = time.perf_counter()
+            for row in rows:
+                store.append(row)
+                rollups.update([row])
+                history.add([row])
+                norms.update([row])
+            secs = time.perf_counter() - t0
+            assert store.count() == n, f"{name}: stored {store.count()} of {n}"
+            for s in (store, rollups, history, norms): s.close()
+        out[f"{name}_save_local_per_s"] = n / secs
+    return out
+
+# -------------------- PDF --------------------
+def _synthetic_logo(px: int = 600) -> bytes:
+    # The repo ships no logo: a photo-like RGBA PNG (gradients, grain, round cut-out) of about
+    # 0.9 MB, like an export straight from a design tool
+    from PIL import Image
+    y, x = np.mgrid[0:px, 0:px] / px
+    r = np.hypot(x - 0.5, y - 0.5)
+    rgb = np.stack([230 * (1 - r), 90 + 120 * x, 60 + 160 * y], axis=-1)
+    rgb += np.random.default_rng(SEED + 5).normal(0, 10, (px, px, 3))
+    alpha = np.broadcast_to(np.where(r < 0.48, 255, 0), (px, px))
+    buf = io.BytesIO()
+    Image.fromarray(np.dstack([np.clip(rgb, 0, 255), alpha]).astype(np.uint8), "RGBA").save(buf, "PNG")
+    return buf.getvalue()
+
+def _pdf_modes(build: Callable, s, n: int, logo: Optional[bytes]) -> Dict[bool, tuple]:
+    # Regular and compact builds alternate, so drift (GC, CPU clocks) hits both modes alike;
+    # {compact: (times, sizes)}
+    out = {False: ([], []), True: ([], [])}
+    for compact in out: build(s.trait_dict(0), s.chakra_dict(0), logo, compact=compact)   # templates
+    for i in range(n):
+        for compact in ((False, True) if i % 2 else (True, False)):
+            t0 = time.perf_counter()
+            pdf = build(s.trait_dict(i), s.chakra_dict(i), logo, compact=compact)
+            out[compact][0].append(time.perf_counter() - t0); out[compact][1].append(len(pdf))
+    return out
+
+def bench_pdf(n: int, logo_path: Optional[str] = None) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    from report import LOGO_PATH, build_pdf, load_logo
+    import_ms = (time.perf_counter() - t0) * 1000
+    logo, s = load_logo(logo_path or LOGO_PATH) or _synthetic_logo(), score_batch(_answers(n, SEED + 2))
+    meta = {"client": "Bench Client", "coach": "Coach", "date": "01-01-2026", "gender": "Other",
+            "intent": "bench", "email": "", "phone": ""}
+    build = lambda traits, chakras, logo, compact: build_pdf(traits, chakras, logo, meta, compact)
+    t0 = time.perf_counter(); build(s.trait_dict(0), s.chakra_dict(0), None, False)
+    cold = time.perf_counter() - t0
+    tracemalloc.start()
+    build(s.trait_dict(0), s.chakra_dict(0), None, False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    out = {"import_ms": import_ms, "cold_ms": cold * 1000, "peak_kb": peak / 1024}
+    for prefix, lg in (("", None), ("logo_", logo)):
+        for compact, (times, sizes) in _pdf_modes(build, s, n, lg).items():
+            name = prefix + ("compact_" if compact else "")
+            out.update({f"{name}median_ms": statistics.median(times) * 1000,
+                        f"{name}p95_ms": float(np.percentile(times, 95)) * 1000,
+                        f"{name}size_bytes": statistics.median(sizes)})
+    return out
+
+# -------------------- History --------------------
+def bench_history(max_n: int, lookups: int = 1000) -> Dict[str, float]:
+    from history import ClientHistory
+    from store import record_row
+    s, rng = score_batch(_answers(1000, SEED + 3)), np.random.default_rng(SEED + 3)
+    clients = max(1, max_n // 4)   # ~4 sessions per client at the largest size
+    out: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        h, total, n = ClientHistory(Path(tmp) / "history.db"), 0, min(10_000, max_n)
+        while True:
+            rows = [record_row({"email": f"client{c}@example.com", "phone": f"{9_000_000_000 + c}"},
+                               s.trait_dict(i % 1000), s.chakra_dict(i % 1000))
+                    for i, c in enumerate(rng.integers(0, clients, n - total).tolist())]
+            h.add(rows)
+            total = n
+            times = []
+            for c in rng.integers(0, clients, lookups).tolist():
+                t0 = time.perf_counter()
+                h.sessions({"email": f"client{c}@example.com", "phone": f"{9_000_000_000 + c}"})
+                times.append(time.perf_counter() - t0)
+            out[f"lookup_{n}_ms"] = statistics.median(times) * 1000
+            if n >= max_n: break
+            n = min(n * 10, max_n)
+        out["add_ms"] = _best(lambda: h.add(rows[:1])) * 1000
+        h.close()
+    return out
+
+# -------------------- Norms --------------------
+def bench_norms(n: int = 100_000) -> Dict[str, float]:
+    from norms import Norms
+    from store import record_row
+    s, rng = score_batch(_answers(1000, SEED + 4)), np.random.default_rng(SEED + 4)
+    coaches, genders = [f"coach{i}" for i in range(20)], ["Female", "Male", "Other"]
+    rows = [record_row({"coach": coaches[rng.integers(20)], "gender": genders[rng.integers(3)]},
+                       s.trait_dict(i % 1000), s.chakra_dict(i % 1000)) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        norms = Norms(Path(tmp) / "norms.db")
+        for i in range(0, n, 10_000): norms.update(rows[i:i + 10_000])
+        traits, chakras = s.trait_dict(0), s.chakra_dict(0)
+        out = {"percentiles_ms": _best(lambda: norms.percentiles(traits, chakras, rows[0], "coach")) * 1000,
+               "update_ms": _best(lambda: norms.update(rows[:1])) * 1000}
+        norms.close()
+    return out
+
+# -------------------- Archive --------------------
+def bench_archive(n: int) -> Dict[str, float]:
+    # What a norms rebuild reads (coach, gender, scores) from n records saved over 12 months
+    from archive import Archive, compact
+    from norms import GROUPS, METRICS
+    from store import CsvStore
+    cols, rows = list(GROUPS) + METRICS, _rows(min(n, 10_000))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CsvStore(Path(tmp) / "records.csv")
+        for i in range(0, n, len(rows)):
+            store.append_many([{**r, "created_at": f"2025-{1 + (i // len(rows)) % 12:02d}-15T10:00:00+00:00"} for r in rows[:n - i]])
+        csv_mb = store.path.stat().st_size / 1e6
+        out = {"csv_read_ms": _best(lambda: sum(map(len, store.iter_chunks(50_000, cols))), repeat=3) * 1000}
+        compact(store, "2026-01", Path(tmp) / "archive")
+        archive = Archive(Path(tmp) / "archive")
+        assert archive.count() == n, f"archived {archive.count()} of {n}"
+        out.update({"archive_read_ms": _best(lambda: sum(map(len, archive.iter_chunks(50_000, cols))), repeat=3) * 1000,
+                    "csv_mb": csv_mb, "archive_mb": archive.size() / 1e6})
+    return out
+
+# -------------------- Payment --------------------
+def bench_payment(latency: float = 0.2) -> Dict[str, float]:
+    # Gate check + cached PDF, as a paid download; the fake provider answers after `latency` s
+    from payments import FakeProvider, PaymentGate, Purchase
+    from pdf_cache import ReportCache
+    s = score_batch(_answers(1, SEED + 5))
+    traits, chakras, meta = s.trait_dict(0), s.chakra_dict(0), {"client": "Bench Client"}
+    provider = FakeProvider(Purchase(49900, "inr"), latency=latency)
+    cache, gate, ref = ReportCache(None), PaymentGate(provider, provider.purchase), "bench"
+    session_id = provider.pay(ref)
+    cache.build_pdf(traits, chakras, None, meta)
+    def download(session_id, token=None) -> bytes:
+        assert gate.check(session_id, ref, token), "gate closed"
+        return cache.build_pdf(traits, chakras, None, meta)
+    t0 = time.perf_counter(); download(session_id); cold = time.perf_counter() - t0
+    token = gate.check(session_id, ref)
+    return {"cold_download_ms": cold * 1000,
+            "cache_download_ms": _best(lambda: download(session_id)) * 1000,   # new browser session, same checkout
+            "token_download_ms": _best(lambda: download(None, token)) * 1000,   # rerun / repeat download
+            "provider_calls": gate.calls}
+
+# -------------------- Rerun --------------------
+def bench_rerun(samples: int, reruns: int) -> Dict[str, float]:
+    import bench_app
+    with tempfile.TemporaryDirectory() as tmp:
+        r = bench_app.measure(bench_app._tree(None, Path(tmp) / "app"), samples, reruns)
+    return {"cold_ms": r["cold"] * 1000, "rerun_ms": r["rerun"] * 1000, "submit_ms": r["submit"] * 1000}
+
+# -------------------- Baseline comparison --------------------
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for section, metrics in current["results"].items():
+        for name, value in metrics.items():
+            base = baseline.get("results", {}).get(section, {}).get(name)
+            if not base: continue
+            change = value / base - 1
+            worse = -change if name.endswith("_per_s") else change
+            flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+            print(f"{section:<8}{name:<28}{base:>14.3f}{value:>14.3f}{change:>+9.1%}  {flag}")
+            if flag == "REGRESSION": regressions.append(f"{section}.{name}")
+    return regressions
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        return ""
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy benchmark suite.")
+    ap.add_argument("--only", help=f"comma-separated sections ({','.join(SECTIONS)})")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--baseline", help="saved JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown counted as a regression")
+    ap.add_argument("--max-n", type=int, default=1_000_000, help="largest scoring batch")
+    ap.add_argument("--rows", type=int, default=2000, help="save_local appends per backend")
+    ap.add_argument("--pdfs", type=int, default=30, help="PDF builds timed")
+    ap.add_argument("--logo", help="logo for the pdf section (default: report.LOGO_PATH)")
+    ap.add_argument("--history-rows", type=int, default=1_000_000, help="largest client history index")
+    ap.add_argument("--archive-rows", type=int, default=200_000, help="records in the archive benchmark")
+    ap.add_argument("--samples", type=int, default=3, help="fresh interpreters for the rerun benchmark")
+    args = ap.parse_args(argv)
+    metrics.ENABLED = False   # timed runs stay out of data/metrics
+    sections = args.only.split(",") if args.only else SECTIONS
+    unknown = set(sections) - set(SECTIONS)
+    if unknown: ap.error(f"unknown sections: {', '.join(sorted(unknown))}")
+
+    runs = {"scoring": lambda: bench_scoring(args.max_n), "store": lambda: bench_store(args.rows),
+            "pdf": lambda: bench_pdf(args.pdfs, args.logo), "history": lambda: bench_history(args.history_rows),
+            "norms": bench_norms, "archive": lambda: bench_archive(args.archive_rows),
+            "payment": bench_payment, "rerun": lambda: bench_rerun(args.samples, 20)}
+    results = {}
+    for name in sections:
+        t0 = time.perf_counter()
+        results[name] = runs[name]()
+        print(f"{name}: done in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    doc = {"meta": {"created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                    "git": _git_rev(), "python": platform.python_version(), "machine": platform.machine(),
+                    "cpus": os.cpu_count(), "seed": SEED},
+           "results": results}
+    if args.out:
+        Path(args.out).write_text(json.dumps(doc, indent=2) + "\n")
+    if not args.baseline:
+        if not args.out: print(json.dumps(doc, indent=2))
+        else:
+            for section, metrics in results.items():
+                for k, v in metrics.items(): print(f"{section:<8}{k:<28}{v:>14.3f}")
+        return 0
+    regressions = compare(doc, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
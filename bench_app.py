@@ -0,0 +1,87 @@
+# Soulful Academy — Streamlit startup / rerun benchmark
+# Runs app.py headlessly (streamlit.testing AppTest), every sample in a fresh interpreter, and
+# times the script execution itself (AppTest's own polling would swamp the difference):
+#   cold  — first script run: app-module imports, cached resources, first render
+#   rerun — median of repeated reruns of the same session (what every widget click costs)
+#   submit — median rerun that submits the form (Analyze: scoring, history, norms, save, PDF job),
+#            a new client name each time, as loadtest.py's Session.states(..., submit=True) sends
+#
+#   python bench_app.py                      # working tree
+#   python bench_app.py --ref HEAD~1         # before/after against a git revision
+
+import argparse, json, os, shutil, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent
+
+def _child(app_dir: str, reruns: int, submits: int) -> None:
+    import logging
+    logging.disable(logging.WARNING)
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.testing.v1 import AppTest   # Streamlit itself is the same cost before and after
+    times: List[float] = []
+    run_script = script_runner.exec_func_with_error_handling
+    def timed(*a, **kw):
+        t0 = time.perf_counter()
+        try: return run_script(*a, **kw)
+        finally: times.append(time.perf_counter() - t0)
+    script_runner.exec_func_with_error_handling = timed
+    at = AppTest.from_file(os.path.join(app_dir, "app.py"), default_timeout=120)
+    for _ in range(reruns + 1): at.run()
+    rerun_times, submit_times = times[1:], []
+    for i in range(submits):
+        next(t for t in at.text_input if t.label == "Full Name").input(f"Bench Client {i}")
+        next(b for b in at.button if "Analyze" in b.label).click()
+        n = len(times)
+        at.run()
+        submit_times.append(sum(times[n:]))   # the submit run, plus any st.rerun() it asks for
+        if at.exception: break
+    if at.exception: raise SystemExit(f"app raised: {at.exception[0].message}")
+    print(json.dumps({"cold": times[0], "rerun": statistics.median(rerun_times),
+                      "submit": statistics.median(submit_times) if submit_times else 0.0}))
+
+def _tree(ref: Optional[str], dst: Path) -> Path:
+    # Copy of the app at a git revision (or the working tree), so runs never touch data/
+    if ref:
+        dst.mkdir(parents=True)
+        archive = subprocess.run(["git", "-C", str(ROOT), "archive", ref], check=True, capture_output=True).stdout
+        subprocess.run(["tar", "-x", "-C", str(dst)], input=archive, check=True)
+    else:
+        shutil.copytree(ROOT, dst, ignore=shutil.ignore_patterns(".git", "data", "__pycache__"))
+    return dst
+
+def measure(app_dir: Path, samples: int, reruns: int, submits: int = 5) -> Dict[str, float]:
+    runs = []
+    for _ in range(samples):
+        out = subprocess.run([sys.executable, __file__, "--child", str(app_dir), "--reruns", str(reruns),
+                              "--submits", str(submits)], check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {k: statistics.median(r[k] for r in runs) for k in ("cold", "rerun", "submit")}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Time Streamlit cold start and reruns of app.py.")
+    ap.add_argument("--ref", help="also measure this git revision (before/after)")
+    ap.add_argument("--samples", type=int, default=5, help="fresh interpreters per tree")
+    ap.add_argument("--reruns", type=int, default=20, help="reruns timed per interpreter")
+    ap.add_argument("--submits", type=int, default=5, help="form submissions timed per interpreter")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        _child(args.child, args.reruns, args.submits)
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.ref:
+            results[args.ref] = measure(_tree(args.ref, Path(tmp) / "before"), args.samples, args.reruns, args.submits)
+        results["working tree"] = measure(_tree(None, Path(tmp) / "after"), args.samples, args.reruns, args.submits)
+    print(f"{'':<14}{'cold ms':>10}{'rerun ms':>10}{'submit ms':>11}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['cold'] * 1000:>10.1f}{r['rerun'] * 1000:>10.1f}{r['submit'] * 1000:>11.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# Soulful Academy — Bulk PDF renderer (headless)
+# Renders many reports at once, e.g. after a group workshop.
+#
+#   python bulk_report.py --records data/records.db --out reports/ --workers 4
+#   python bulk_report.py --answers workshop.csv --zip reports.zip
+#   python bulk_report.py --records data/records.db --zip - > reports.zip
+#
+# --records reads scored rows as written by save_local (records.db or records.csv).
+# --answers reads raw answers (columns q1..q10, Root_1..Crown_3, optional meta columns) and scores them;
+#   --instrument picks another questionnaire version from instruments/ (its own answer columns).
+#   Rows with missing, non-integer or out-of-scale answers are skipped (checked as ingest.py does)
+#   and listed on stderr with their line numbers.
+
+import argparse, os, sys, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from scoring import TRAITS, CHAKRAS, DEFAULT_INSTRUMENT, get_instrument, instruments
+from report import LOGO_PATH, build_pdf, load_logo, report_filename
+from store import META_COLUMNS, open_store
+from ingest import validate
+import metrics
+
+Job = Tuple[Dict[str,float], Dict[str,float], Dict[str,str], str]   # traits, chakras, meta, instrument key
+
+# -------------------- Input --------------------
+def _meta(row: Dict[str,str]) -> Dict[str,str]:
+    return {k: (str(row.get(k) or "").strip() or ("" if k in ("email","phone") else "—")) for k in META_COLUMNS}
+
+def jobs_from_records(path: str) -> List[Job]:
+    store = open_store(path)
+    df = store.to_dataframe().fillna("")
+    store.close()
+    jobs = []
+    for row in df.to_dict("records"):
+        traits  = {t: float(row[f"trait_{t}"] or 0) for t in TRAITS}
+        chakras = {ch: float(row[f"chakra_{ch}"] or 0) for ch in CHAKRAS}
+        jobs.append((traits, chakras, _meta(row), str(row.get("instrument") or DEFAULT_INSTRUMENT)))
+    return jobs
+
+def jobs_from_answers(path: str, instrument: str = DEFAULT_INSTRUMENT) -> Tuple[List[Job], Dict[int, str]]:
+    # -> (jobs for the valid rows, {CSV line: reason} for the skipped ones)
+    inst = get_instrument(instrument)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = [c for c in inst.answer_columns if c not in df.columns]
+    if missing:
+        raise SystemExit(f"{path}: missing {inst.key} answer columns {', '.join(missing)}")
+    answers, ok, reasons = validate(df, inst)
+    scores, rows = inst.score(answers), df.iloc[ok].to_dict("records")
+    jobs = [(scores.trait_dict(k), scores.chakra_dict(k), _meta(row), inst.key) for k, row in enumerate(rows)]
+    return jobs, {i + 2: reason for i, reason in reasons.items()}   # line 1 is the header
+
+# -------------------- Rendering --------------------
+_logo: Optional[bytes] = None
+
+_compact = False
+
+def _init_worker(logo_path: str, compact: bool = False):
+    global _logo, _compact
+    _logo, _compact = load_logo(logo_path), compact
+    metrics.ENABLED = False   # spawned workers start with the default
+
+def _render(job: Job) -> bytes:
+    traits, chakras, meta, instrument = job
+    return build_pdf(traits, chakras, _logo, meta, _compact, instrument=instrument)
+
+def render_all(jobs: List[Job], workers: int, logo_path: str = LOGO_PATH,
+               compact: bool = False) -> Iterator[Tuple[str, bytes]]:
+    names = [f"{i:04d}_{report_filename(meta)}" for i, (_, _, meta, _) in enumerate(jobs, start=1)]
+    if workers <= 1:
+        _init_worker(logo_path, compact)
+        yield from zip(names, map(_render, jobs))
+        return
+    chunk = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(logo_path, compact)) as pool:
+        yield from zip(names, pool.map(_render, jobs, chunksize=chunk))
+
+# -------------------- Output --------------------
+def write_dir(results: Iterable[Tuple[str, bytes]], out: str) -> int:
+    Path(out).mkdir(parents=True, exist_ok=True)
+    n = 0
+    for name, pdf in results:
+        (Path(out) / name).write_bytes(pdf)
+        n += 1
+    return n
+
+def write_zip(results: Iterable[Tuple[str, bytes]], out: str) -> int:
+    # Entries are written as they finish; "-" streams the archive to stdout
+    stream = sys.stdout.buffer if out == "-" else open(out, "wb")
+    n = 0
+    try:
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, pdf in results:
+                zf.writestr(name, pdf)
+                n += 1
+    finally:
+        if stream is not sys.stdout.buffer: stream.close()
+    return n
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Render Soulful Academy PDF reports in bulk.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--records", help="record store written by save_local (data/records.db or data/records.csv)")
+    src.add_argument("--answers", help="raw answers CSV (q1..q10, Root_1..Crown_3)")
+    ap.add_argument("--instrument", default=DEFAULT_INSTRUMENT, choices=list(instruments()), help="instrument the answers belong to (id@version)")
+    dst = ap.add_mutually_exclusive_group(required=True)
+    dst.add_argument("--out", help="output directory")
+    dst.add_argument("--zip", help="output zip archive ('-' for stdout)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="render processes (default: CPU count)")
+    ap.add_argument("--logo", default=LOGO_PATH)
+    ap.add_argument("--compact", action="store_true", help="smaller PDFs for email (downscaled logo, same look)")
+    ap.add_argument("--limit", type=int, help="only render the first N rows")
+    args = ap.parse_args(argv)
+    metrics.ENABLED = False   # batch renders would swamp the app's stage timings
+
+    if args.records: jobs = jobs_from_records(args.records)
+    else:
+        jobs, skipped = jobs_from_answers(args.answers, args.instrument)
+        for line, reason in skipped.items(): print(f"{args.answers}:{line}: skipped — {reason}", file=sys.stderr)
+        if skipped: print(f"{len(skipped)} rows skipped, {len(jobs)} to render", file=sys.stderr)
+    if args.limit is not None: jobs = jobs[:args.limit]
+
+    t0 = time.perf_counter()
+    results = render_all(jobs, args.workers, args.logo, args.compact)
+    n = write_zip(results, args.zip) if args.zip else write_dir(results, args.out)
+    secs = time.perf_counter() - t0
+    print(f"{n} reports in {secs:.2f}s — {n/secs if secs else 0:.1f} reports/s ({args.workers} workers)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# Soulful Academy — Client history index
+# Earlier scans of the same client without reading the record store. Every saved record is
+# also written here, under each of the client's normalized contact keys:
+#   email — trimmed, lower-cased
+#   phone — digits only, last 10 (so "+91 98765 43210" and "098765 43210" match)
+# keys is a WITHOUT ROWID table clustered on (key, session), so a lookup is one B-tree range
+# scan: its cost depends on the client's own sessions, not on how many records are stored.
+# save_local updates the index for each new row; rebuild() streams the whole store in chunks.
+#
+#   python history.py rebuild data/records.db
+#   python history.py lookup --email ann@example.com
+
+import argparse, re, sqlite3, sys, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from scoring import TRAITS, CHAKRAS
+from store import DATA_DIR, TRAIT_COLUMNS, CHAKRA_COLUMNS, RecordStore, open_store
+
+HISTORY_PATH = DATA_DIR / "history.db"
+MAX_SESSIONS = 12     # most recent earlier sessions returned per client (trend charts)
+PHONE_DIGITS = 10
+
+Session = Dict[str, object]   # {"label", "date", "created_at", "instrument", "traits", "chakras"}
+
+def client_keys(contact: Dict[str, object]) -> List[str]:
+    keys = []
+    email = str(contact.get("email") or "").strip().lower()
+    if "@" in email: keys.append("email:" + email)
+    digits = re.sub(r"\D", "", str(contact.get("phone") or ""))[-PHONE_DIGITS:].lstrip("0")
+    if len(digits) >= 7: keys.append("phone:" + digits)
+    return keys
+
+def session_label(s: Session) -> str:
+    # Session date as typed on the form, else the day it was saved
+    date = str(s.get("date") or "").strip()
+    return date if date and date != "—" else str(s.get("created_at") or "")[:10]
+
+def _value(v) -> Optional[float]:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v   # NaN from pandas chunks
+
+class ClientHistory:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, created_at TEXT, date TEXT, "
+                           "instrument TEXT, " + ", ".join(f'"{c}" REAL' for c in TRAIT_COLUMNS + CHAKRA_COLUMNS) + ")")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT, session INTEGER, PRIMARY KEY (key, session)) WITHOUT ROWID")
+
+    def _insert(self, rows: Sequence[Dict[str, object]]) -> int:
+        # Inside a write transaction, so numbering sessions from MAX(id) can't race another writer
+        cols = ["created_at", "date", "instrument"] + TRAIT_COLUMNS + CHAKRA_COLUMNS
+        names = ", ".join('"' + c + '"' for c in cols)
+        next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM sessions").fetchone()[0]
+        sessions, keys = [], []
+        for row in rows:
+            ks = client_keys(row)
+            if not ks: continue   # no contact details: nothing to look the client up by
+            sessions.append([next_id] + [str(row.get(c) or "") for c in cols[:3]] + [_value(row.get(c)) for c in cols[3:]])
+            keys += [(k, next_id) for k in ks]
+            next_id += 1
+        self._conn.executemany(f"INSERT INTO sessions (id, {names}) VALUES ({', '.join('?' * (len(cols) + 1))})", sessions)
+        self._conn.executemany("INSERT OR IGNORE INTO keys VALUES (?, ?)", keys)
+        return len(sessions)
+
+    def add(self, rows: Sequence[Dict[str, object]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._insert(rows)
+            self._conn.execute("COMMIT")
+
+    def sessions(self, contact: Dict[str, object], limit: int = MAX_SESSIONS) -> List[Session]:
+        # The client's most recent sessions under any of their keys, oldest first
+        keys = client_keys(contact)
+        if not keys: return []
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT s.* FROM sessions s WHERE s.id IN (SELECT session FROM keys WHERE key IN ({','.join('?' * len(keys))})) "
+                f"ORDER BY s.id DESC LIMIT ?", keys + [limit])
+            names = [d[0] for d in cur.description]
+            rows = [dict(zip(names, r)) for r in cur.fetchall()]
+        out = []
+        for r in reversed(rows):
+            s: Session = {"date": r["date"], "created_at": r["created_at"], "instrument": r["instrument"],
+                          "traits": {t: r[f"trait_{t}"] for t in TRAITS if r[f"trait_{t}"] is not None},
+                          "chakras": {ch: r[f"chakra_{ch}"] for ch in CHAKRAS if r[f"chakra_{ch}"] is not None}}
+            s["label"] = session_label(s)
+            out.append(s)
+        return out
+
+    def rebuild(self, store: RecordStore, chunksize: int = 50_000) -> int:
+        n = 0
+        cols = ["email", "phone", "date", "created_at", "instrument"] + TRAIT_COLUMNS + CHAKRA_COLUMNS
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for table in ("sessions", "keys"): self._conn.execute(f"DELETE FROM {table}")
+            for chunk in store.iter_chunks(chunksize, columns=cols):
+                n += self._insert(chunk.to_dict("records"))
+            self._conn.execute("COMMIT")
+        return n
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is None
+
+    def close(self) -> None:
+        self._conn.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy client history index.")
+    ap.add_argument("--history", default=str(HISTORY_PATH))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="re-index the record store")
+    r.add_argument("store", nargs="?", default=str(DATA_DIR / "records.db"))
+    l = sub.add_parser("lookup", help="list a client's sessions")
+    l.add_argument("--email", default="")
+    l.add_argument("--phone", default="")
+    l.add_argument("--limit", type=int, default=MAX_SESSIONS)
+    args = ap.parse_args(argv)
+    history = ClientHistory(args.history)
+    if args.cmd == "rebuild":
+        store = open_store(args.store)
+        n = history.rebuild(store)
+        store.close()
+        print(f"indexed {n} records with contact details into {args.history}")
+        return 0
+    for s in history.sessions({"email": args.email, "phone": args.phone}, args.limit):
+        print(f"{s['label']:<12}{s['instrument']:<12}" + " ".join(f"{k}={v:.2f}" for k, v in {**s['traits'], **s['chakras']}.items()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
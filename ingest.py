@@ -0,0 +1,209 @@
+# Soulful Academy — Raw answer ingestion (headless)
+# Scores spreadsheet / form exports and saves them like the Streamlit form does: the record store
+# plus the rollups, client history and norms that save_local keeps current. The input is read
+# CHUNKSIZE rows at a time (validated, scored with one matrix product, written, then dropped),
+# so memory stays flat however large the file is.
+#
+#   .csv   — one row per respondent: the instrument's answer columns (q1..q10, Root_1..Crown_3)
+#            and optional meta columns (client, coach, date, gender, intent, email, phone)
+#   .jsonl — one object per line, either flat like a CSV row or as posted to the API:
+#            {"answers": [...] or {...}, "meta": {...}}
+#
+# Rows with missing, non-integer or out-of-scale answers are skipped and written to the rejects
+# file (same format as the input) with their line number and reasons. The rollups, history and
+# norms files are the ones next to --store (rollups.db, history.db, norms.db in its directory).
+# A running app sees the new rows on its next analysis: it refreshes its in-memory norms when
+# norms.db changed (Norms.refresh); rollups and history are read from disk.
+#
+#   python ingest.py workshop.csv
+#   python ingest.py export.jsonl --store data/records.db --rejects export.rejects.jsonl
+#   python ingest.py big.csv --dry-run            # validate + score only
+
+import argparse, csv, json, sys, time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import DEFAULT_INSTRUMENT, Instrument, get_instrument, instruments
+from store import DB_PATH, META_COLUMNS, Row, open_store, record_row
+from analytics import ROLLUP_PATH, Rollups
+from history import HISTORY_PATH, ClientHistory
+from norms import NORMS_PATH, Norms
+import metrics
+
+try:
+    import resource   # POSIX only: peak RSS is reported where it exists
+except ImportError:
+    resource = None
+
+CHUNKSIZE = 5_000
+
+# -------------------- Input --------------------
+def _flatten(obj: Dict, inst: Instrument) -> Dict[str, object]:
+    # API-style {"answers", "meta"} objects become flat rows; flat objects pass through
+    if "answers" not in obj and "meta" not in obj: return obj
+    row = {k: v for k, v in obj.items() if k not in ("answers", "meta")}
+    answers, meta = obj.get("answers"), obj.get("meta")
+    if isinstance(answers, list): row.update(zip(inst.answer_columns, answers))
+    elif isinstance(answers, dict): row.update(answers)
+    if isinstance(meta, dict): row.update(meta)
+    return row
+
+Chunk = Tuple[pd.DataFrame, Optional[List[Dict]], List[Tuple[int, Dict, str]]]
+
+def read_chunks(path: str, inst: Instrument, chunksize: int = CHUNKSIZE) -> Iterator[Chunk]:
+    # (frame, JSONL rows as read, unparseable lines); "_line" holds each row's source line number.
+    # Rejected JSONL rows are written as read: a frame turns JSON ints into floats and null into NaN.
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows, bad = [], []
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip(): continue
+                try:
+                    obj = json.loads(line)
+                    if not isinstance(obj, dict): raise ValueError("not an object")
+                except ValueError as e:
+                    bad.append((line_no, {"raw": line.rstrip("\n")}, f"invalid JSON: {e}"))
+                    continue
+                rows.append({**_flatten(obj, inst), "_line": line_no})
+                if len(rows) >= chunksize:
+                    yield pd.DataFrame(rows), rows, bad
+                    rows, bad = [], []
+            if rows or bad: yield pd.DataFrame(rows), rows, bad
+        return
+    line_no = 2   # after the header
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        chunk["_line"] = np.arange(line_no, line_no + len(chunk))   # data lines; quoted newlines are not counted
+        line_no += len(chunk)
+        yield chunk, None, []
+
+# -------------------- Validation --------------------
+def validate(chunk: pd.DataFrame, inst: Instrument,
+             records: Optional[List[Dict]] = None) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+    # -> (answers of the valid rows, their positions in the chunk, {position: reason} for the rest).
+    # records: the chunk's rows as read (JSONL), so reasons quote 4.5 rather than the frame's np.float64(4.5)
+    cols, (lo, hi) = inst.answer_columns, inst.scale
+    values = np.full((len(chunk), len(cols)), np.nan)
+    raw = {}
+    for j, c in enumerate(cols):
+        if c not in chunk.columns: continue
+        raw[c] = chunk[c]
+        text = raw[c].where(raw[c].notna(), "").astype(str).str.strip()   # JSONL cells may be numbers or null
+        values[:, j] = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    bad_cell = np.isnan(values) | (values != np.round(values)) | (values < lo) | (values > hi)
+    bad_rows = np.flatnonzero(bad_cell.any(axis=1))
+    reasons: Dict[int, str] = {}
+    for i in bad_rows.tolist():   # reasons are spelled out for rejected rows only
+        msgs = []
+        for j in np.flatnonzero(bad_cell[i]).tolist():
+            c = cols[j]
+            v = records[i].get(c) if records is not None else (raw[c].iat[i] if c in raw else None)
+            if isinstance(v, np.generic): v = v.item()
+            if v is None or (isinstance(v, str) and not v.strip()) or (isinstance(v, float) and np.isnan(v)): msgs.append(f"{c}: missing")
+            elif np.isnan(values[i, j]) or values[i, j] != round(values[i, j]): msgs.append(f"{c}: {v!r} is not an integer")
+            else: msgs.append(f"{c}: {v} outside {lo}..{hi}")
+        reasons[i] = "; ".join(msgs)
+    ok = np.setdiff1d(np.arange(len(chunk)), bad_rows)
+    return values[ok].astype(np.int8), ok, reasons
+
+def metas(chunk: pd.DataFrame, rows: np.ndarray) -> List[Dict[str,str]]:
+    # Meta columns of the given rows, blank-filled as the form does ("—", empty email/phone)
+    out = {}
+    for k in META_COLUMNS:
+        col = chunk[k].iloc[rows] if k in chunk.columns else pd.Series("", index=range(len(rows)))
+        col = col.where(col.notna(), "").astype(str).str.strip()
+        out[k] = col.where(col != "", "" if k in ("email","phone") else "—").tolist()
+    return [dict(zip(META_COLUMNS, vals)) for vals in zip(*out.values())]
+
+# -------------------- Rejects --------------------
+class Rejects:
+    # Streams rejected rows to a side file in the input's format, with "_line" and "_reason"
+    def __init__(self, path: str):
+        self.path, self.n = path, 0
+        self._f = None
+        self._csv: Optional[csv.DictWriter] = None
+
+    def write(self, line: int, row: Dict[str, object], reason: str) -> None:
+        if self._f is None: self._f = open(self.path, "w", encoding="utf-8", newline="")
+        self.n += 1
+        rec = {"_line": line, "_reason": reason, **{k: v for k, v in row.items() if k != "_line"}}
+        if self.path.endswith(".jsonl"):
+            self._f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self._f, fieldnames=list(rec), extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow(rec)
+
+    def close(self) -> None:
+        if self._f is not None: self._f.close()
+
+# -------------------- Pipeline --------------------
+def ingest(path: str, store_path: str = str(DB_PATH), instrument: str = DEFAULT_INSTRUMENT,
+           rejects_path: Optional[str] = None, chunksize: int = CHUNKSIZE, dry_run: bool = False) -> Dict[str, float]:
+    inst = get_instrument(instrument)
+    if rejects_path is None:
+        p = Path(path)
+        rejects_path = str(p.with_name(p.stem + ".rejects" + p.suffix))
+    rejects = Rejects(rejects_path)
+    store = sinks = None
+    if not dry_run:
+        store = open_store(store_path)
+        home = Path(store_path).parent   # sidecars of this store, not of the default one
+        sinks = [Rollups(home / ROLLUP_PATH.name), ClientHistory(home / HISTORY_PATH.name), Norms(home / NORMS_PATH.name)]
+        for s in sinks:   # as the app's getters: sidecars that predate the store's rows are rebuilt first
+            if s.is_empty() and store.count(): s.rebuild(store)
+    t0, total, saved = time.perf_counter(), 0, 0
+    try:
+        for chunk, records, unparseable in read_chunks(path, inst, chunksize):
+            for line, row, reason in unparseable: rejects.write(line, row, reason)
+            total += len(chunk) + len(unparseable)
+            if chunk.empty: continue
+            missing = [c for c in inst.answer_columns if c not in chunk.columns]
+            if missing and not path.endswith(".jsonl"):   # a CSV header without them: nothing can be scored
+                raise SystemExit(f"{path}: missing {inst.key} answer columns {', '.join(missing)}")
+            answers, ok, reasons = validate(chunk, inst, records)
+            for i, reason in reasons.items():
+                row = records[i] if records is not None else chunk.iloc[i].to_dict()
+                rejects.write(row["_line"], row, reason)
+            if not len(ok): continue
+            scores = inst.score(answers)
+            rows: List[Row] = [record_row(meta, scores.trait_dict(k), scores.chakra_dict(k), inst.key)
+                               for k, meta in enumerate(metas(chunk, ok))]
+            if not dry_run:
+                store.append_many(rows)   # the writes save_local makes, one batch per chunk
+                rollups, history, norms = sinks
+                rollups.update(rows)
+                history.add(rows)
+                norms.update(rows)
+            saved += len(rows)
+    finally:
+        rejects.close()
+        if store is not None: store.close()
+        for s in sinks or []: s.close()
+    secs = time.perf_counter() - t0
+    return {"rows": total, "saved": saved, "rejected": rejects.n, "seconds": secs,
+            "rows_per_s": total / secs if secs else 0.0, "rejects_path": rejects_path if rejects.n else None,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Score and save raw Soulful Academy answers from a CSV/JSONL export.")
+    ap.add_argument("input", help="answers file (.csv or .jsonl)")
+    ap.add_argument("--store", default=str(DB_PATH), help="record store (data/records.db or data/records.csv)")
+    ap.add_argument("--instrument", default=DEFAULT_INSTRUMENT, choices=list(instruments()), help="instrument the answers belong to (id@version)")
+    ap.add_argument("--rejects", help="side file for rejected rows (default: <input>.rejects.<ext>)")
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--dry-run", action="store_true", help="validate and score without saving")
+    args = ap.parse_args(argv)
+    metrics.ENABLED = False   # a large import would swamp the app's stage timings
+    r = ingest(args.input, args.store, args.instrument, args.rejects, args.chunksize, args.dry_run)
+    print(f"{r['rows']} rows in {r['seconds']:.2f}s — {r['rows_per_s']:.0f} rows/s; "
+          f"{r['saved']} {'scored' if args.dry_run else 'saved'}, {r['rejected']} rejected"
+          f"{' (' + r['rejects_path'] + ')' if r['rejects_path'] else ''}"
+          f"{'; peak RSS %.0f MB' % r['peak_rss_mb'] if r['peak_rss_mb'] is not None else ''}", file=sys.stderr)
+    return 1 if r["rows"] and not r["saved"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# Soulful Academy — Workshop load test
+# Many clients submitting at once, end to end: starts `streamlit run app.py` on a copy of the app
+# (empty data/, so real records are untouched) and drives it over Streamlit's own websocket
+# protocol, as browser tabs would. Per simulated session: open the page, fill the form with random
+# answers, press Analyze (all sessions of a level at the same moment), then rerun every 0.5 s (as
+# the page's PDF poller does) until the Download button appears and fetch the PDF it links to.
+# The copy runs with PAID_GATE_ENABLED = False, since the payment stub can't be completed remotely.
+#
+# Per concurrency level it reports
+#   submit — Analyze pressed → page back: scoring, history + norms lookups, save_local
+#   pdf    — Analyze pressed → PDF bytes in hand (render queueing + rendering + download)
+#   errors, CPU of the app server and its render workers (% of one core), and their peak RSS
+# and at the end checks that the store holds exactly one intact row per submission (email and
+# scores as submitted). Exit status 1 if any session failed or the check does not pass.
+#
+#   python loadtest.py --levels 1,10,50
+#   python loadtest.py --levels 50,200 --backend csv --out load.json
+
+import argparse, asyncio, json, os, random, socket, subprocess, sys, tempfile, threading, time, urllib.request, uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from websockets.asyncio.client import connect   # installed with Streamlit
+
+import bench_app
+
+QUANTILES = (0.5, 0.95, 0.99)
+POLL = 0.5   # seconds, the page's PDF poller interval (pdf_progress run_every)
+TICK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+Element = Tuple[str, object]   # (element type, its proto message)
+
+def _quantile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))] if sorted_vals else float("nan")
+
+# -------------------- Server process stats --------------------
+def _proc(pid: int) -> Optional[Tuple[int, float, int]]:
+    # (ppid, cpu seconds, rss bytes) from /proc; None where there is no /proc or the process is gone
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return int(fields[1]), (int(fields[11]) + int(fields[12])) / TICK, int(fields[21]) * PAGE
+
+def family(root: int) -> Dict[int, Tuple[float, int]]:
+    # The server and its children (render pool workers): pid -> (cpu seconds, rss bytes)
+    procs = {int(d.name): _proc(int(d.name)) for d in Path("/proc").glob("[0-9]*")} if Path("/proc").exists() else {}
+    return {pid: p[1:] for pid, p in procs.items() if p and (pid == root or p[0] == root)}
+
+class Sampler:
+    # Peak RSS of the server's process family, sampled every `interval` seconds while a level runs
+    def __init__(self, root: int, interval: float = 0.2):
+        self.root, self.interval, self.peak = root, interval, 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, sum(rss for _, rss in family(self.root).values()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+# -------------------- Streamlit client --------------------
+class Session:
+    # One browser tab: a websocket to the app and the widgets of its last page
+    def __init__(self, url: str):
+        self.url, self.ws, self.elements = url, None, []
+
+    async def open(self) -> None:
+        self.ws = await connect(f"ws://{self.url}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+        await self.run()
+
+    async def run(self, states: Optional[WidgetStates] = None) -> List[Element]:
+        # One script run; returns (and keeps) the page's elements
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        if states is not None: msg.rerun_script.widget_states.CopyFrom(states)
+        await self.ws.send(msg.SerializeToString())
+        elements: List[Element] = []
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                elements.append((el.WhichOneof("type"), getattr(el, el.WhichOneof("type"))))
+            elif kind == "script_finished":
+                break
+        errors = [e.message for kind, e in elements if kind == "exception"]
+        if errors: raise RuntimeError(f"app raised: {errors[0]}")
+        self.elements = elements if states is None or any(k == "text_input" for k, _ in elements) else self.elements
+        return elements
+
+    def states(self, text: Dict[str, str], answers: Dict[str, int], submit: bool) -> WidgetStates:
+        # Every form widget, as the browser sends them: typed text, chosen options, the Analyze trigger
+        ws = WidgetStates()
+        for kind, w in self.elements:
+            if kind == "text_input":
+                s = ws.widgets.add(); s.id = w.id
+                s.string_value = text.get(w.label, w.default)
+            elif kind == "radio":
+                key = w.id.split("-_r_", 1)[1] if "-_r_" in w.id else None   # answer radios are keyed _r_<column>
+                s = ws.widgets.add(); s.id = w.id
+                s.string_value = str(answers[key]) if key in answers else w.options[w.default]
+            elif kind == "button" and w.is_form_submitter and submit:
+                s = ws.widgets.add(); s.id = w.id; s.trigger_value = True
+        return ws
+
+    async def close(self) -> None:
+        if self.ws is not None: await self.ws.close()
+
+async def client(url: str, tag: str, answers: Dict[str, int], ready: "asyncio.Barrier", timeout: float) -> Dict[str, object]:
+    out: Dict[str, object] = {"tag": tag, "error": None}
+    s = Session(url)
+    try:
+        await s.open()
+        text = {"Full Name": tag, "Email Address": f"{tag}@loadtest.invalid"}
+        await ready.wait()   # everyone presses Analyze together
+        t0 = time.perf_counter()
+        page = await s.run(s.states(text, answers, submit=True))
+        out["submit"] = time.perf_counter() - t0
+        while not any(k == "download_button" for k, _ in page):
+            if time.perf_counter() - t0 > timeout: raise TimeoutError("PDF not ready")
+            await asyncio.sleep(POLL)
+            page = await s.run(s.states(text, answers, submit=False))
+        link = next(w.url for k, w in page if k == "download_button")
+        pdf = await asyncio.to_thread(lambda: urllib.request.urlopen(f"http://{url}{link}", timeout=timeout).read())
+        out["pdf"] = time.perf_counter() - t0
+        if not pdf.startswith(b"%PDF"): raise RuntimeError("download is not a PDF")
+    except Exception as e:   # a failed session is a result, not a crash of the harness
+        out["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        await s.close()
+    return out
+
+# -------------------- Levels --------------------
+def run_level(url: str, server: int, n: int, prefix: str, columns: List[str], scale: Tuple[int, int],
+              rng: random.Random, timeout: float) -> Tuple[Dict[str, object], Dict[str, List[int]]]:
+    jobs = {f"{prefix}-{n}-{i:04d}": [rng.randint(*scale) for _ in columns] for i in range(n)}
+
+    async def level() -> List[Dict[str, object]]:
+        ready = asyncio.Barrier(n)
+        return await asyncio.gather(*(client(url, tag, dict(zip(columns, a)), ready, timeout) for tag, a in jobs.items()))
+
+    before, t0 = family(server), time.perf_counter()
+    with Sampler(server) as sampler:
+        results = asyncio.run(level())
+    wall, after = time.perf_counter() - t0, family(server)
+    cpu = sum(c for c, _ in after.values()) - sum(before[p][0] for p in after if p in before)
+    submitted = {r["tag"]: jobs[r["tag"]] for r in results if "submit" in r}
+    out: Dict[str, object] = {"sessions": n, "errors": sum(r["error"] is not None for r in results), "wall_s": wall,
+                              "cpu_pct": 100 * cpu / wall if after else None,
+                              "peak_rss_mb": sampler.peak / 1e6 if after else None,
+                              "error_samples": sorted({str(r["error"]) for r in results if r["error"]})[:5]}
+    for stage in ("submit", "pdf"):
+        ms = sorted(1000 * r[stage] for r in results if stage in r)
+        for q in QUANTILES: out[f"{stage}_p{int(q * 100)}_ms"] = _quantile(ms, q)
+    return out, submitted
+
+# -------------------- Records check --------------------
+def verify(store_path: Path, prefix: str, submitted: Dict[str, List[int]]) -> Dict[str, object]:
+    # Exactly one row per submission, with its email and the scores its answers give
+    from scoring import get_instrument
+    from store import open_store
+    inst = get_instrument()
+    store = open_store(store_path)
+    df = store.to_dataframe()
+    store.close()
+    rows = df[df["client"].astype(str).str.startswith(prefix)] if len(df) else df
+    counts = rows["client"].value_counts().to_dict() if len(rows) else {}
+    missing = [t for t in submitted if t not in counts]
+    duplicated = [t for t, c in counts.items() if c > 1]
+    unexpected = [t for t in counts if t not in submitted]
+    corrupt = []
+    for r in rows.drop_duplicates("client").to_dict("records"):
+        if r["client"] not in submitted: continue
+        s = inst.score([submitted[r["client"]]])
+        expected = {**{f"trait_{k}": round(v, 3) for k, v in s.trait_dict(0).items()},
+                    **{f"chakra_{k}": round(v, 3) for k, v in s.chakra_dict(0).items()}}
+        if r.get("email") != f"{r['client']}@loadtest.invalid" or \
+           any(abs(float(r.get(k)) - v) > 1e-9 for k, v in expected.items()):
+            corrupt.append(r["client"])
+    return {"submitted": len(submitted), "rows": int(len(rows)), "missing": len(missing), "duplicated": len(duplicated),
+            "unexpected": len(unexpected), "corrupt": len(corrupt),
+            "ok": not (missing or duplicated or unexpected or corrupt)}
+
+# -------------------- Server --------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app_dir: Path, backend: str, port: int) -> subprocess.Popen:
+    app_py = app_dir / "app.py"
+    text = app_py.read_text(encoding="utf-8")
+    for setting, value in (("STORE_BACKEND", f'"{backend}"'), ("PAID_GATE_ENABLED", "False")):
+        head, sep, tail = text.partition(f"\n{setting} = ")
+        text = head + sep + value + tail[tail.index(" "):]   # keeps the line's comment
+    app_py.write_text(text, encoding="utf-8")
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+                               "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                              cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            if urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).read() == b"ok": return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("streamlit did not start")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test app.py with many concurrent simulated sessions.")
+    ap.add_argument("--levels", default="1,10,50", help="comma-separated concurrency levels (sessions submitting at once)")
+    ap.add_argument("--backend", choices=["sqlite", "csv"], default="sqlite", help="STORE_BACKEND for the run")
+    ap.add_argument("--timeout", type=float, default=300, help="seconds a session may wait for its PDF")
+    ap.add_argument("--seed", type=int, default=20240601)
+    ap.add_argument("--out", help="also write the results as JSON")
+    args = ap.parse_args(argv)
+    levels = [int(x) for x in args.levels.split(",")]
+
+    from scoring import get_instrument
+    inst = get_instrument()
+    rng, prefix, port = random.Random(args.seed), f"lt-{uuid.uuid4().hex[:8]}", _free_port()
+    results, submitted = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app_dir = bench_app._tree(None, Path(tmp) / "app")
+        server = start_server(app_dir, args.backend, port)
+        try:
+            for n in levels:
+                results[n], done = run_level(f"127.0.0.1:{port}", server.pid, n, prefix, inst.answer_columns, inst.scale,
+                                             rng, args.timeout)
+                submitted.update(done)
+                print(f"level {n}: done in {results[n]['wall_s']:.1f}s", file=sys.stderr)
+        finally:
+            server.terminate()
+            server.wait()
+        check = verify(app_dir / "data" / ("records.csv" if args.backend == "csv" else "records.db"), prefix, submitted)
+
+    print(f"{'sessions':>8}{'errors':>8}" + "".join(f"{f'{s} p{int(q * 100)}':>12}" for s in ("submit", "pdf") for q in QUANTILES) +
+          f"{'CPU %':>8}{'RSS MB':>8}")
+    for n, r in results.items():
+        fmt = lambda v, spec: "—" if v is None else format(v, spec)
+        print(f"{n:>8}{r['errors']:>8}" + "".join(f"{r[f'{s}_p{int(q * 100)}_ms']:>10.0f}ms" for s in ("submit", "pdf") for q in QUANTILES) +
+              f"{fmt(r['cpu_pct'], '.0f'):>8}{fmt(r['peak_rss_mb'], '.0f'):>8}")
+        for e in r["error_samples"]: print(f"{'':>8}  {e}")
+    print(f"records ({args.backend}): {check['rows']} rows for {check['submitted']} submissions — "
+          f"{check['missing']} missing, {check['duplicated']} duplicated, {check['corrupt']} corrupt, "
+          f"{check['unexpected']} unexpected: {'OK' if check['ok'] else 'FAILED'}")
+    if args.out:
+        Path(args.out).write_text(json.dumps({"levels": {str(n): r for n, r in results.items()}, "records": check}, indent=2))
+    return 0 if check["ok"] and not any(r["errors"] for r in results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
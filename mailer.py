@@ -0,0 +1,344 @@
+# Soulful Academy — Report email queue
+# Sends finished PDFs to the client's email without the app waiting on SMTP. enqueue() writes
+# the message to data/outbox.db and returns; a worker thread drains the outbox:
+#   batches  — up to BATCH due messages per pass over one SMTP connection, which stays open
+#              between passes until it has been idle for IDLE_TIMEOUT; it is checked with NOOP
+#              only once idle for PROBE_AFTER, and a send on an unchecked connection the server
+#              has dropped is repeated once on a fresh one
+#   retries  — temporary failures (connection errors, 4xx replies) back off BACKOFF · 2^attempt,
+#              capped at MAX_BACKOFF, for up to MAX_ATTEMPTS; a 5xx rejection of the recipient
+#              or message fails at once
+#   restarts — the table is the queue: unsent mail is picked up by the next process, and a message
+#              claimed by a process that died is re-queued after CLAIM_TIMEOUT
+# Queue depth and send latency go through metrics.py (mail.send spans, mail_* gauges).
+#
+# SMTP settings come from the environment; without SOULFUL_SMTP_HOST mail stays queued.
+#   SOULFUL_SMTP_HOST, SOULFUL_SMTP_PORT (587), SOULFUL_SMTP_USER, SOULFUL_SMTP_PASSWORD,
+#   SOULFUL_SMTP_TLS ("starttls", "ssl" or "none"), SOULFUL_MAIL_FROM
+#
+#   python mailer.py sink --port 8025                 # local stand-in SMTP server (writes .eml files)
+#   SOULFUL_SMTP_HOST=localhost SOULFUL_SMTP_PORT=8025 SOULFUL_SMTP_TLS=none streamlit run app.py
+#   python mailer.py status
+#   python mailer.py send                             # drain the queue once and exit
+#   python mailer.py retry                            # re-queue failed messages
+
+import argparse, os, smtplib, socketserver, sqlite3, ssl, sys, threading, time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import make_msgid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from store import DATA_DIR
+from metrics import span
+
+OUTBOX_PATH = DATA_DIR / "outbox.db"
+BATCH = 20              # messages per pass over one connection
+IDLE_TIMEOUT = 60.0     # seconds an unused connection is kept open
+PROBE_AFTER = 5.0       # seconds idle before a reused connection is checked with NOOP
+POLL = 5.0              # seconds between checks for due retries when nothing is enqueued
+BACKOFF = 30.0          # first retry delay, doubled per attempt
+MAX_BACKOFF = 3600.0
+MAX_ATTEMPTS = 8
+CLAIM_TIMEOUT = 600.0   # a message "sending" this long belonged to a process that died
+
+@dataclass
+class SmtpConfig:
+    host: str = ""
+    port: int = 587
+    user: str = ""
+    password: str = ""
+    tls: str = "starttls"
+    sender: str = "Soulful Academy <noreply@localhost>"
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "SmtpConfig":
+        env = os.environ.get
+        return cls(host=env("SOULFUL_SMTP_HOST", ""), port=int(env("SOULFUL_SMTP_PORT", 587)),
+                   user=env("SOULFUL_SMTP_USER", ""), password=env("SOULFUL_SMTP_PASSWORD", ""),
+                   tls=env("SOULFUL_SMTP_TLS", "starttls"), sender=env("SOULFUL_MAIL_FROM", cls.sender))
+
+def report_email(meta: Dict[str,str]) -> Tuple[str, str]:
+    # (subject, body) for a client's report
+    client, coach = meta.get("client") or "—", meta.get("coach") or "—"
+    greeting = f"Dear {client}," if client != "—" else "Hello,"
+    signed = f"\n{coach}" if coach != "—" else ""
+    return ("Your Soulful Academy Personality + Chakra report",
+            f"{greeting}\n\nThank you for your session. Your full report is attached as a PDF.\n\n"
+            f"With warmth,\nSoulful Academy{signed}\n")
+
+def _permanent(exc: Exception) -> bool:
+    # The server rejected this recipient or message for good; anything else is worth retrying
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPDataError) and exc.smtp_code >= 500
+
+class Mailer:
+    def __init__(self, path=OUTBOX_PATH, config: Optional[SmtpConfig] = None):
+        self.path = Path(path)
+        self.config = config or SmtpConfig.from_env()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY, created_at REAL, to_addr TEXT, subject TEXT, body TEXT, filename TEXT, pdf BLOB,
+            status TEXT DEFAULT 'queued', attempts INTEGER DEFAULT 0, next_at REAL, claimed_at REAL, sent_at REAL, error TEXT)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_at)")
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_used = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------- Queue --------------------
+    def enqueue(self, to_addr: str, subject: str, body: str, pdf: bytes, filename: str) -> int:
+        # One row insert; the worker thread does the SMTP work
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute("INSERT INTO outbox (created_at, to_addr, subject, body, filename, pdf, next_at) "
+                                     "VALUES (?,?,?,?,?,?,?)", (now, to_addr.strip(), subject, body, filename, pdf, now))
+        self._wake.set()
+        return cur.lastrowid
+
+    def _claim(self, limit: int) -> List[tuple]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("UPDATE outbox SET status = 'queued' WHERE status = 'sending' AND claimed_at < ?",
+                               (now - CLAIM_TIMEOUT,))
+            rows = self._conn.execute("SELECT id, to_addr, subject, body, filename, pdf, attempts FROM outbox "
+                                      "WHERE status = 'queued' AND next_at <= ? ORDER BY next_at LIMIT ?", (now, limit)).fetchall()
+            self._conn.executemany("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?", [(now, r[0]) for r in rows])
+            self._conn.execute("COMMIT")
+        return rows
+
+    def _sent(self, msg_id: int) -> None:
+        with self._lock:   # the PDF is dropped once delivered; the row stays as a delivery record
+            self._conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, pdf = NULL, error = NULL WHERE id = ?",
+                               (time.time(), msg_id))
+
+    def _failed(self, msg_id: int, attempts: int, exc: Exception) -> None:
+        attempts += 1
+        final = _permanent(exc) or attempts >= MAX_ATTEMPTS
+        delay = min(MAX_BACKOFF, BACKOFF * 2 ** (attempts - 1))
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status = ?, attempts = ?, next_at = ?, error = ? WHERE id = ?",
+                               ("failed" if final else "queued", attempts, time.time() + delay, f"{type(exc).__name__}: {exc}"[:500], msg_id))
+
+    def retry_failed(self) -> int:
+        with self._lock:
+            return self._conn.execute("UPDATE outbox SET status = 'queued', attempts = 0, next_at = ? WHERE status = 'failed'",
+                                      (time.time(),)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {s: counts.get(s, 0) for s in ("queued", "sending", "sent", "failed")}
+
+    # -------------------- SMTP --------------------
+    def _connection(self) -> smtplib.SMTP:
+        # The open connection if it was just used, or is recent and still answers; else a fresh one
+        if self._smtp is not None:
+            idle = time.monotonic() - self._smtp_used
+            if idle < PROBE_AFTER: return self._smtp   # mid-batch: no round trip per message
+            try:
+                if idle < IDLE_TIMEOUT and self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        cfg = self.config
+        with span("mail.connect"):
+            if cfg.tls == "ssl":
+                smtp = smtplib.SMTP_SSL(cfg.host, cfg.port, timeout=cfg.timeout, context=ssl.create_default_context())
+            else:
+                smtp = smtplib.SMTP(cfg.host, cfg.port, timeout=cfg.timeout)
+                if cfg.tls == "starttls": smtp.starttls(context=ssl.create_default_context())
+            if cfg.user: smtp.login(cfg.user, cfg.password)
+        self._smtp, self._smtp_used = smtp, time.monotonic()
+        return smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is None: return
+        try: self._smtp.quit()
+        except (smtplib.SMTPException, OSError): self._smtp.close()
+        self._smtp = None
+
+    def _message(self, to_addr: str, subject: str, body: str, filename: str, pdf: bytes) -> EmailMessage:
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = self.config.sender, to_addr, subject
+        msg["Message-ID"] = make_msgid()
+        msg.set_content(body)
+        msg.add_attachment(pdf, maintype="application", subtype="pdf", filename=filename)
+        return msg
+
+    def send_pending(self) -> int:
+        # One pass: claim a batch of due messages and send them over one connection
+        if not self.config.host: return 0
+        batch = self._claim(BATCH)
+        if not batch: return 0
+        sent = 0
+        for i, (msg_id, to_addr, subject, body, filename, pdf, attempts) in enumerate(batch):
+            reused = self._smtp is not None
+            try:
+                smtp = self._connection()
+            except (smtplib.SMTPException, OSError) as exc:   # server unreachable: the rest of the batch waits too
+                for r in batch[i:]: self._failed(r[0], r[-1], exc)
+                break
+            try:
+                msg = self._message(to_addr, subject, body, filename, pdf)
+                with span("mail.send", bytes=len(pdf)):
+                    try:
+                        smtp.send_message(msg)
+                    except (smtplib.SMTPServerDisconnected, ConnectionError):
+                        if not reused: raise
+                        self._disconnect()   # dropped while unchecked: once more on a fresh connection
+                        self._connection().send_message(msg)
+            except (smtplib.SMTPException, OSError) as exc:
+                self._failed(msg_id, attempts, exc)
+                if not isinstance(exc, (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)):
+                    self._disconnect()   # no reply from the server: connection state unknown
+                continue
+            self._smtp_used = time.monotonic()
+            self._sent(msg_id)
+            sent += 1
+        return sent
+
+    # -------------------- Worker --------------------
+    def start(self) -> "Mailer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mailer", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while self.send_pending() == BATCH: pass   # full batch: more may be due
+            except Exception as exc:   # keep the worker alive; the message rows record failures
+                print(f"mailer: {exc!r}", file=sys.stderr)
+            if self._smtp is not None and time.monotonic() - self._smtp_used >= IDLE_TIMEOUT: self._disconnect()
+            self._wake.wait(POLL)
+            self._wake.clear()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None: self._thread.join()
+        self._thread = None
+        self._disconnect()
+
+    def close(self) -> None:
+        self.stop()
+        self._conn.close()
+
+# -------------------- Local stand-in SMTP server --------------------
+class _SinkHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self) -> None:
+        server: "SinkServer" = self.server
+        self.reply("220 soulful-sink ready")
+        rcpts: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line: return
+            cmd = line.decode("utf-8", "replace").strip()
+            verb = cmd[:4].upper()
+            if verb == "EHLO": self.reply("250-soulful-sink"); self.reply("250 8BITMIME")
+            elif verb == "HELO": self.reply("250 soulful-sink")
+            elif verb == "MAIL": rcpts = []; self.reply("250 OK")
+            elif verb == "RCPT": rcpts.append(cmd.partition(":")[2].strip(" <>")); self.reply("250 OK")
+            elif verb == "RSET": self.reply("250 OK")
+            elif verb == "NOOP": server.count("noops"); self.reply("250 OK")
+            elif verb == "QUIT": self.reply("221 Bye"); return
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for raw in iter(self.rfile.readline, b""):
+                    if raw in (b".\r\n", b".\n"): break
+                    data.append(raw[1:] if raw.startswith(b"..") else raw)
+                if server.take_tempfail():
+                    self.reply("451 Try again later")
+                else:
+                    n = server.save(rcpts, b"".join(data))
+                    self.reply(f"250 OK queued as {n}")
+            else: self.reply("502 Command not implemented")
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = allow_reuse_address = True
+
+    def __init__(self, port: int, directory, tempfail: int = 0, host: str = "127.0.0.1"):
+        super().__init__((host, port), _SinkHandler)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.tempfail, self.received, self.connections, self.noops = tempfail, 0, 0, 0
+        self._lock = threading.Lock()
+
+    def count(self, attr: str) -> None:
+        with self._lock: setattr(self, attr, getattr(self, attr) + 1)
+
+    def verify_request(self, request, client_address) -> bool:
+        self.count("connections")
+        return True
+
+    def take_tempfail(self) -> bool:
+        # The first `tempfail` messages get a 451, to exercise retries
+        with self._lock:
+            if self.tempfail <= 0: return False
+            self.tempfail -= 1
+            return True
+
+    def save(self, rcpts: List[str], data: bytes) -> int:
+        with self._lock:
+            self.received += 1
+            n = self.received
+        (self.directory / f"{int(time.time() * 1000)}-{n}.eml").write_bytes(data)
+        return n
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy report email queue.")
+    ap.add_argument("--outbox", default=str(OUTBOX_PATH))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status", help="messages per status, and the latest failures")
+    sub.add_parser("send", help="send everything due now and exit")
+    sub.add_parser("retry", help="re-queue failed messages")
+    k = sub.add_parser("sink", help="run a local stand-in SMTP server")
+    k.add_argument("--port", type=int, default=8025)
+    k.add_argument("--dir", default=str(DATA_DIR / "sink"))
+    k.add_argument("--tempfail", type=int, default=0, help="answer the first N messages with 451")
+    args = ap.parse_args(argv)
+    if args.cmd == "sink":
+        server = SinkServer(args.port, args.dir, args.tempfail)
+        print(f"SMTP sink on 127.0.0.1:{args.port}, writing to {args.dir}")
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+        return 0
+    mailer = Mailer(args.outbox)
+    if args.cmd == "send":
+        if not mailer.config.host:
+            print("SOULFUL_SMTP_HOST is not set", file=sys.stderr)
+            return 1
+        total = 0
+        while True:
+            n = mailer.send_pending()
+            total += n
+            if not n: break
+        print(f"sent {total}; " + "  ".join(f"{k}={v}" for k, v in mailer.stats().items()))
+        mailer.close()
+        return 0
+    if args.cmd == "retry":
+        print(f"re-queued {mailer.retry_failed()} messages")
+        return 0
+    print("  ".join(f"{k}={v}" for k, v in mailer.stats().items()))
+    for msg_id, to_addr, attempts, error in mailer._conn.execute(
+            "SELECT id, to_addr, attempts, error FROM outbox WHERE status = 'failed' ORDER BY id DESC LIMIT 10"):
+        print(f"  #{msg_id} {to_addr} after {attempts} attempts: {error}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
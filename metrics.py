@@ -0,0 +1,183 @@
+# Soulful Academy — Stage timings
+# Timed spans around the hot path (form render, scoring, save_local, PDF story assembly and
+# doc.build, download payload), carrying attributes such as PDF bytes and flowable count.
+# Every finished span is
+#   - appended to data/metrics/spans.jsonl (rotating, 5 × 5 MB)
+#   - folded into per-stage summaries (count, sum, p50/p95/p99 over recent samples) exported in
+#     Prometheus text format to data/metrics/metrics.prom (rewritten at most once a second,
+#     node_exporter textfile style) and, once serve(port) is called, at http://localhost:<port>/metrics
+# Spans measured in render-pool processes are captured there and recorded by the parent.
+#
+#   with span("save_local"): ...
+#   with span("pdf.build", flowables=len(story)) as s: ...; s["bytes"] = len(pdf)
+#   python metrics.py report            # p50/p95/p99 per stage from the JSONL log
+
+import argparse, json, logging, logging.handlers, os, sys, tempfile, threading, time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_DIR = Path("data") / "metrics"   # store.DATA_DIR; not imported so render workers stay light
+WINDOW = 2048                 # recent samples per stage behind the quantiles
+QUANTILES = (0.5, 0.95, 0.99)
+ENABLED = os.environ.get("SOULFUL_METRICS", "1") != "0"
+
+Span = Dict[str, object]
+
+def _quantile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+class _Summary:
+    __slots__ = ("count", "total", "window")
+
+    def __init__(self):
+        self.count, self.total, self.window = 0, 0.0, deque(maxlen=WINDOW)
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.total += v
+        self.window.append(v)
+
+class Metrics:
+    def __init__(self, directory=METRICS_DIR, log_bytes: int = 5_000_000, log_backups: int = 5,
+                 prom_interval: float = 1.0):
+        self.directory = Path(directory)
+        self.log_bytes, self.log_backups, self.prom_interval = log_bytes, log_backups, prom_interval
+        self._summaries: Dict[Tuple[str, str], _Summary] = {}   # (quantity, stage) -> summary
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+        self._log: Optional[logging.Handler] = None
+        self._prom_written = 0.0
+
+    def _handler(self) -> logging.Handler:
+        # opened on first span, so importing this module never touches the disk; used directly rather
+        # than through a Logger, so logging.disable()/level settings elsewhere can't drop spans
+        if self._log is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._log = logging.handlers.RotatingFileHandler(self.directory / "spans.jsonl", maxBytes=self.log_bytes,
+                                                             backupCount=self.log_backups, encoding="utf-8")
+        return self._log
+
+    def record(self, s: Span) -> None:
+        self._handler().handle(logging.makeLogRecord({"msg": json.dumps(s, ensure_ascii=False)}))
+        stage = str(s["stage"])
+        with self._lock:
+            for k, v in s.items():
+                if k in ("stage", "ts") or not isinstance(v, (int, float)) or isinstance(v, bool): continue
+                key = ("seconds", stage) if k == "ms" else (k, stage)
+                self._summaries.setdefault(key, _Summary()).add(v / 1000 if k == "ms" else v)
+            due = time.monotonic() - self._prom_written >= self.prom_interval
+            if due: self._prom_written = time.monotonic()
+        if due: self.write_prometheus()
+
+    def add_collector(self, fn: Callable[[], Dict[str, float]]) -> None:
+        # fn() -> {metric name: value}, exported as gauges (cache hit counts, queue depth, ...)
+        with self._lock: self._collectors.append(fn)
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            summaries = {k: (s.count, s.total, sorted(s.window)) for k, s in self._summaries.items()}
+            collectors = list(self._collectors)
+        for quantity in sorted({q for q, _ in summaries}):
+            name = f"soulful_stage_{quantity}"
+            lines.append(f"# TYPE {name} summary")
+            for (q, stage), (count, total, window) in sorted(summaries.items()):
+                if q != quantity: continue
+                for p in QUANTILES:
+                    lines.append(f'{name}{{stage="{stage}",quantile="{p}"}} {_quantile(window, p):.6g}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6g}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        for fn in collectors:
+            for metric, value in fn().items():
+                lines += [f"# TYPE soulful_{metric} gauge", f"soulful_{metric} {value:.6g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self) -> None:
+        # write-then-rename, so a scraper never reads half a file
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f: f.write(self.prometheus())
+        os.replace(tmp, self.directory / "metrics.prom")
+
+_metrics = Metrics()
+_local = threading.local()
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Span]:
+    # Times the block; the yielded dict takes extra attributes (bytes, flowables, ...)
+    s: Span = {"stage": stage, "ts": round(time.time(), 3), **attrs}
+    t0 = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        captured = getattr(_local, "captured", None)
+        if captured is not None: captured.append(s)
+        elif ENABLED: _metrics.record(s)
+
+@contextmanager
+def capture() -> Iterator[List[Span]]:
+    # Collect this thread's spans instead of recording them (worker processes hand them back)
+    _local.captured = spans = []
+    try:
+        yield spans
+    finally:
+        _local.captured = None
+
+def record(spans: List[Span]) -> None:
+    if ENABLED:
+        for s in spans: _metrics.record(s)
+
+def add_collector(fn: Callable[[], Dict[str, float]]) -> None:
+    _metrics.add_collector(fn)
+
+def prometheus() -> str:
+    return _metrics.prometheus()
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404); return
+            body = prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+# -------------------- Offline report --------------------
+def read_spans(log: Path) -> Iterator[Span]:
+    for path in sorted(log.parent.glob(log.name + "*"), reverse=True):   # spans.jsonl.5 … spans.jsonl
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try: yield json.loads(line)
+                except ValueError: continue   # a line cut by a crash
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy stage timings.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("report", help="p50/p95/p99 per stage from the span log")
+    r.add_argument("--log", default=str(METRICS_DIR / "spans.jsonl"))
+    args = ap.parse_args(argv)
+    by_stage: Dict[str, List[float]] = {}
+    for s in read_spans(Path(args.log)):
+        by_stage.setdefault(str(s.get("stage")), []).append(float(s.get("ms", 0)))
+    print(f"{'stage':<14}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, ms in sorted(by_stage.items()):
+        ms.sort()
+        print(f"{stage:<14}{len(ms):>8}" + "".join(f"{_quantile(ms, q):>10.2f}" for q in QUANTILES))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# Soulful Academy — Population norms
+# "82nd percentile for Heart among our clients": one quantile sketch per instrument, score
+# column and client group, updated by save_local, so a report's percentiles never re-read the records.
+#
+# Scores live on short fixed scales (the instrument's: -3..+3 / 1..7 for soulful@1), so the
+# sketch is a histogram over BIN-wide bins: exact to the bin, mergeable by adding counts, O(1)
+# to update and O(1) to query (cumulative counts are kept per sketch until the next update).
+# Clients are only compared with clients who took the same instrument.
+#   groups — "all" plus one per coach / gender (GROUPS); a group with fewer than
+#            MIN_COUNT clients falls back to "all"
+#
+#   python norms.py rebuild data/records.db
+#   python norms.py show chakra_Heart --group coach:Asha [--instrument soulful@1]
+
+import argparse, sqlite3, sys, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import DEFAULT_INSTRUMENT, TRAITS, CHAKRAS, get_instrument
+from store import DATA_DIR
+
+NORMS_PATH = DATA_DIR / "norms.db"
+BIN = 0.01
+METRICS = [f"trait_{t}" for t in TRAITS] + [f"chakra_{ch}" for ch in CHAKRAS]
+GROUPS = ("coach", "gender")
+MIN_COUNT = 20
+
+def group_keys(row: Dict[str, object], by: Sequence[str] = GROUPS) -> List[str]:
+    keys = ["all"]
+    for field in by:
+        v = str(row.get(field) or "").strip()
+        if v and v != "—": keys.append(f"{field}:{v}")
+    return keys
+
+def instrument_key(row: Dict[str, object]) -> str:
+    return str(row.get("instrument") or "").strip() or DEFAULT_INSTRUMENT
+
+class Sketch:
+    def __init__(self, lo: float, hi: float, counts: Optional[np.ndarray] = None):
+        self.lo, self.hi = lo, hi
+        self.counts = counts if counts is not None else np.zeros(int(round((hi - lo) / BIN)) + 1, dtype=np.int64)
+        self._cum: Optional[np.ndarray] = None
+
+    def bins(self, values) -> np.ndarray:
+        v = np.clip(np.asarray(values, dtype=np.float64), self.lo, self.hi)
+        return np.rint((v - self.lo) / BIN).astype(np.int64)
+
+    def bin(self, value: float) -> int:
+        # bins() for one value without numpy call overhead (round() is round-half-even, as rint)
+        return int(round((min(max(value, self.lo), self.hi) - self.lo) / BIN))
+
+    def add(self, values) -> np.ndarray:
+        # returns the touched bins and their added counts (for persisting)
+        b, n = np.unique(self.bins(values), return_counts=True)
+        self.counts[b] += n
+        self._cum = None
+        return np.stack([b, n], axis=1)
+
+    def add_one(self, value: float) -> int:
+        b = self.bin(value)
+        self.counts[b] += 1
+        self._cum = None
+        return b
+
+    def merge(self, other: "Sketch") -> None:
+        self.counts += other.counts
+        self._cum = None
+
+    @property
+    def n(self) -> int:
+        return int(self._cumulative()[-1])
+
+    def _cumulative(self) -> np.ndarray:
+        if self._cum is None: self._cum = np.cumsum(self.counts)
+        return self._cum
+
+    def percentile(self, value: float) -> float:
+        # mid-rank: clients below plus half of those in the same bin
+        cum, b = self._cumulative(), self.bin(value)
+        below = cum[b - 1] if b else 0
+        return float((below + 0.5 * self.counts[b]) / cum[-1] * 100) if cum[-1] else float("nan")
+
+    def quantile(self, q: float) -> float:
+        cum = self._cumulative()
+        return self.lo + BIN * int(np.searchsorted(cum, q * cum[-1], side="left")) if cum[-1] else float("nan")
+
+class Norms:
+    def __init__(self, path=NORMS_PATH, by: Sequence[str] = GROUPS):
+        self.path, self.by = Path(path), tuple(by)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        cols = [r[1] for r in self._conn.execute("PRAGMA table_info(sketch)")]
+        if cols and "instrument" not in cols:   # sketches from before per-instrument keys: rebuilt when empty
+            self._conn.execute("DROP TABLE sketch")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS sketch (
+            instrument TEXT, grp TEXT, metric TEXT, bin INTEGER, n INTEGER,
+            PRIMARY KEY (instrument, grp, metric, bin)) WITHOUT ROWID""")
+        self._sketches: Dict[Tuple[str, str, str], Sketch] = {}
+        self._version = None
+        self.reload()
+
+    def reload(self) -> None:
+        # All sketches into memory (a few KB each); call after another process rebuilt the file
+        sketches: Dict[Tuple[str, str, str], Sketch] = {}
+        with self._lock:
+            self._version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            for inst, grp, metric, b, n in self._conn.execute("SELECT instrument, grp, metric, bin, n FROM sketch"):
+                s = sketches.get((inst, grp, metric))
+                if s is None:
+                    try: s = sketches[(inst, grp, metric)] = self._new(inst, metric)
+                    except KeyError: continue   # an instrument or column no longer shipped
+                if b < len(s.counts): s.counts[b] = n
+            self._sketches = sketches
+
+    def refresh(self) -> bool:
+        # Reloads if another process (ingest.py, a second app) wrote since; one PRAGMA otherwise.
+        # data_version only moves for other connections' commits, so this process's updates don't count.
+        with self._lock:
+            changed = self._conn.execute("PRAGMA data_version").fetchone()[0] != self._version
+        if changed: self.reload()
+        return changed
+
+    @staticmethod
+    def _new(inst: str, metric: str) -> Sketch:
+        # Bins span the instrument's own scale (KeyError for unknown instruments / columns)
+        if metric not in METRICS: raise KeyError(metric)
+        return Sketch(*get_instrument(inst).metric_range(metric))
+
+    def _sketch(self, inst: str, grp: str, metric: str) -> Sketch:
+        s = self._sketches.get((inst, grp, metric))
+        if s is None: s = self._sketches[(inst, grp, metric)] = self._new(inst, metric)
+        return s
+
+    def _write(self, deltas: List[tuple]) -> None:
+        self._conn.executemany("INSERT INTO sketch VALUES (?,?,?,?,?) ON CONFLICT (instrument, grp, metric, bin) "
+                               "DO UPDATE SET n = n + excluded.n", deltas)
+
+    def _add_frame(self, chunk) -> List[tuple]:
+        # A DataFrame of records, binned column-wise per instrument and group; returns the count deltas
+        deltas: List[tuple] = []
+        insts = chunk["instrument"].fillna("").astype(str).str.strip().replace("", DEFAULT_INSTRUMENT) \
+            if "instrument" in chunk.columns else pd.Series(DEFAULT_INSTRUMENT, index=chunk.index)
+        labels = [("all", np.ones(len(chunk), dtype=bool))]
+        for field in self.by:
+            if field not in chunk.columns: continue
+            col = chunk[field].fillna("").astype(str).str.strip()
+            labels += [(f"{field}:{v}", (col == v).to_numpy()) for v in col.unique() if v and v != "—"]
+        for inst in insts.unique():
+            in_inst = (insts == inst).to_numpy()
+            for metric in (m for m in METRICS if m in chunk.columns):
+                values = chunk[metric].astype(float).to_numpy()
+                ok = in_inst & ~np.isnan(values)
+                for grp, mask in labels:
+                    if (mask & ok).any():
+                        deltas += [(inst, grp, metric, int(b), int(n))
+                                   for b, n in self._sketch(inst, grp, metric).add(values[mask & ok])]
+        return deltas
+
+    def update(self, rows: Sequence[Dict[str, object]]) -> None:
+        deltas: List[tuple] = []
+        with self._lock:
+            if len(rows) > 100:   # batches (ingest.py) go column-wise, as in Rollups.update
+                deltas = self._add_frame(pd.DataFrame(list(rows)))
+            else:
+                for row in rows:
+                    inst, groups = instrument_key(row), group_keys(row, self.by)
+                    for metric in METRICS:
+                        v = row.get(metric)
+                        if v in (None, "") or v != v: continue
+                        for grp in groups:
+                            deltas.append((inst, grp, metric, self._sketch(inst, grp, metric).add_one(float(v)), 1))
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._write(deltas)
+            self._conn.execute("COMMIT")
+
+    def rebuild(self, store, chunksize: int = 50_000) -> int:
+        # store: a store.RecordStore
+        n = 0
+        with self._lock:
+            self._sketches = {}
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM sketch")
+            for chunk in store.iter_chunks(chunksize, columns=["instrument"] + list(self.by) + METRICS):
+                self._add_frame(chunk)
+                n += len(chunk)
+            self._write([(inst, grp, metric, int(b), int(s.counts[b])) for (inst, grp, metric), s in self._sketches.items()
+                         for b in np.flatnonzero(s.counts)])
+            self._conn.execute("COMMIT")
+        return n
+
+    def is_empty(self) -> bool:
+        return not self._sketches
+
+    # -------------------- Queries --------------------
+    def sketch(self, metric: str, group: str = "all", instrument: Optional[str] = None) -> Optional[Sketch]:
+        return self._sketches.get((instrument or DEFAULT_INSTRUMENT, group, metric))
+
+    def percentiles(self, traits: Dict[str, float], chakras: Dict[str, float],
+                    meta: Optional[Dict[str, str]] = None, by: Optional[str] = None,
+                    instrument: Optional[str] = None) -> Dict[str, float]:
+        # {"trait_O": 63.5, "chakra_Heart": 82.0, ...}; compared among clients of the same instrument,
+        # within the client's `by` group (coach/gender) when that group has MIN_COUNT clients, else all
+        inst = instrument or DEFAULT_INSTRUMENT
+        group = next((g for g in group_keys(meta or {}, [by]) if g != "all"), "all") if by else "all"
+        out: Dict[str, float] = {}
+        with self._lock:
+            for metric, v in [(f"trait_{k}", v) for k, v in traits.items()] + [(f"chakra_{k}", v) for k, v in chakras.items()]:
+                s = self._sketches.get((inst, group, metric))
+                if s is None or s.n < MIN_COUNT: s = self._sketches.get((inst, "all", metric))
+                if s is not None and s.n >= MIN_COUNT: out[metric] = round(s.percentile(v), 1)
+        return out
+
+    def groups(self) -> List[str]:
+        return sorted({g for _, g, _ in self._sketches})
+
+    def close(self) -> None:
+        self._conn.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy population norms.")
+    ap.add_argument("--norms", default=str(NORMS_PATH))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="recompute the sketches from the record store")
+    r.add_argument("store", nargs="?", default=str(NORMS_PATH.parent / "records.db"))
+    s = sub.add_parser("show", help="quantiles of one score column")
+    s.add_argument("metric", choices=METRICS)
+    s.add_argument("--group", default="all", help="all, coach:<name> or gender:<value>")
+    s.add_argument("--instrument", default=DEFAULT_INSTRUMENT)
+    args = ap.parse_args(argv)
+    norms = Norms(args.norms)
+    if args.cmd == "rebuild":
+        from store import open_store
+        store = open_store(args.store)
+        n = norms.rebuild(store)
+        store.close()
+        print(f"sketched {n} records into {args.norms} ({len(norms.groups())} groups)")
+        return 0
+    sk = norms.sketch(args.metric, args.group, args.instrument)
+    if sk is None or not sk.n:
+        print(f"no data for {args.metric} in {args.group} ({args.instrument})")
+        return 1
+    print(f"{args.metric} in {args.group} ({args.instrument}): n={sk.n}  " +
+          "  ".join(f"p{int(q * 100)}={sk.quantile(q):.2f}" for q in (0.1, 0.25, 0.5, 0.75, 0.9)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
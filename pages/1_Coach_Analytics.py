@@ -0,0 +1,77 @@
+# Soulful Academy — Coach Analytics (Streamlit page)
+# Reads only the materialized rollups (analytics.py), never the raw records, so reruns stay
+# fast however many submissions are stored.
+
+import datetime as dt
+
+import pandas as pd
+import streamlit as st
+
+from analytics import Rollups, CHAKRA_STATUSES, METRICS
+from scoring import DEFAULT_INSTRUMENT, get_instrument
+from store import CSV_PATH, DB_PATH, open_store
+
+st.set_page_config(page_title="Coach Analytics — Soulful Academy", page_icon="📊", layout="wide")
+st.title("📊 Coach Analytics")
+
+@st.cache_resource
+def get_rollups() -> Rollups:
+    rollups = Rollups()
+    if rollups.is_empty():   # opened before the app, or rollups in the layout before per-instrument keys
+        path = DB_PATH if DB_PATH.exists() else CSV_PATH
+        if path.exists():
+            store = open_store(path)
+            rollups.rebuild(store)
+            store.close()
+    return rollups
+
+rollups = get_rollups()
+if rollups.is_empty():
+    st.info("No submissions yet. Results appear here as soon as clients are analyzed.")
+    st.stop()
+
+# -------------------- Filters --------------------
+lo, hi = (dt.date.fromisoformat(d) if d else dt.date.today() for d in rollups.day_range())
+f1, f2, f3 = st.columns([2, 1, 1])
+coaches = f1.multiselect("Coach / Healer", rollups.coaches(), placeholder="All coaches")
+picked  = f2.date_input("Session dates", value=(lo, hi), min_value=lo, max_value=hi)
+start, end = (picked if isinstance(picked, tuple) and len(picked) == 2 else (lo, hi))
+# One questionnaire version at a time: each has its own scales, bands and statuses
+keys = rollups.instruments()
+inst_key = f3.selectbox("Questionnaire", keys, index=keys.index(DEFAULT_INSTRUMENT) if DEFAULT_INSTRUMENT in keys else 0)
+trait_bands = get_instrument(inst_key).trait_bands
+flt = dict(coaches=coaches, start=start.isoformat(), end=end.isoformat(), instrument=inst_key)
+
+st.metric("Submissions", f"{rollups.submissions(**flt):,}")
+
+# -------------------- Averages --------------------
+summary = rollups.summary(**flt)
+summary["Metric"] = summary["metric"].str.replace("trait_", "Trait ").str.replace("chakra_", "")
+st.subheader("Averages")
+st.dataframe(summary[["Metric", "n", "mean", "std"]].rename(columns={"n": "N", "mean": "Mean", "std": "Std"}).round(2),
+             use_container_width=True, hide_index=True)
+
+# -------------------- Status mix --------------------
+st.subheader("Chakra status mix")
+status = rollups.status_counts(**flt, prefix="chakra_").reindex(columns=CHAKRA_STATUSES, fill_value=0)
+status.index = status.index.str.replace("chakra_", "")
+st.dataframe(status, use_container_width=True)
+
+st.subheader("Personality bands")
+bands = rollups.status_counts(**flt, prefix="trait_").reindex(columns=[b for _, _, b in trait_bands], fill_value=0)
+bands.index = bands.index.str.replace("trait_", "")
+st.dataframe(bands, use_container_width=True)
+
+# -------------------- Distribution + trend --------------------
+st.subheader("Distribution")
+d1, d2 = st.columns([2, 1])
+metric = d1.selectbox("Score", METRICS, format_func=lambda m: m.replace("trait_", "Trait ").replace("chakra_", ""))
+labels = CHAKRA_STATUSES if metric.startswith("chakra_") else [b for _, _, b in trait_bands]
+only   = d2.selectbox("Status", ["All"] + labels)
+dist = rollups.distribution(metric, **flt, status=None if only == "All" else only)
+st.bar_chart(dist.set_index("bucket")["n"])
+
+trend = rollups.daily(metric, **flt)
+if len(trend) > 1:
+    st.caption("Daily average")
+    st.line_chart(trend.assign(day=pd.to_datetime(trend["day"])).set_index("day")["mean"])
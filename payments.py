@@ -0,0 +1,395 @@
+# Soulful Academy — Payment gate
+# Unlocks the PDF download once a checkout for that report is paid. Each analysis gets a
+# checkout reference: its results are kept in data/checkouts.db under that reference and the
+# payment link carries it (Stripe: ?client_reference_id=...). The checkout redirects back with
+# ?session_id=... (Razorpay: ?razorpay_payment_id=...), which may open a fresh browser session;
+# the app verifies the checkout once, restores the results it was for and unlocks those only.
+#   purchase — a checkout counts only if it paid the configured amount and currency (and, for
+#              Stripe, through the configured payment link); other payments to the account don't
+#   token    — a verified checkout becomes an HMAC-signed token (checkout id, reference, expiry)
+#              kept in st.session_state, so reruns check a signature instead of calling out; it
+#              unlocks the results of its own reference, so a reused checkout id opens nothing new
+#   cache    — checkout id -> entitlement for TOKEN_TTL, shared by every session in the process;
+#              "not paid" is kept for NEGATIVE_TTL only, so a payment that completes late unlocks
+#   flight   — concurrent checks of one id wait for a single provider call
+# Provider errors (network, 5xx, bad key) raise PaymentError and are never cached. Pending
+# results (client PII) are deleted PENDING_TTL after they were saved.
+#
+# Settings come from the environment; without SOULFUL_PAYMENT_PROVIDER the gate stays closed.
+#   SOULFUL_PAYMENT_PROVIDER ("stripe", "razorpay" or "fake"), SOULFUL_PAYMENT_LINK (checkout page),
+#   SOULFUL_PAYMENT_AMOUNT (price in minor units, e.g. 49900 for ₹499), SOULFUL_PAYMENT_CURRENCY,
+#   SOULFUL_PAYMENT_SECRET (token key; random per process when unset, so tokens end at restart),
+#   SOULFUL_STRIPE_KEY, SOULFUL_STRIPE_PAYMENT_LINK_ID (plink_...), SOULFUL_STRIPE_API (https://api.stripe.com),
+#   SOULFUL_RAZORPAY_KEY_ID, SOULFUL_RAZORPAY_KEY_SECRET
+#
+#   python payments.py standin --port 8026 --amount 49900 --currency inr   # local stand-in for Stripe
+#   SOULFUL_PAYMENT_PROVIDER=stripe SOULFUL_STRIPE_KEY=sk_test_local SOULFUL_STRIPE_API=http://127.0.0.1:8026 \
+#     SOULFUL_PAYMENT_AMOUNT=49900 SOULFUL_PAYMENT_CURRENCY=inr \
+#     SOULFUL_PAYMENT_LINK="http://127.0.0.1:8026/pay?return=http://localhost:8501/" streamlit run app.py
+#   python payments.py verify cs_paid_123
+
+import argparse, base64, hashlib, hmac, json, os, re, sqlite3, sys, threading, time, uuid
+import urllib.error, urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from store import DATA_DIR
+
+CHECKOUTS_PATH = DATA_DIR / "checkouts.db"
+TOKEN_TTL = 24 * 3600.0        # seconds a verified checkout unlocks downloads
+NEGATIVE_TTL = 10.0            # seconds an unpaid answer is reused
+PENDING_TTL = 7 * 24 * 3600.0  # seconds results wait for their checkout
+MAX_CACHED = 10_000            # checkout ids kept, least recently used dropped first
+TIMEOUT = 10.0                 # seconds per provider request
+SESSION_ID = re.compile(r"^[A-Za-z0-9_\-]{1,255}$")
+
+class PaymentError(Exception):
+    pass
+
+@dataclass(frozen=True)
+class Entitlement:
+    # A checkout as the provider reports it; amount in minor units, currency lower-case
+    session_id: str
+    provider: str
+    paid: bool
+    email: str = ""
+    amount: int = 0
+    currency: str = ""
+    product: str = ""     # Stripe payment link id
+    reference: str = ""   # the app's checkout reference (client_reference_id)
+
+@dataclass(frozen=True)
+class Purchase:
+    # What a checkout must have paid for to unlock a report
+    amount: int
+    currency: str
+    product: str = ""     # when set, the checkout's product must match too
+
+    def accepts(self, ent: Entitlement) -> bool:
+        return (ent.paid and ent.amount == self.amount and ent.currency.lower() == self.currency.lower()
+                and (not self.product or ent.product == self.product))
+
+# -------------------- Providers --------------------
+def _get_json(url: str, headers: Dict[str, str], timeout: float) -> Optional[Dict]:
+    # None for 404 (an id the provider doesn't know is simply not paid); other failures raise
+    req = urllib.request.Request(url, headers={"Accept": "application/json", **headers})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        if e.code == 404: return None
+        raise PaymentError(f"provider answered {e.code}") from e
+    except (OSError, ValueError) as e:
+        raise PaymentError(f"provider unreachable: {e}") from e
+
+class Provider:
+    name = ""
+
+    def lookup(self, session_id: str) -> Entitlement:
+        raise NotImplementedError
+
+class StripeProvider(Provider):
+    # Checkout Sessions: paid once payment_status is "paid"
+    name = "stripe"
+
+    def __init__(self, key: str, api: str = "https://api.stripe.com", timeout: float = TIMEOUT):
+        self.key, self.api, self.timeout = key, api.rstrip("/"), timeout
+
+    def lookup(self, session_id: str) -> Entitlement:
+        data = _get_json(f"{self.api}/v1/checkout/sessions/{quote(session_id)}",
+                         {"Authorization": f"Bearer {self.key}"}, self.timeout) or {}
+        return Entitlement(session_id, self.name, data.get("payment_status") == "paid",
+                           str((data.get("customer_details") or {}).get("email") or ""),
+                           int(data.get("amount_total") or 0), str(data.get("currency") or ""),
+                           str(data.get("payment_link") or ""), str(data.get("client_reference_id") or ""))
+
+class RazorpayProvider(Provider):
+    # Payments: paid once captured; the checkout reference travels in the payment's notes
+    name = "razorpay"
+
+    def __init__(self, key_id: str, key_secret: str, api: str = "https://api.razorpay.com", timeout: float = TIMEOUT):
+        self.auth = base64.b64encode(f"{key_id}:{key_secret}".encode()).decode()
+        self.api, self.timeout = api.rstrip("/"), timeout
+
+    def lookup(self, session_id: str) -> Entitlement:
+        data = _get_json(f"{self.api}/v1/payments/{quote(session_id)}", {"Authorization": f"Basic {self.auth}"},
+                         self.timeout) or {}
+        notes = data.get("notes") if isinstance(data.get("notes"), dict) else {}
+        return Entitlement(session_id, self.name, data.get("status") == "captured", str(data.get("email") or ""),
+                           int(data.get("amount") or 0), str(data.get("currency") or ""), "",
+                           str(notes.get("reference") or ""))
+
+class FakeProvider(Provider):
+    # In-process stand-in for tests and benchmarks. pay() records a checkout like the hosted page
+    # would; ids starting with `paid_prefix` are paid in full without a reference. `latency`
+    # seconds per lookup imitate the provider round trip.
+    name = "fake"
+
+    def __init__(self, purchase: Optional["Purchase"] = None, paid_prefix: str = "cs_paid", latency: float = 0.0):
+        self.purchase = purchase or Purchase(100, "usd")
+        self.paid_prefix, self.latency, self.calls = paid_prefix, latency, 0
+        self.checkouts: Dict[str, Entitlement] = {}
+
+    def pay(self, reference: str, amount: Optional[int] = None, currency: Optional[str] = None,
+            product: Optional[str] = None) -> str:
+        sid = f"{self.paid_prefix}_{uuid.uuid4().hex}"
+        p = self.purchase
+        self.checkouts[sid] = Entitlement(sid, self.name, True, "client@example.com", p.amount if amount is None else amount,
+                                          currency or p.currency, p.product if product is None else product, reference)
+        return sid
+
+    def lookup(self, session_id: str) -> Entitlement:
+        self.calls += 1
+        if self.latency: time.sleep(self.latency)
+        if session_id in self.checkouts: return self.checkouts[session_id]
+        p = self.purchase
+        return Entitlement(session_id, self.name, session_id.startswith(self.paid_prefix), "", p.amount, p.currency, p.product)
+
+def purchase_from_env() -> Purchase:
+    env = os.environ.get
+    amount, currency = env("SOULFUL_PAYMENT_AMOUNT", "").strip(), env("SOULFUL_PAYMENT_CURRENCY", "").strip()
+    if not amount.isdigit() or not currency:
+        raise ValueError("set SOULFUL_PAYMENT_AMOUNT (minor units) and SOULFUL_PAYMENT_CURRENCY: "
+                         "a checkout unlocks a report only if it paid that price")
+    return Purchase(int(amount), currency.lower(), env("SOULFUL_STRIPE_PAYMENT_LINK_ID", "").strip())
+
+def provider_from_env() -> Optional[Provider]:
+    env = os.environ.get
+    name = env("SOULFUL_PAYMENT_PROVIDER", "").strip().lower()
+    if name == "stripe": return StripeProvider(env("SOULFUL_STRIPE_KEY", ""), env("SOULFUL_STRIPE_API", "https://api.stripe.com"))
+    if name == "razorpay": return RazorpayProvider(env("SOULFUL_RAZORPAY_KEY_ID", ""), env("SOULFUL_RAZORPAY_KEY_SECRET", ""))
+    if name == "fake": return FakeProvider()
+    if name: raise ValueError(f"SOULFUL_PAYMENT_PROVIDER: unknown provider {name!r} (stripe, razorpay or fake)")
+    return None
+
+# -------------------- Tokens --------------------
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+class TokenSigner:
+    # "<payload>.<HMAC-SHA256>", both base64url; payload {"sid", "ref", "prv", "exp"}
+    def __init__(self, secret: bytes):
+        self.secret = secret
+
+    def sign(self, ent: Entitlement, ttl: float) -> str:
+        payload = _b64(json.dumps({"sid": ent.session_id, "ref": ent.reference, "prv": ent.provider,
+                                   "exp": int(time.time() + ttl)}, separators=(",", ":")).encode())
+        return f"{payload}.{_b64(hmac.new(self.secret, payload.encode(), hashlib.sha256).digest())}"
+
+    def verify(self, token: str) -> Optional[Dict[str, object]]:
+        payload, _, mac = str(token).partition(".")
+        try:
+            ok = hmac.compare_digest(_unb64(mac), hmac.new(self.secret, payload.encode(), hashlib.sha256).digest())
+            claims = json.loads(_unb64(payload)) if ok else None
+        except ValueError:
+            return None
+        return claims if claims and claims.get("exp", 0) > time.time() else None
+
+# -------------------- Gate --------------------
+class PaymentGate:
+    def __init__(self, provider: Provider, purchase: Purchase, secret: Optional[bytes] = None, ttl: float = TOKEN_TTL,
+                 negative_ttl: float = NEGATIVE_TTL, max_cached: int = MAX_CACHED):
+        self.provider, self.purchase = provider, purchase
+        self.ttl, self.negative_ttl, self.max_cached = ttl, negative_ttl, max_cached
+        self.signer = TokenSigner(secret or os.urandom(32))
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[float, Entitlement]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self.token_hits = self.hits = self.calls = self.rejected = 0
+
+    def verify(self, session_id: Optional[str]) -> Optional[Entitlement]:
+        # The checkout when it paid for the configured purchase, else None
+        if not session_id or not SESSION_ID.match(session_id): return None
+        ent = self.entitlement(session_id)
+        if self.purchase.accepts(ent): return ent
+        if ent.paid:
+            with self._lock: self.rejected += 1   # paid, but not for this product or price
+        return None
+
+    def token(self, ent: Entitlement) -> str:
+        return self.signer.sign(ent, self.ttl)
+
+    def unlocks(self, token: Optional[str], reference: Optional[str]) -> bool:
+        # True when the token is valid and was issued for the checkout of these results
+        claims = self.signer.verify(token) if token and reference else None
+        if claims is None or claims.get("ref") != reference: return False
+        self.token_hits += 1
+        return True
+
+    def check(self, session_id: Optional[str], reference: str, token: Optional[str] = None) -> Optional[str]:
+        # A token for `reference` (the one given, while valid), or a new one if the checkout paid for it
+        if self.unlocks(token, reference): return token
+        ent = self.verify(session_id)
+        return self.token(ent) if ent is not None and ent.reference == reference else None
+
+    def entitlement(self, session_id: str) -> Entitlement:
+        while True:
+            with self._lock:
+                cached = self._cache.get(session_id)
+                if cached is not None and cached[0] > time.monotonic():
+                    self._cache.move_to_end(session_id)
+                    self.hits += 1
+                    return cached[1]
+                flight = self._inflight.get(session_id)
+                leader = flight is None
+                if leader: flight = self._inflight[session_id] = threading.Event()
+            if not leader:
+                flight.wait(getattr(self.provider, "timeout", TIMEOUT) + 1)
+                continue   # cached now, or the leader failed and this caller tries itself
+            try:
+                ent = self.provider.lookup(session_id)
+                with self._lock:
+                    self.calls += 1
+                    self._cache[session_id] = (time.monotonic() + (self.ttl if ent.paid else self.negative_ttl), ent)
+                    self._cache.move_to_end(session_id)
+                    while len(self._cache) > self.max_cached: self._cache.popitem(last=False)
+                return ent
+            finally:
+                with self._lock: self._inflight.pop(session_id, None)
+                flight.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"token_hits": self.token_hits, "cache_hits": self.hits, "provider_calls": self.calls,
+                    "rejected": self.rejected, "cached": len(self._cache)}
+
+def gate_from_env() -> Optional[PaymentGate]:
+    provider = provider_from_env()
+    if provider is None: return None
+    purchase = provider.purchase if isinstance(provider, FakeProvider) else purchase_from_env()
+    secret = os.environ.get("SOULFUL_PAYMENT_SECRET", "")
+    return PaymentGate(provider, purchase, secret.encode() if secret else None)
+
+def checkout_url(link: str, reference: str) -> str:
+    # The payment link for one report: Stripe Payment Links copy client_reference_id to the session
+    return f"{link}{'&' if '?' in link else '?'}client_reference_id={quote(reference)}"
+
+# -------------------- Pending results --------------------
+class Checkouts:
+    # reference -> the results a checkout is for (JSON), so they survive the redirect to a new session
+    def __init__(self, path=CHECKOUTS_PATH, ttl: float = PENDING_TTL):
+        self.path, self.ttl = Path(path), ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pending (ref TEXT PRIMARY KEY, created_at REAL, result TEXT)")
+
+    def save(self, result: Dict[str, object]) -> str:
+        ref = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM pending WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute("INSERT INTO pending VALUES (?,?,?)", (ref, now, json.dumps(result, ensure_ascii=False)))
+        return ref
+
+    def load(self, ref: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM pending WHERE ref = ? AND created_at >= ?",
+                                     (ref, time.time() - self.ttl)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+# -------------------- Local stand-in --------------------
+class _StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def _json(self, status: int, doc: Dict) -> None:
+        body = json.dumps(doc).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url, server = urlsplit(self.path), self.server
+        if url.path == "/pay":   # the "checkout page": pays at once and redirects back with the session id
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            back = q.get("return", "/")
+            sid = server.pay(q.get("client_reference_id", ""))
+            self.send_response(303)
+            self.send_header("Location", f"{back}{'&' if '?' in back else '?'}session_id={sid}")
+            self.end_headers()
+            return
+        if not url.path.startswith("/v1/checkout/sessions/"):
+            return self._json(404, {"error": {"message": "no such route"}})
+        if not self.headers.get("Authorization", "").partition("Bearer ")[2].strip():
+            return self._json(401, {"error": {"message": "no API key"}})
+        server.count()
+        sid = url.path.rsplit("/", 1)[1]
+        session = server.session(sid)
+        if session is None:
+            return self._json(404, {"error": {"message": f"No such checkout.session: {sid}"}})
+        self._json(200, session)
+
+class StandInServer(ThreadingHTTPServer):
+    # Stripe's GET /v1/checkout/sessions/<id> and /pay?return=<url>&client_reference_id=<ref>, a
+    # checkout that succeeds at once for `amount` `currency` through `payment_link`. Ids cs_paid*
+    # not made by /pay are paid without a reference, other cs_* are unpaid, the rest unknown.
+    daemon_threads = True
+
+    def __init__(self, port: int, amount: int = 100, currency: str = "usd", payment_link: str = "plink_standin",
+                 host: str = "127.0.0.1"):
+        super().__init__((host, port), _StandInHandler)
+        self.amount, self.currency, self.payment_link = amount, currency, payment_link
+        self.lookups = 0
+        self.sessions: Dict[str, str] = {}   # checkout id -> client_reference_id
+        self._lock = threading.Lock()
+
+    def count(self) -> None:
+        with self._lock: self.lookups += 1
+
+    def pay(self, reference: str) -> str:
+        sid = f"cs_paid_{uuid.uuid4().hex}"
+        with self._lock: self.sessions[sid] = reference
+        return sid
+
+    def session(self, sid: str) -> Optional[Dict[str, object]]:
+        if not sid.startswith("cs_"): return None
+        with self._lock: reference = self.sessions.get(sid)
+        return {"id": sid, "object": "checkout.session", "payment_status": "paid" if sid.startswith("cs_paid") else "unpaid",
+                "amount_total": self.amount, "currency": self.currency, "payment_link": self.payment_link,
+                "client_reference_id": reference, "customer_details": {"email": "client@example.com"}}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy payment gate.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("standin", help="run a local stand-in for Stripe's checkout API")
+    s.add_argument("--port", type=int, default=8026)
+    s.add_argument("--amount", type=int, default=100, help="price every checkout pays, in minor units")
+    s.add_argument("--currency", default="usd")
+    s.add_argument("--payment-link", default="plink_standin")
+    v = sub.add_parser("verify", help="look up one checkout session with the configured provider")
+    v.add_argument("session_id")
+    args = ap.parse_args(argv)
+    if args.cmd == "standin":
+        server = StandInServer(args.port, args.amount, args.currency, args.payment_link)
+        print(f"payment stand-in on http://127.0.0.1:{args.port} (checkout: /pay?return=<app url>)")
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+        return 0
+    gate = gate_from_env()
+    if gate is None:
+        print("SOULFUL_PAYMENT_PROVIDER is not set", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    ent = gate.entitlement(args.session_id)
+    ok = gate.purchase.accepts(ent)
+    print(f"{ent.session_id} ({ent.provider}): {'paid' if ent.paid else 'not paid'} {ent.amount} {ent.currency}"
+          f"{' via ' + ent.product if ent.product else ''}{' for ' + ent.reference if ent.reference else ''}"
+          f" — {'unlocks' if ok else 'does not unlock'} a report; {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# Soulful Academy — PDF report cache
+# Content-addressed: the key is a hash of everything that ends up in the PDF (scores, meta,
+# logo bytes, TEMPLATE_VERSION, compact mode, earlier sessions, percentiles), so an identical
+# request never re-renders and any change — including a template change — is a different key.
+# No invalidation needed.
+#
+#   memory — LRU of the most recent PDFs (per process)
+#   disk   — data/pdf_cache/<key>.pdf, shared by processes, evicted oldest-first past max_disk_bytes
+#            and deleted once unused for max_age (the PDFs carry client names, emails and phones)
+#
+#   python pdf_cache.py stats
+#   python pdf_cache.py clear
+
+import argparse, hashlib, json, os, sys, tempfile, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from store import DATA_DIR
+
+CACHE_DIR = DATA_DIR / "pdf_cache"
+MAX_MEMORY_ITEMS = 64
+MAX_DISK_BYTES = 256 * 1024 * 1024
+MAX_AGE = 30 * 24 * 3600.0   # seconds a disk entry is kept since it was last used
+SWEEP_INTERVAL = 3600.0      # seconds between expiry sweeps
+
+def report_key(traits: Dict[str,float], chakras: Dict[str,float], logo: Optional[bytes], meta: Dict[str,str],
+               compact: bool = False, history: Optional[List[Dict]] = None,
+               percentiles: Optional[Dict[str,float]] = None, instrument: Optional[str] = None) -> str:
+    from report import TEMPLATE_VERSION   # report (and ReportLab) loads on first PDF use, not at app start
+    doc = {"v": TEMPLATE_VERSION, "traits": traits, "chakras": chakras, "meta": meta,
+           "logo": hashlib.sha256(logo).hexdigest() if logo else None, "compact": bool(compact)}
+    if history: doc["history"] = [[s.get("label"), s["traits"], s["chakras"]] for s in history]
+    if percentiles: doc["percentiles"] = percentiles
+    if instrument: doc["instrument"] = instrument
+    payload = json.dumps(doc, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ReportCache:
+    def __init__(self, path=CACHE_DIR, max_items: int = MAX_MEMORY_ITEMS, max_disk_bytes: int = MAX_DISK_BYTES,
+                 max_age: float = MAX_AGE):
+        self.path = Path(path) if path else None
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self._swept = 0.0
+        self.hits = self.disk_hits = self.misses = 0
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._evict()   # expired entries go at startup; also sets _disk_bytes
+
+    # -------------------- Tiers --------------------
+    def _remember(self, key: str, pdf: bytes) -> None:
+        with self._lock:
+            self._mem[key] = pdf
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items: self._mem.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.path: return None
+        f = self.path / f"{key}.pdf"
+        try:
+            if time.time() - f.stat().st_mtime > self.max_age:   # expired since the last sweep
+                f.unlink(missing_ok=True)
+                return None
+            pdf = f.read_bytes()
+            os.utime(f)   # mtime doubles as last-used time for eviction and expiry
+            return pdf
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, pdf: bytes) -> None:
+        if not self.path: return
+        target = self.path / f"{key}.pdf"
+        try:
+            os.utime(target)   # same key, same bytes: another process (or render) already stored it
+            return
+        except FileNotFoundError:
+            pass
+        # write-then-rename, so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f: f.write(pdf)
+        try: old = target.stat().st_size   # a concurrent writer got there first: replaced, not added
+        except FileNotFoundError: old = 0
+        os.replace(tmp, target)
+        with self._lock:
+            self._disk_bytes += len(pdf) - old
+            due = self._disk_bytes > self.max_disk_bytes or time.monotonic() - self._swept > SWEEP_INTERVAL
+        if due: self._evict()
+
+    def _evict(self) -> None:
+        # Expired entries, then least recently used ones while over budget
+        files, cutoff = [], time.time() - self.max_age
+        for f in self.path.glob("*.pdf"):
+            try: st = f.stat()
+            except FileNotFoundError: continue   # evicted by another process
+            if st.st_mtime < cutoff: f.unlink(missing_ok=True)
+            else: files.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in files)
+        if total > self.max_disk_bytes:
+            for _, size, f in sorted(files):
+                if total <= self.max_disk_bytes * 0.9: break   # leave headroom so we don't evict on every write
+                f.unlink(missing_ok=True)
+                total -= size
+        with self._lock: self._disk_bytes, self._swept = total, time.monotonic()
+
+    # -------------------- API --------------------
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pdf = self._mem.get(key)
+            if pdf is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return pdf
+        pdf = self._read_disk(key)
+        with self._lock:
+            if pdf is None: self.misses += 1
+            else: self.disk_hits += 1
+        if pdf is not None: self._remember(key, pdf)
+        return pdf
+
+    def put(self, key: str, pdf: bytes) -> None:
+        self._remember(key, pdf)
+        self._write_disk(key, pdf)
+
+    def build_pdf(self, traits: Dict[str,float], chakras: Dict[str,float],
+                  logo: Optional[bytes], meta: Dict[str,str], compact: bool = False,
+                  history: Optional[List[Dict]] = None, percentiles: Optional[Dict[str,float]] = None,
+                  instrument: Optional[str] = None) -> bytes:
+        # Same signature as report.build_pdf
+        key = report_key(traits, chakras, logo, meta, compact, history, percentiles, instrument)
+        pdf = self.get(key)
+        if pdf is None:
+            from report import build_pdf
+            pdf = build_pdf(traits, chakras, logo, meta, compact, history, percentiles, instrument)
+            self.put(key, pdf)
+        return pdf
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "memory_items": len(self._mem), "memory_bytes": sum(map(len, self._mem.values())),
+                    "disk_bytes": self._disk_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._disk_bytes = 0
+        if self.path:
+            for f in self.path.glob("*.pdf"): f.unlink(missing_ok=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy PDF report cache.")
+    ap.add_argument("cmd", choices=["stats", "clear"])
+    ap.add_argument("--dir", default=str(CACHE_DIR))
+    args = ap.parse_args(argv)
+    cache = ReportCache(args.dir)
+    if args.cmd == "clear":
+        cache.clear()
+        print(f"cleared {args.dir}")
+    else:
+        n = len(list(cache.path.glob("*.pdf")))
+        print(f"{n} cached reports, {cache.stats()['disk_bytes'] / 1e6:.1f} MB in {args.dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# Soulful Academy — Remedy tables
+# Crystal + practice suggestions and labels shared by the on-screen results and the PDF report.
+# No heavy imports: the app loads this on every rerun, render workers for every report.
+
+MYAURABLISS = {
+    "Root": ["Red Jasper","Hematite","Black Tourmaline"],
+    "Sacral": ["Carnelian","Orange Calcite","Moonstone"],
+    "Solar Plexus": ["Citrine","Tiger's Eye","Yellow Aventurine"],
+    "Heart": ["Rose Quartz","Green Aventurine","Malachite"],
+    "Throat": ["Sodalite","Blue Apatite","Aquamarine"],
+    "Third Eye": ["Amethyst","Lapis Lazuli","Lepidolite"],
+    "Crown": ["Clear Quartz","Amethyst","Selenite"],
+}
+
+def ordinal(p: float) -> str:
+    # 82.4 -> "82nd" (percentiles from norms.Norms)
+    n = int(round(p))
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+def short_remedy(status: str, chakra: str) -> str:
+    base = {
+      "Root":"Grounding walk, red foods",
+      "Sacral":"Creative play, water ritual",
+      "Solar Plexus":"Power poses, celebrate small wins",
+      "Heart":"Gratitude + forgiveness",
+      "Throat":"Speak your truth / sing",
+      "Third Eye":"Visualization + journaling",
+      "Crown":"Silence, service, prayer",
+    }
+    return f"{base.get(chakra,'')} • Crystals: {', '.join(MYAURABLISS.get(chakra, []))}"
+
+def chakra_long_remedy(status: str, chakra: str) -> str:
+    tips = {
+      "Root": "Stabilize your base: consistent meals, sleep, and movement. Walk barefoot, breathe into the belly, and repeat ‘I am safe’.",
+      "Sacral": "Unfreeze emotions gently: sway/dance, warm showers, and creative expression. Let joy be allowed, not earned.",
+      "Solar Plexus": "Rebuild power with small promises kept. Micro-wins restore confidence; practice firm, kind boundaries.",
+      "Heart": "Release resentment with daily gratitude. Ho’oponopono on the name that triggers tightness in the chest.",
+      "Throat": "Practice clear, calm requests. Journal the truth you’re afraid to say, then voice a kinder, shorter version.",
+      "Third Eye": "Track patterns. 5-minute nightly visualization of tomorrow’s ‘best next step’.",
+      "Crown": "10 minutes of silence, witness thoughts pass, place a clear quartz near crown while breathing slowly.",
+    }
+    return f"{status}. {tips.get(chakra,'')}"
@@ -0,0 +1,119 @@
+# Soulful Academy — Background PDF rendering
+# One bounded process pool per server, shared by every Streamlit session. Reports render off
+# the script thread, so on-screen results never wait on ReportLab.
+#
+#   workers     — render processes (default: half the cores), the CPU ceiling for PDFs
+#   max_pending — admission limit; past it submit() returns None and the caller retries later
+#
+# Identical requests (same cache key) share one in-flight job; finished PDFs go to the
+# ReportCache, so a repeat request is served from there without touching the pool.
+# Stage timings measured in the workers travel back with the PDF and are recorded here.
+
+import multiprocessing, os, sys, threading, time, types
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import metrics
+from pdf_cache import ReportCache, report_key
+
+@contextmanager
+def _plain_main():
+    # Streamlit runs the page as sys.modules["__main__"], and spawned workers re-execute __main__
+    # on startup. Hide it while workers are launched; they only need report.build_pdf.
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+def _ready(pdf: bytes) -> Future:
+    fut: Future = Future()
+    fut.set_result(pdf)
+    return fut
+
+def _render(traits: Dict[str,float], chakras: Dict[str,float], logo: Optional[bytes], meta: Dict[str,str],
+            compact: bool = False, history: Optional[List[Dict]] = None, percentiles: Optional[Dict[str,float]] = None,
+            instrument: Optional[str] = None):
+    # Runs in a pool process
+    from report import build_pdf
+    with metrics.capture() as spans:
+        pdf = build_pdf(traits, chakras, logo, meta, compact, history, percentiles, instrument)
+    return pdf, spans
+
+class RenderJob(Future):
+    # Future of the PDF bytes, completed by the pool once the worker's result is unpacked
+    def __init__(self, worker: Future):
+        super().__init__()
+        self._worker = worker
+
+    def running(self) -> bool:
+        return self._worker.running()
+
+class RenderPool:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 cache: Optional[ReportCache] = None):
+        self.workers = workers or max(1, (os.cpu_count() or 1) // 2)
+        self.max_pending = max_pending or self.workers * 4
+        self.cache = cache
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None   # started on first miss
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the Streamlit server is multi-threaded
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, traits: Dict[str,float], chakras: Dict[str,float],
+               logo: Optional[bytes], meta: Dict[str,str], compact: bool = False,
+               history: Optional[List[Dict]] = None, percentiles: Optional[Dict[str,float]] = None,
+               instrument: Optional[str] = None) -> Optional[Future]:
+        key = report_key(traits, chakras, logo, meta, compact, history, percentiles, instrument)
+        pdf = self.cache.get(key) if self.cache else None
+        if pdf is not None: return _ready(pdf)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None: return job
+            if len(self._jobs) >= self.max_pending:
+                self.rejected += 1
+                return None
+            with _plain_main():   # submit() is where the executor starts its workers
+                args = (traits, chakras, logo, meta, compact, history, percentiles, instrument)
+                try:
+                    worker = self._executor().submit(_render, *args)
+                except BrokenProcessPool:   # a worker died; start a fresh pool
+                    self._pool = None
+                    worker = self._executor().submit(_render, *args)
+            job = self._jobs[key] = RenderJob(worker)
+        submitted = time.time()
+        worker.add_done_callback(lambda f: self._finished(key, job, f, submitted))
+        return job
+
+    def _finished(self, key: str, job: RenderJob, worker: Future, submitted: float) -> None:
+        error = None if worker.cancelled() else worker.exception()
+        if not worker.cancelled() and error is None:
+            pdf, spans = worker.result()
+            # pdf.job: submit → result back in this process (queue wait + render + transfer)
+            metrics.record(spans + [{"stage": "pdf.job", "ts": round(submitted, 3),
+                                     "ms": round((time.time() - submitted) * 1000, 3), "bytes": len(pdf)}])
+            # cache before dropping the job, so a concurrent submit finds one or the other
+            if self.cache: self.cache.put(key, pdf)
+        with self._lock:
+            self._jobs.pop(key, None)
+        if worker.cancelled(): job.cancel()
+        elif error is not None: job.set_exception(error)
+        else: job.set_result(pdf)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool: pool.shutdown(wait=True, cancel_futures=True)
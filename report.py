@@ -0,0 +1,455 @@
+# Soulful Academy — PDF report
+# Branded ReportLab report; used by the Streamlit app and the bulk renderer (bulk_report.py).
+#
+# Everything that is the same for every client (styles, decoded logo, the tips and the
+# "Quick Reading" page, remedy texts) lives in a ReportTemplate that is built once per process
+# and reused; build_pdf only lays out the client-specific parts and joins them with it.
+#
+# build_pdf(..., compact=True) is the emailed variant: same look, fewer bytes and objects —
+# the logo is downscaled to its printed size before it is embedded, and the chakra dashboard is
+# one table with canvas-drawn bars instead of a Table + Drawing per chakra. The bytes saved are
+# all the logo's: without one both modes are ~10.5 KB, and the dashboard saves a few ms at most.
+#
+# build_pdf(..., percentiles=...) adds where the client stands among all clients (norms.py)
+# to the trait table and the chakra dashboard.
+
+import io, os, threading
+from xml.sax.saxutils import escape
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple, Optional
+
+from PIL import Image
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle, PageBreak
+from reportlab.graphics.shapes import Drawing, Rect
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.widgets.markers import makeMarker
+
+from metrics import span
+from scoring import Instrument, get_instrument, verdict
+from remedies import MYAURABLISS, ordinal, short_remedy, chakra_long_remedy
+
+# Plain Flate streams: ASCII85 on top only makes the file bigger and is a pure-Python encode per page
+rl_config.useA85 = 0
+
+LOGO_PATH = "assets/soulful_logo.png"
+LOGO_SIZE = 90           # points, cover header
+COMPACT_LOGO_DPI = 150   # compact mode embeds the logo at this resolution of its printed size
+# Bump whenever the layout or any report text changes: it is part of the PDF cache key (pdf_cache.py)
+TEMPLATE_VERSION = 1
+
+# Chakra colors
+CHAKRA_COLORS = {
+    "Root": "#EA4335", "Sacral": "#F4A261", "Solar Plexus": "#E9C46A",
+    "Heart": "#34A853", "Throat": "#4285F4", "Third Eye": "#7E57C2", "Crown": "#B39DDB"
+}
+TRAIT_COLORS = {"O": "#7E57C2", "C": "#4285F4", "E": "#F4A261", "A": "#34A853", "N": "#EA4335"}
+BAR_TRACK = colors.HexColor("#EEEEEE")
+BAR_COLS = [2.6*cm, 8.6*cm, 1.2*cm, 3.5*cm, 5.1*cm]   # chakra, bar, %, status, remedy
+
+ALIGN_TIPS = [
+    "With high-C (organized) people: agree on clear timelines and definitions of done.",
+    "With high-O (creative) people: brainstorm first, then lock one experiment to ship.",
+    "With high-E (expressive) people: allow talk-time, then summarize next actions.",
+    "With high-A (kind) people: invite honest feedback and set gentle boundaries.",
+]
+
+def load_logo(path: str = LOGO_PATH) -> Optional[bytes]:
+    if not os.path.exists(path): return None
+    with open(path, "rb") as f:
+        return f.read()
+
+def report_filename(meta: Dict[str,str]) -> str:
+    return f"SoulfulAcademy_Report_{(meta.get('client') or 'Client').replace(' ','_')}.pdf"
+
+def footer(canvas, doc_):
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.HexColor("#666666"))
+    w, _ = A4
+    canvas.drawRightString(w-28, 18, f"Page {doc_.page}")
+    canvas.drawString(28, 18, "Soulful Academy • What You Seek Is Seeking You")
+
+# -------------------- Template (built once per process) --------------------
+class _Para(Paragraph):
+    # Keeps its line breaks per width: tables wrap each cell to measure and again to draw,
+    # and template paragraphs keep theirs from one report to the next.
+    def wrap(self, availWidth, availHeight):
+        if getattr(self, "_wrapped_at", None) != availWidth:
+            self._wrapped = Paragraph.wrap(self, availWidth, availHeight)
+            self._wrapped_at = availWidth
+        return self._wrapped
+
+class _SharedImage(Flowable):
+    # Image decoded once per template: the ImageReader keeps the pixels (and alpha) it extracted,
+    # so each report only hashes and compresses them in canvas.drawImage, which stores an image
+    # once per document by that digest. Public canvas API only.
+    def __init__(self, data: bytes, width: float, height: float):
+        Flowable.__init__(self)
+        self.drawWidth, self.drawHeight = width, height
+        self.image = ImageReader(io.BytesIO(data))
+        self.image.getRGBData()   # decode now, not in the first report
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.canv.drawImage(self.image, 0, 0, self.drawWidth, self.drawHeight, mask="auto")
+
+def _compact_logo(data: bytes, size: float = LOGO_SIZE) -> bytes:
+    # Downscale to the printed size; an alpha channel that is fully opaque is dropped (no soft mask)
+    im = Image.open(io.BytesIO(data))
+    if im.mode not in ("RGB", "RGBA", "L", "LA"): im = im.convert("RGBA")
+    if im.mode in ("RGBA", "LA") and im.getextrema()[-1][0] == 255: im = im.convert(im.mode[:-1])
+    px = round(size * COMPACT_LOGO_DPI / 72)
+    im.thumbnail((px, px), Image.LANCZOS)
+    out = io.BytesIO()
+    im.save(out, "PNG", optimize=True)
+    return out.getvalue() if out.tell() < len(data) else data
+
+class _Bar(Flowable):
+    # Dashboard level bar painted straight onto the canvas: a Drawing per row costs a renderPDF
+    # pass with its own graphics state and more content-stream operators
+    def __init__(self, width: float, height: float, frac: float, color):
+        Flowable.__init__(self)
+        self.width, self.height, self.frac, self.color = width, height, frac, color
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        canv.setFillColor(BAR_TRACK)
+        canv.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+        canv.setFillColor(self.color)
+        canv.rect(0, 0, self.width * self.frac, self.height, stroke=0, fill=1)
+
+class _Dashboard(Flowable):
+    # All dashboard rows in one flowable, laid out like the bar_row tables (6/3 padding, cells
+    # centred vertically, 0.25 grid, 4pt between rows) without a Table per row. Each row is drawn
+    # in its own coordinates, so the repeated operators compress as well as separate tables do.
+    PAD_X, PAD_Y, GAP = 6, 3, 4
+
+    def __init__(self, rows: List[list], widths: List[float], grid):
+        Flowable.__init__(self)
+        self.rows, self.widths, self.grid = rows, widths, grid
+        self.hAlign = "CENTER"   # as the tables: wider than the frame, overhanging it equally
+
+    def wrap(self, availWidth, availHeight):
+        self._sizes = [[c.wrap(w - 2*self.PAD_X, availHeight) for c, w in zip(row, self.widths)] for row in self.rows]
+        self._heights = [max(h for _, h in sizes) + 2*self.PAD_Y for sizes in self._sizes]
+        self.width = sum(self.widths)
+        self.height = sum(self._heights) + self.GAP * (len(self.rows) - 1)
+        return self.width, self.height
+
+    def draw(self):
+        canv, top = self.canv, self.height
+        edges = [sum(self.widths[:i]) for i in range(len(self.widths) + 1)]
+        for row, sizes, rh in zip(self.rows, self._sizes, self._heights):
+            canv.saveState()
+            canv.translate(0, top - rh)
+            for cell, x, (_, h) in zip(row, edges, sizes):
+                cell.drawOn(canv, x + self.PAD_X, (rh - h) / 2)
+            canv.setStrokeColor(self.grid); canv.setLineWidth(0.25); canv.setLineCap(1); canv.setLineJoin(1)
+            canv.lines([(0, rh, edges[-1], rh), (0, 0, edges[-1], 0)] + [(x, 0, x, rh) for x in edges])
+            canv.restoreState()
+            top -= rh + self.GAP
+
+class ReportTemplate:
+    MAX_CACHED_PARAS = 512   # remedy/label texts come from fixed tables, so this never fills up
+
+    def __init__(self, logo: Optional[bytes], compact: bool = False):
+        self.compact = compact
+        if logo and compact: logo = _compact_logo(logo)
+        styles = getSampleStyleSheet()
+        self.H1 = ParagraphStyle("H1", parent=styles["Title"], fontSize=22, leading=26, textColor=colors.HexColor("#212121"), alignment=0)
+        self.H2 = ParagraphStyle("H2", parent=styles["Heading2"], fontSize=16, leading=20, textColor=colors.HexColor("#311B92"))
+        self.NORMAL = styles["Normal"]
+        self.SMALL  = ParagraphStyle("SMALL", parent=self.NORMAL, fontSize=9, leading=12, textColor=colors.HexColor("#616161"))
+        self.CELL   = ParagraphStyle("CELL", parent=self.NORMAL, fontSize=10, leading=13)
+        self.CELL_SM= ParagraphStyle("CELL_SM", parent=self.NORMAL, fontSize=9, leading=12)
+        self._paras: Dict[Tuple[str,str], Paragraph] = {}
+        self.inst: Instrument = get_instrument()   # bands and scale of the report being rendered
+
+        # Cover header: logo decoded once
+        left_cell = [_SharedImage(logo, LOGO_SIZE, LOGO_SIZE)] if logo else []
+        self.header = Table([[left_cell, self.para("<b>Soulful Academy — Chakra & Personality Report</b>", self.H1)]],
+                            colWidths=[3.0*cm, 14.0*cm])
+        self.header.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
+        self.subtitle = self.para("A diagnostic report you can email to the client.", self.SMALL)
+
+        self.tips = [self.para("<b>How to align with other personalities</b>", self.NORMAL)] + \
+                    [self.para("• "+tip, self.SMALL) for tip in ALIGN_TIPS]
+
+        # Big Summary
+        self.summary_page = [
+            self.para("<b>Quick Reading</b>", self.H2),
+            self.para(
+                "Start with the lowest blocked chakra and move upward. Use the crystal suggestions, pair with 108× Ho’oponopono on the main person/event linked to that chakra, and soften any overactive areas with grounding, slow breathing and clear boundaries.",
+                self.NORMAL
+            ),
+            Spacer(1,6),
+            self.para("<b>Follow-up & Home Practice (7-Day Plan)</b>", self.H2),
+            self.para(
+                "1) Day 1–2: Chakra awareness — 7–11 minutes Root→Crown meditation. "
+                "2) Day 3–4: Emotional cleaning — journal ‘Who/what am I still holding in this chakra?’ + 108× Ho’oponopono. "
+                "3) Day 5: Crystal activation — wear/place suggested MyAuraBliss crystal for 11 minutes. "
+                "4) Day 6: Relationship repair — speak your truth (Throat/Heart). "
+                "5) Day 7: Integration — repeat meditation and note shifts.",
+                self.SMALL
+            ),
+            Spacer(1,6),
+            self.para("<b>Affirmations for Client</b>", self.H2),
+            self.para(
+                "I am safe. I allow myself to receive love, support and money. My power is gentle and firm. "
+                "My heart forgives and moves forward. My voice is heard. My mind is clear. I am divinely guided and supported.",
+                self.SMALL
+            ),
+            Spacer(1,6),
+            self.para("<b>Crystal Support (MyAuraBliss)</b>", self.H2),
+            self.para(
+                "Choose bracelet/crystal for the chakras that showed Blocked or Overactive. Wear daily for 21 days, cleanse on full moon, and charge with the affirmation above.",
+                self.SMALL
+            ),
+            PageBreak()
+        ]
+
+        # Chakra balance snapshot; only the data changes per client
+        self.chart = Drawing(420, 160)
+        self.bc = VerticalBarChart()
+        self.bc.x = 40; self.bc.y = 30; self.bc.height = 110; self.bc.width = 340
+        self.bc.valueAxis.valueMin = 0; self.bc.valueAxis.valueStep = 1   # valueMax: the instrument's scale
+        self.bc.barWidth = 18
+        self.bc.bars[0].fillColor = colors.HexColor("#6E3CBC")
+        self.chart.add(self.bc)
+
+    def para(self, text: str, style: ParagraphStyle) -> Paragraph:
+        # Shared, pre-laid-out paragraph for text that does not depend on the client
+        key = (text, style.name)
+        p = self._paras.get(key)
+        if p is None:
+            p = _Para(text, style)
+            if len(self._paras) < self.MAX_CACHED_PARAS: self._paras[key] = p
+        return p
+
+    # -------------------- Client-specific parts --------------------
+    def cover(self, meta: Dict[str,str]) -> list:
+        CELL_SM = self.CELL_SM
+        # Meta is typed by clients: escaped, or "<" / "&" would be read as paragraph markup
+        details = [[self.para(f"<b>{label}</b>", CELL_SM), _Para(escape(str(meta.get(key) or default)), CELL_SM)]
+                   for label, key, default in [("Client","client","—"), ("Email","email",""), ("Phone","phone",""),
+                                               ("Coach / Healer","coach","—"), ("Session Date","date","—"),
+                                               ("Gender","gender","—"), ("Intent / Focus","intent","—")]]
+        dtbl = Table(details, colWidths=[4.0*cm, 12.8*cm])
+        dtbl.setStyle(TableStyle([
+            ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#CCCCCC")),
+            ("BACKGROUND",(0,0),(0,-1),colors.HexColor("#EEE7FF")),
+            ("TEXTCOLOR",(0,0),(0,-1),colors.HexColor("#311B92")),
+            ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
+            ("WORDWRAP",(0,0),(-1,-1),"CJK"),
+        ]))
+        return [self.header, Spacer(1,6), self.subtitle, Spacer(1,14), dtbl, PageBreak()]
+
+    def personality(self, traits: Dict[str,float], percentiles: Optional[Dict[str,float]] = None) -> list:
+        CELL = self.CELL
+        story = [self.para("Personality Profile (Big Five style)", self.H2), Spacer(1,6)]
+        story += [self.para(f"<b>What kind of personality are you?</b> {verdict(traits)}", self.NORMAL), Spacer(1,8)]
+
+        r = self.inst.trait_range
+        pdata = [[self.para("<b>Trait</b>", CELL), self.para(f"<b>Score (-{r:g}..+{r:g})</b>", CELL), self.para("<b>Summary</b>", CELL)]]
+        for t,v in traits.items():
+            pdata.append([self.para(t, CELL), _Para(f"{v:.2f}", CELL), self.para(self.inst.trait_band(v), CELL)])
+        widths = [3.0*cm, 3.5*cm, 11.5*cm]
+        if percentiles:
+            # Percentile column carved out of Summary, so the table keeps its width
+            pdata[0].insert(2, self.para("<b>Percentile</b>", CELL))
+            for row, t in zip(pdata[1:], traits):
+                p = percentiles.get(f"trait_{t}")
+                row.insert(2, _Para(ordinal(p) if p is not None else "—", CELL))
+            widths = [3.0*cm, 3.5*cm, 2.5*cm, 9.0*cm]
+        ptable = Table(pdata, colWidths=widths)
+        ptable.setStyle(TableStyle([
+            ("BACKGROUND",(0,0),(-1,0),colors.HexColor("#EDE7F6")),
+            ("TEXTCOLOR",(0,0),(-1,0),colors.HexColor("#311B92")),
+            ("FONTNAME",(0,0),(-1,0),"Helvetica-Bold"),
+            ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#BBBBBB")),
+            ("VALIGN",(0,0),(-1,-1),"TOP"),
+            ("WORDWRAP",(0,0),(-1,-1),"CJK"),
+            ("ROWBACKGROUNDS",(0,1),(-1,-1),[colors.whitesmoke, colors.HexColor("#FAFAFA")]),
+        ]))
+        return story + [ptable, Spacer(1,8)] + self.tips + [PageBreak()]
+
+    def bar_cells(self, name: str, val: float, compact: bool = False, percentile: Optional[float] = None) -> list:
+        SMALL = self.SMALL
+        pct = self.inst.scale_pct(val)
+        col = colors.HexColor(CHAKRA_COLORS.get(name, "#777"))
+        barw = 300
+        if compact:
+            bar = _Bar(barw, 14, pct/100, col)
+        else:
+            bar = Drawing(barw, 14)
+            bar.add(Rect(0, 0, barw, 14, fillColor=BAR_TRACK, strokeColor=None))
+            bar.add(Rect(0, 0, barw*(pct/100), 14, fillColor=col, strokeColor=None))
+        stat = self.inst.chakra_status(val)
+        why  = _Para(f"{stat} — score {val:.1f}" + (f"<br/>{ordinal(percentile)} percentile" if percentile is not None else ""), SMALL)
+        summ = self.para(short_remedy(stat, name), SMALL)
+        return [self.para(f"<b>{name}</b>", self.CELL), bar, self.para(f"{pct}%", SMALL), why, summ]
+
+    def bar_row(self, name: str, val: float, percentile: Optional[float] = None) -> Table:
+        t = Table([self.bar_cells(name, val, percentile=percentile)], colWidths=BAR_COLS)
+        t.setStyle(TableStyle([
+            ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
+            ("GRID",(0,0),(-1,-1),0.25,colors.HexColor("#DDDDDD")),
+            ("WORDWRAP",(0,0),(-1,-1),"CJK"),
+        ]))
+        return t
+
+    def dashboard(self, chakras: Dict[str,float], percentiles: Optional[Dict[str,float]] = None) -> list:
+        # Chakra Dashboard (no overlap)
+        story = [self.para("Chakra Dashboard", self.H2), Spacer(1,4)]
+        pct = {ch: (percentiles or {}).get(f"chakra_{ch}") for ch in chakras}
+        if self.compact:
+            rows = [self.bar_cells(ch, val, compact=True, percentile=pct[ch]) for ch, val in chakras.items()]
+            story += [_Dashboard(rows, BAR_COLS, colors.HexColor("#DDDDDD")), Spacer(1,4)]
+        else:
+            for ch, val in chakras.items():
+                story.append(self.bar_row(ch, val, pct[ch]))
+                story.append(Spacer(1,4))
+
+        story.append(Spacer(1,6))
+        lo, hi = self.inst.scale
+        story.append(self.para(f"<b>Chakra balance snapshot ({lo}–{hi})</b>", self.NORMAL))
+        self.bc.valueAxis.valueMax = hi
+        self.bc.data = [tuple(chakras[k] for k in chakras.keys())]
+        self.bc.categoryAxis.categoryNames = list(chakras.keys())
+        story.append(self.chart)
+        story.append(PageBreak())
+        return story
+
+    def _trend(self, labels: List[str], series: List[Tuple[str, str, list]], lo: float, hi: float) -> Drawing:
+        # One line per metric across sessions; series: (name, color, values, None where missing)
+        d = Drawing(500, 170)
+        lc = HorizontalLineChart()
+        lc.x, lc.y, lc.width, lc.height = 40, 40, 360, 115
+        lc.data = [tuple(values) for _, _, values in series]
+        lc.valueAxis.valueMin, lc.valueAxis.valueMax, lc.valueAxis.valueStep = lo, hi, 1
+        lc.categoryAxis.categoryNames = labels
+        lc.categoryAxis.joinAxisMode = "bottom"   # below the plot, also when the scale crosses 0
+        lc.categoryAxis.labels.fontName = lc.valueAxis.labels.fontName = "Helvetica"
+        lc.categoryAxis.labels.fontSize = lc.valueAxis.labels.fontSize = 7
+        if len(labels) > 6: lc.categoryAxis.labels.angle, lc.categoryAxis.labels.boxAnchor = 30, "ne"
+        for i, (_, color, _) in enumerate(series):
+            lc.lines[i].strokeColor = colors.HexColor(color)
+            lc.lines[i].symbol = makeMarker("FilledCircle", size=3, fillColor=colors.HexColor(color))
+        legend = Legend()
+        legend.x, legend.y, legend.dy, legend.columnMaximum = 415, 155, 6, len(series)
+        legend.fontName, legend.fontSize = "Helvetica", 8
+        legend.colorNamePairs = [(colors.HexColor(color), name) for name, color, _ in series]
+        d.add(lc); d.add(legend)
+        return d
+
+    def progress(self, history: List[Dict], traits: Dict[str,float], chakras: Dict[str,float]) -> list:
+        # Progress over time: the client's earlier sessions (history.py) and this one
+        sessions = list(history) + [{"label": "Today", "traits": traits, "chakras": chakras}]
+        labels = [str(s.get("label") or "") for s in sessions]
+        story = [self.para("Progress Over Time", self.H2),
+                 _Para(f"This session compared with the previous {len(history)}.", self.SMALL), Spacer(1,6)]
+        (lo, hi), r = self.inst.scale, self.inst.trait_range
+        story += [self.para(f"<b>Chakras ({lo}–{hi})</b>", self.NORMAL),
+                  self._trend(labels, [(ch, CHAKRA_COLORS.get(ch, "#777"), [s["chakras"].get(ch) for s in sessions])
+                                       for ch in chakras], lo, hi), Spacer(1,10)]
+        story += [self.para(f"<b>Personality traits (-{r:g}..+{r:g})</b>", self.NORMAL),
+                  self._trend(labels, [(t, TRAIT_COLORS.get(t, "#777"), [s["traits"].get(t) for s in sessions])
+                                       for t in traits], -r, r)]
+        return story + [PageBreak()]
+
+    def chakra_cards(self, title_txt: str, subset: List[Tuple[str,float]]) -> list:
+        # Chakra Remedy Cards (fill pages with bigger text)
+        CELL, CELL_SM = self.CELL, self.CELL_SM
+        story = [self.para(title_txt, self.H2)]
+        for ch, val in subset:
+            stat = self.inst.chakra_status(val)
+            pct  = self.inst.scale_pct(val)
+            card = Table([
+                [self.para(f"<b>{ch}</b>", CELL),
+                 _Para(f"Avg: {val:.1f} (≈{pct}%)<br/>{stat}", CELL)]
+            ], colWidths=[8.0*cm, 8.0*cm])
+            card.setStyle(TableStyle([
+                ("BOX",(0,0),(-1,-1),0.5,colors.HexColor("#CFCFCF")),
+                ("BACKGROUND",(0,0),(-1,0),colors.whitesmoke),
+                ("VALIGN",(0,0),(-1,-1),"TOP"),
+            ]))
+            story.append(card)
+            story.append(Spacer(1,4))
+            longp = [
+              self.para(chakra_long_remedy(stat, ch), CELL_SM),
+              self.para(f"Crystals: {', '.join(MYAURABLISS.get(ch, []))}<br/>"
+                        "Daily: 7–11 min chakra breath • 108× Ho’oponopono on the main person/event • "
+                        "Journal 3 changes you notice", CELL_SM)
+            ]
+            desc = Table([longp], colWidths=[8.0*cm, 8.0*cm])
+            desc.setStyle(TableStyle([
+                ("BOX",(0,0),(-1,-1),0.25,colors.HexColor("#E0E0E0")),
+                ("VALIGN",(0,0),(-1,-1),"TOP"),
+                ("WORDWRAP",(0,0),(-1,-1),"CJK"),
+            ]))
+            story.append(desc)
+            story.append(Spacer(1,8))
+        return story
+
+    def render(self, traits: Dict[str,float], chakras: Dict[str,float], meta: Dict[str,str],
+               history: Optional[List[Dict]] = None, percentiles: Optional[Dict[str,float]] = None,
+               instrument: Optional[str] = None) -> bytes:
+        self.inst = get_instrument(instrument)
+        buf = io.BytesIO()
+        doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=28, rightMargin=28, topMargin=28, bottomMargin=28)
+
+        with span("pdf.story") as s:
+            items = list(chakras.items())
+            story = self.cover(meta) + self.personality(traits, percentiles) + self.summary_page + self.dashboard(chakras, percentiles)
+            if history: story += self.progress(history, traits, chakras)
+            story += self.chakra_cards("Chakra Remedies — Part 1", items[:3]) + [PageBreak()]
+            story += self.chakra_cards("Chakra Remedies — Part 2", items[3:5]) + [PageBreak()]
+            story += self.chakra_cards("Chakra Remedies — Part 3", items[5:])
+            s["flowables"] = len(story)
+
+        with span("pdf.build", flowables=len(story), compact=int(self.compact)) as s:
+            doc.build(story, onFirstPage=footer, onLaterPages=footer)
+            pdf = buf.getvalue()
+            s["bytes"], s["pages"] = len(pdf), doc.page
+        return pdf
+
+# Templates hold flowables that are mutated while drawing, so each one is used by a single
+# build at a time; concurrent builds (Streamlit sessions run in threads) check out their own.
+_templates: Dict[Tuple[Optional[bytes], bool], List[ReportTemplate]] = {}
+_templates_lock = threading.Lock()
+
+@contextmanager
+def report_template(logo: Optional[bytes], compact: bool = False) -> Iterator[ReportTemplate]:
+    with _templates_lock:
+        free = _templates.setdefault((logo, compact), [])
+        tpl = free.pop() if free else None
+    if tpl is None: tpl = ReportTemplate(logo, compact)
+    yield tpl
+    with _templates_lock:
+        _templates[(logo, compact)].append(tpl)
+
+def build_pdf(traits: Dict[str,float],
+              chakras: Dict[str,float],
+              logo: Optional[bytes],
+              meta: Dict[str,str],
+              compact: bool = False,
+              history: Optional[List[Dict]] = None,
+              percentiles: Optional[Dict[str,float]] = None,
+              instrument: Optional[str] = None) -> bytes:
+    # history: the client's earlier sessions ({"label", "traits", "chakras"}, oldest first) adds
+    # a "Progress Over Time" page; percentiles: norms.Norms.percentiles() for these scores;
+    # instrument: key of the questionnaire that scored them (bands, statuses, scale; default soulful@1)
+    with report_template(logo, compact) as tpl:
+        return tpl.render(traits, chakras, meta, history, percentiles, instrument)
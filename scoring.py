@@ -0,0 +1,217 @@
+# Soulful Academy — Scoring
+# Instrument layout + single-respondent helpers, and a registry of versioned instruments
+# (instruments/*.json) each compiled into one scoring matrix, so any number of respondents
+# on any instrument is scored in one pass.
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# -------------------- Instrument --------------------
+# Item texts live in versioned files under instruments/ (see Instruments below); the default
+# instrument is exposed here under the names the app has always used.
+@dataclass
+class Item:
+    left: str
+    right: str
+    trait: str
+    reverse: bool = False
+
+TRAITS = "OCEAN"
+CHAKRAS: List[str] = ["Root", "Sacral", "Solar Plexus", "Heart", "Throat", "Third Eye", "Crown"]
+VERDICTS = ["Organized Visionary", "Warm Communicator", "Creative Explorer", "Calm Strategist", "Balanced Builder"]
+
+# -------------------- Single respondent --------------------
+def score_personality(items: List[Tuple[Item,int]]) -> Dict[str,float]:
+    vals={t:[] for t in TRAITS}
+    for it,val in items:
+        v=(val-4)  # -3..+3 centered
+        if it.reverse: v=-v
+        vals[it.trait].append(v)
+    return {t: float(np.mean(v)) if v else 0 for t,v in vals.items()}
+
+def summarize_trait(name:str,score:float)->str:
+    label=next(lbl for lo,hi,lbl in TRAIT_BANDS if lo<=score<hi)
+    return f"{label}"
+
+def score_chakras(scores: Dict[str, List[int]]) -> Dict[str, float]:
+    return {k: float(np.mean(v)) if v else 0.0 for k, v in scores.items()}
+
+def chakra_status(v: float) -> str:
+    return "Balanced" if 3.8 <= v <= 5.8 else ("Overactive" if v > 5.8 else "Blocked")
+
+def verdict(ts: Dict[str,float]) -> str:
+    o, c, e, a = ts.get("O",0), ts.get("C",0), ts.get("E",0), ts.get("A",0)
+    if c>1.0 and o>0.5: return VERDICTS[0]
+    if e>1.0 and a>0.5: return VERDICTS[1]
+    if o>1.2 and c<-0.5: return VERDICTS[2]
+    if c>1.2 and e<-0.5: return VERDICTS[3]
+    return VERDICTS[4]
+
+def answers_row(responses: List[Tuple[Item,int]], chakra_scores: Dict[str, List[int]]) -> np.ndarray:
+    return np.array([v for _, v in responses] + [v for ch in CHAKRAS for v in chakra_scores[ch]], dtype=np.int8)
+
+# -------------------- Batch (N respondents × answers) --------------------
+@dataclass
+class BatchScores:
+    traits: np.ndarray          # (N, 5) float, columns = TRAITS
+    chakras: np.ndarray         # (N, 7) float, columns = CHAKRAS
+    trait_bands: np.ndarray     # (N, 5) str
+    chakra_status: np.ndarray   # (N, 7) str
+    verdicts: np.ndarray        # (N,) str
+
+    def trait_dict(self, i: int) -> Dict[str,float]:
+        return {t: float(v) for t, v in zip(TRAITS, self.traits[i])}
+
+    def chakra_dict(self, i: int) -> Dict[str,float]:
+        return {ch: float(v) for ch, v in zip(CHAKRAS, self.chakras[i])}
+
+def band_labels(traits: np.ndarray, bands: Optional[List[Tuple[float,float,str]]] = None) -> np.ndarray:
+    bands = bands or TRAIT_BANDS
+    edges = np.array([hi for _, hi, _ in bands[:-1]])
+    labels = np.array([lbl for _, _, lbl in bands])
+    return labels[np.searchsorted(edges, traits, side="right")]
+
+def status_labels(chakras: np.ndarray, lo: float = 3.8, hi: float = 5.8) -> np.ndarray:
+    return np.where((chakras >= lo) & (chakras <= hi), "Balanced",
+                    np.where(chakras > hi, "Overactive", "Blocked"))
+
+def verdict_labels(traits: np.ndarray) -> np.ndarray:
+    o, c, e, a = (traits[:, TRAITS.index(t)] for t in "OCEA")
+    conds = [(c>1.0)&(o>0.5), (e>1.0)&(a>0.5), (o>1.2)&(c<-0.5), (c>1.2)&(e<-0.5)]
+    return np.select(conds, VERDICTS[:4], default=VERDICTS[4])
+
+# -------------------- Instruments --------------------
+# One JSON (or YAML) file per instrument version in instruments/:
+#   {"id": "soulful", "version": 1, "title": ..., "scale": [1, 7],
+#    "trait_bands": [[lo, hi, label], ...], "chakra_balanced": [lo, hi],
+#    "personality": [{"left": ..., "right": ..., "trait": "C", "reverse": false}, ...],
+#    "chakras": {"Root": [question, ...], ...}}
+# Any number of items per trait / questions per chakra; a trait or chakra without items
+# scores 0 (as N does in soulful@1). Records store Instrument.key.
+INSTRUMENT_DIR = Path(__file__).resolve().parent / "instruments"
+DEFAULT_INSTRUMENT = "soulful@1"
+
+@dataclass
+class Instrument:
+    id: str
+    version: int
+    title: str
+    items: List[Item]
+    chakra_questions: Dict[str, List[str]]
+    scale: Tuple[int,int]
+    trait_bands: List[Tuple[float,float,str]]
+    chakra_balanced: Tuple[float,float]
+
+    def __post_init__(self):
+        unknown = sorted({it.trait for it in self.items} - set(TRAITS)) + \
+                  [ch for ch in self.chakra_questions if ch not in CHAKRAS]
+        if unknown:
+            raise ValueError(f"instrument {self.key}: unknown traits/chakras {unknown}")
+        self.answer_columns: List[str] = [f"q{i}" for i in range(1, len(self.items)+1)] + \
+            [f"{ch}_{j}" for ch, qs in self.chakra_questions.items() for j in range(1, len(qs)+1)]
+        self._compile()
+
+    @property
+    def key(self) -> str:
+        return f"{self.id}@{self.version}"
+
+    @property
+    def trait_range(self) -> float:
+        # Trait scores run from -trait_range to +trait_range (answers centred on the scale midpoint)
+        return (self.scale[1] - self.scale[0]) / 2
+
+    # One respondent's labels, as score() gives them per batch (for scores kept as dicts)
+    def trait_band(self, score: float) -> str:
+        return str(band_labels(np.array([score]), self.trait_bands)[0])
+
+    def chakra_status(self, v: float) -> str:
+        return str(status_labels(np.array([v]), *self.chakra_balanced)[0])
+
+    def metric_range(self, metric: str) -> Tuple[float,float]:
+        # Bounds of a stored score column: trait_* around 0, chakra_* on the answer scale
+        if metric.startswith("trait_"): return (-self.trait_range, self.trait_range)
+        return (float(self.scale[0]), float(self.scale[1]))
+
+    def scale_pct(self, v: float) -> int:
+        return max(0, min(100, round(v / self.scale[1] * 100)))
+
+    def _compile(self) -> None:
+        # One (answers × traits+chakras) matrix: ±1 for personality items (sign = keying), 1 for
+        # chakra questions. Personality answers are centred on the scale midpoint through a
+        # per-column offset, so every score is (x @ W + offset) / count — one matmul for all.
+        n_items, n_t = len(self.items), len(TRAITS)
+        w = np.zeros((len(self.answer_columns), n_t + len(CHAKRAS)))
+        for i, it in enumerate(self.items):
+            w[i, TRAITS.index(it.trait)] = -1.0 if it.reverse else 1.0
+        row = n_items
+        for ch, qs in self.chakra_questions.items():
+            w[row:row+len(qs), n_t + CHAKRAS.index(ch)] = 1.0
+            row += len(qs)
+        mid = (self.scale[0] + self.scale[1]) / 2
+        self._w = w
+        self._offset = np.concatenate([-mid * w[:n_items, :n_t].sum(axis=0), np.zeros(len(CHAKRAS))])
+        self._n = np.abs(w).sum(axis=0)
+
+    def score(self, answers: np.ndarray) -> BatchScores:
+        x = np.asarray(answers, dtype=np.float64)
+        if x.ndim == 1: x = x[None, :]
+        if x.shape[1] != len(self.answer_columns):
+            raise ValueError(f"{self.key}: expected {len(self.answer_columns)} answers per respondent, got {x.shape[1]}")
+        # Sums of small integers are exact in float64, so dividing by the count matches np.mean bit-for-bit
+        out = np.zeros((x.shape[0], self._w.shape[1]))
+        np.divide(x @ self._w + self._offset, self._n, out=out, where=self._n > 0)
+        out += 0.0   # fold -0.0 (from reverse-keyed zeros) into 0.0 like the scalar path
+        traits, chakras = out[:, :len(TRAITS)], out[:, len(TRAITS):]
+        return BatchScores(traits, chakras, band_labels(traits, self.trait_bands),
+                           status_labels(chakras, *self.chakra_balanced), verdict_labels(traits))
+
+def _read(path: Path) -> dict:
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path}: reading YAML instruments needs PyYAML (pip install pyyaml)")
+        return yaml.safe_load(path.read_text(encoding="utf-8"))
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def load_instrument(path) -> Instrument:
+    d = _read(Path(path))
+    return Instrument(
+        id=d["id"], version=int(d["version"]), title=d.get("title", d["id"]),
+        items=[Item(it["left"], it["right"], it["trait"], bool(it.get("reverse", False))) for it in d["personality"]],
+        chakra_questions={ch: list(qs) for ch, qs in d["chakras"].items()},
+        scale=tuple(d["scale"]),
+        trait_bands=[tuple(b) for b in d["trait_bands"]],
+        chakra_balanced=tuple(d["chakra_balanced"]))
+
+@lru_cache(maxsize=None)
+def instruments(directory: Path = INSTRUMENT_DIR) -> Dict[str, Instrument]:
+    # Every instrument in the directory by key ("soulful@1"), loaded and compiled once per process
+    found: Dict[str, Instrument] = {}
+    for path in sorted(p for p in Path(directory).iterdir() if p.suffix in (".json", ".yaml", ".yml")):
+        inst = load_instrument(path)
+        if inst.key in found: raise ValueError(f"{path}: duplicate instrument {inst.key}")
+        found[inst.key] = inst
+    return found
+
+def get_instrument(key: Optional[str] = None) -> Instrument:
+    registry = instruments()
+    try:
+        return registry[key or DEFAULT_INSTRUMENT]
+    except KeyError:
+        raise KeyError(f"unknown instrument {key!r} (available: {', '.join(registry)})") from None
+
+# The default instrument under the original module-level names
+_DEFAULT = get_instrument()
+PERSONALITY_ITEMS: List[Item] = _DEFAULT.items
+CHAKRA_QUESTIONS: Dict[str, List[str]] = _DEFAULT.chakra_questions
+ANSWER_COLUMNS: List[str] = _DEFAULT.answer_columns
+TRAIT_BANDS = _DEFAULT.trait_bands
+
+def score_batch(answers: np.ndarray) -> BatchScores:
+    return _DEFAULT.score(answers)
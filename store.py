@@ -0,0 +1,354 @@
+# Soulful Academy — Record store
+# Where save_local puts each submission. Two backends behind one small interface:
+#   SqliteStore — data/records.db, WAL mode, concurrent appends grouped into one commit (default)
+#   CsvStore    — data/records.csv, the original format, appends serialized by a file lock
+# The CSV stays the export format (export_csv) and can be migrated into SQLite (migrate_csv).
+#
+#   python store.py migrate data/records.csv data/records.db
+#   python store.py export data/records.db data/records.csv
+#   python store.py stress --backend sqlite --procs 8 --threads 8 --rows 50
+
+import argparse, csv, datetime as dt, hashlib, os, queue, sqlite3, sys, tempfile, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from scoring import TRAITS, CHAKRAS, DEFAULT_INSTRUMENT
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Bump when the row layout changes; every stored row carries the version that wrote it.
+# 0 = rows migrated from the unversioned CSV, 2 = adds the instrument column
+# (rows before that were all scored with soulful@1).
+SCHEMA_VERSION = 2
+
+DATA_DIR = Path("data")
+CSV_PATH = DATA_DIR / "records.csv"
+DB_PATH  = DATA_DIR / "records.db"
+
+META_COLUMNS  = ["client", "coach", "date", "gender", "intent", "email", "phone"]
+TRAIT_COLUMNS = [f"trait_{t}" for t in TRAITS]
+CHAKRA_COLUMNS = [f"chakra_{ch}" for ch in CHAKRAS]
+# Original CSV columns first so old files keep their positions
+RECORD_COLUMNS = META_COLUMNS + TRAIT_COLUMNS + CHAKRA_COLUMNS + ["instrument", "schema_version", "created_at"]
+NUMERIC_PREFIXES = ("trait_", "chakra_")
+
+Row = Dict[str, object]
+
+def record_row(meta: Dict[str,str], traits: Dict[str,float], chakras: Dict[str,float],
+               instrument: str = DEFAULT_INSTRUMENT) -> Row:
+    return {**meta,
+            **{f"trait_{k}":round(v,3) for k,v in traits.items()},
+            **{f"chakra_{k}":round(v,3) for k,v in chakras.items()},
+            "instrument": instrument,
+            "schema_version": SCHEMA_VERSION,
+            "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")}
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    # CSV is read as text (so phones keep leading zeros), then scores and versions become numbers
+    for c in df.columns:
+        if c.startswith(NUMERIC_PREFIXES): df[c] = pd.to_numeric(df[c], errors="coerce")
+    if "schema_version" in df.columns:
+        df["schema_version"] = pd.to_numeric(df["schema_version"], errors="coerce").fillna(0).astype(int)
+    return df
+
+def _column_order(known: Sequence[str], rows: Sequence[Row]) -> List[str]:
+    cols = list(known)
+    for r in rows:
+        cols += [c for c in r if c not in cols]
+    return cols
+
+# -------------------- Interface --------------------
+class RecordStore:
+    def append(self, row: Row) -> None:
+        self.append_many([row])
+
+    def append_many(self, rows: Sequence[Row]) -> None:
+        raise NotImplementedError
+
+    def to_dataframe(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def iter_chunks(self, chunksize: int = 50_000, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        df = self.to_dataframe()
+        for i in range(0, len(df), chunksize):
+            yield df.iloc[i:i+chunksize][list(columns) if columns else df.columns]
+
+    def count(self) -> int:
+        return len(self.to_dataframe())
+
+    def export_csv(self, path) -> int:
+        df = self.to_dataframe()
+        tmp = Path(f"{path}.tmp")
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        return len(df)
+
+    def close(self) -> None:
+        pass
+
+# -------------------- CSV --------------------
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class CsvStore(RecordStore):
+    def __init__(self, path=CSV_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def _header(self) -> Optional[List[str]]:
+        if not self.path.exists() or self.path.stat().st_size == 0: return None
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None)
+
+    def append_many(self, rows: Sequence[Row]) -> None:
+        if not rows: return
+        with _file_lock(self.lock_path):
+            header = self._header()
+            cols = _column_order(header or RECORD_COLUMNS, rows)
+            if header is not None and cols != header:
+                # New columns (e.g. an added trait): rewrite under the widened header instead of
+                # appending rows that no longer line up with it
+                df = pd.concat([pd.read_csv(self.path, dtype=str, keep_default_na=False), pd.DataFrame(rows)])
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                df.reindex(columns=cols).to_csv(tmp, index=False)
+                os.replace(tmp, self.path)
+                return
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=cols, restval="")
+                if header is None: w.writeheader()
+                w.writerows(rows)
+                f.flush(); os.fsync(f.fileno())
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if self._header() is None: return pd.DataFrame(columns=RECORD_COLUMNS)
+        with _file_lock(self.lock_path):
+            return _typed(pd.read_csv(self.path, dtype=str, keep_default_na=False))
+
+    def iter_chunks(self, chunksize: int = 50_000, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        header = self._header()
+        if header is None: return
+        for chunk in pd.read_csv(self.path, dtype=str, keep_default_na=False, chunksize=chunksize,
+                                 usecols=[c for c in columns if c in header] if columns else None):
+            yield _typed(chunk)
+
+# -------------------- SQLite --------------------
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+# WAL-mode SQLite. append_many blocks until its rows are committed; appends from concurrent
+# sessions queue up for one writer thread, which commits everything waiting in one transaction.
+class SqliteStore(RecordStore):
+    def __init__(self, path=DB_PATH, batch_size: int = 500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        conn = self._connect()
+        conn.execute(f"CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, "
+                     + ", ".join(f"{_q(c)} {self._type(c)}" for c in RECORD_COLUMNS) + ")")
+        self.columns = self._table_columns(conn)
+        conn.close()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name="records-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _type(col: str) -> str:
+        if col == "schema_version": return "INTEGER"
+        return "REAL" if col.startswith(NUMERIC_PREFIXES) else "TEXT"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection) -> List[str]:
+        return [r[1] for r in conn.execute("PRAGMA table_info(records)") if r[1] != "id"]
+
+    def _ensure_columns(self, conn: sqlite3.Connection, rows: Sequence[Row]) -> None:
+        new = [c for c in _column_order(self.columns, rows) if c not in self.columns]
+        if not new: return
+        self.columns = self._table_columns(conn)  # another process may have added them already
+        for c in new:
+            if c not in self.columns:
+                conn.execute(f"ALTER TABLE records ADD COLUMN {_q(c)} {self._type(c)}")
+        self.columns = self._table_columns(conn)
+
+    def append_many(self, rows: Sequence[Row]) -> None:
+        if not rows: return
+        done, errors = threading.Event(), []
+        self._queue.put((list(rows), done, errors))
+        done.wait()
+        if errors: raise errors[0]
+
+    def _run(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None: break
+            while len(batch) < self.batch_size:
+                try: item = self._queue.get_nowait()
+                except queue.Empty: break
+                if item is None: self._queue.put(None); break
+                batch.append(item)
+            rows = [r for rs, _, _ in batch for r in rs]
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._ensure_columns(conn, rows)
+                sql = f"INSERT INTO records ({', '.join(map(_q, self.columns))}) VALUES ({', '.join('?' * len(self.columns))})"
+                conn.executemany(sql, [[r.get(c) for c in self.columns] for r in rows])
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction: conn.execute("ROLLBACK")
+                for _, _, errors in batch: errors.append(e)
+            for _, done, _ in batch: done.set()
+        conn.close()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            return pd.read_sql_query("SELECT * FROM records ORDER BY id", conn).drop(columns=["id"])
+        finally:
+            conn.close()
+
+    def iter_chunks(self, chunksize: int = 50_000, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        cols = ", ".join(_q(c) for c in columns if c in self.columns) if columns else "*"
+        conn = self._connect()
+        try:
+            for chunk in pd.read_sql_query(f"SELECT {cols} FROM records ORDER BY id", conn, chunksize=chunksize):
+                yield chunk.drop(columns=["id"], errors="ignore")
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+
+def open_store(path) -> RecordStore:
+    # Closed months may have been compacted into data/archive: then reads cover archive + store
+    from archive import with_archive   # archive.py builds on this module
+    return with_archive(CsvStore(path) if str(path).endswith(".csv") else SqliteStore(path))
+
+# -------------------- Migration --------------------
+# Copy an existing records.csv into `store` (SQLite by default); the CSV is left in place.
+def migrate_csv(csv_path=CSV_PATH, store: Optional[RecordStore] = None) -> int:
+    store = store or SqliteStore()
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    if "schema_version" not in df.columns: df["schema_version"] = 0
+    if "created_at" not in df.columns: df["created_at"] = ""
+    df = _typed(df)
+    rows = [{k: (None if isinstance(v, float) and v != v else v) for k, v in r.items()} for r in df.to_dict("records")]
+    for i in range(0, len(rows), 5000):
+        store.append_many(rows[i:i+5000])
+    return len(rows)
+
+# -------------------- Stress test --------------------
+def _stress_row(tag: str) -> Row:
+    # Every field derives from the tag, so a torn or interleaved row cannot verify
+    h = hashlib.sha1(tag.encode()).hexdigest()
+    vals = [int(h[i], 16) % 7 + 1 for i in range(len(TRAITS) + len(CHAKRAS))]
+    traits = {t: (v-4)/1.5 for t, v in zip(TRAITS, vals)}
+    chakras = {ch: float(v) for ch, v in zip(CHAKRAS, vals[len(TRAITS):])}
+    meta = {"client": tag, "coach": "stress", "date": "01-01-2026", "gender": "Other",
+            "intent": h, "email": f"{tag}@example.com", "phone": h[:10]}
+    return record_row(meta, traits, chakras)
+
+def _stress_matches(r: Row) -> bool:
+    want = _stress_row(str(r["client"]))
+    for k, v in want.items():
+        if k == "created_at": continue
+        if k.startswith(NUMERIC_PREFIXES) or k == "schema_version":
+            if float(r[k]) != float(v): return False
+        elif str(r[k]) != str(v):
+            return False
+    return True
+
+def _stress_worker(path: str, proc: int, threads: int, rows: int) -> None:
+    store = open_store(path)
+    def run(t):
+        for i in range(rows):
+            store.append(_stress_row(f"p{proc}-t{t}-{i}"))
+    ts = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    store.close()
+
+def stress(backend: str = "sqlite", procs: int = 4, threads: int = 8, rows: int = 50, path: Optional[str] = None) -> bool:
+    import multiprocessing as mp
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="records-stress-"), "records.csv" if backend == "csv" else "records.db")
+    t0 = time.perf_counter()
+    ps = [mp.Process(target=_stress_worker, args=(path, p, threads, rows)) for p in range(procs)]
+    for p in ps: p.start()
+    for p in ps: p.join()
+    secs = time.perf_counter() - t0
+
+    expected = {f"p{p}-t{t}-{i}" for p in range(procs) for t in range(threads) for i in range(rows)}
+    store = open_store(path)
+    df = store.to_dataframe(); store.close()
+    seen, bad = set(), 0
+    for r in df.to_dict("records"):
+        if r["client"] in seen or r["client"] not in expected or not _stress_matches(r): bad += 1
+        seen.add(r["client"])
+    lost = len(expected - seen)
+    ok = lost == 0 and bad == 0 and len(df) == len(expected)
+    print(f"{backend}: {procs} procs × {threads} threads × {rows} rows = {len(expected)} writes in {secs:.2f}s "
+          f"({len(expected)/secs:.0f} rows/s) — stored {len(df)}, lost {lost}, torn/duplicate {bad} — {'OK' if ok else 'FAIL'}")
+    return ok
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Soulful Academy record store tools.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="copy a records CSV into a SQLite store")
+    m.add_argument("csv", nargs="?", default=str(CSV_PATH)); m.add_argument("db", nargs="?", default=str(DB_PATH))
+    e = sub.add_parser("export", help="write a store out as CSV")
+    e.add_argument("db", nargs="?", default=str(DB_PATH)); e.add_argument("csv", nargs="?", default=str(CSV_PATH))
+    s = sub.add_parser("stress", help="many parallel writers, then verify every row")
+    s.add_argument("--backend", choices=["sqlite", "csv"], default="sqlite")
+    s.add_argument("--procs", type=int, default=4); s.add_argument("--threads", type=int, default=8)
+    s.add_argument("--rows", type=int, default=50, help="rows per thread")
+    s.add_argument("--path", help="store to write (default: a temp file)")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        store = SqliteStore(args.db)
+        n = migrate_csv(args.csv, store); store.close()
+        print(f"migrated {n} rows from {args.csv} into {args.db}")
+    elif args.cmd == "export":
+        store = open_store(args.db)
+        n = store.export_csv(args.csv); store.close()
+        print(f"exported {n} rows to {args.csv}")
+    else:
+        return 0 if stress(args.backend, args.procs, args.threads, args.rows, args.path) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
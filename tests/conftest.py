@@ -0,0 +1,24 @@
+# The app's modules live at the repository root
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    # Modules write under ./data (stores, caches, metrics): keep each test's files in its own directory
+    import metrics
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+@pytest.fixture
+def soulful_v2(monkeypatch):
+    # A second questionnaire version on a 1..5 scale with its own bands and balanced range
+    import dataclasses, scoring
+    v1 = scoring.get_instrument()
+    v2 = dataclasses.replace(v1, version=2, scale=(1, 5), chakra_balanced=(2.5, 3.5),
+                             trait_bands=[(-2, -0.5, "Low"), (-0.5, 0.5, "Mid"), (0.5, 2.1, "High")])
+    monkeypatch.setattr(scoring, "instruments", lambda: {v1.key: v1, v2.key: v2})
+    return v2
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from analytics import Rollups
+from scoring import TRAITS, CHAKRAS
+from store import record_row
+
+def _rows(n, seed=0, instrument="soulful@1", lo=1, hi=7):
+    rng = np.random.default_rng(seed)
+    r = (hi - lo) / 2
+    return [record_row({"coach": f"coach{i % 3}", "date": f"{1 + i % 28:02d}-03-2026"},
+                       {t: float(rng.uniform(-r, r)) for t in TRAITS},
+                       {ch: float(rng.uniform(lo, hi)) for ch in CHAKRAS}, instrument) for i in range(n)]
+
+def test_row_and_frame_paths_agree(tmp_path):
+    rows = _rows(150)
+    one, batch = Rollups(tmp_path / "one.db"), Rollups(tmp_path / "batch.db")
+    for row in rows: one.update([row])   # aggregate_rows
+    batch.update(rows)                    # aggregate (more than 100 rows)
+    assert one.submissions() == batch.submissions() == 150
+    a, b = one.summary(), batch.summary()
+    assert a["n"].tolist() == b["n"].tolist()
+    assert np.allclose(a["mean"], b["mean"]) and np.allclose(a["std"], b["std"])
+    assert one.status_counts().equals(batch.status_counts())
+    assert one.status_counts(prefix="trait_").equals(batch.status_counts(prefix="trait_"))
+    assert one.distribution("chakra_Heart").equals(batch.distribution("chakra_Heart"))
+
+def test_summary_matches_the_records(tmp_path):
+    rows = _rows(60, seed=1)
+    rollups = Rollups(tmp_path / "rollups.db")
+    rollups.update(rows)
+    heart = np.array([r["chakra_Heart"] for r in rows if r["coach"] == "coach1"])
+    s = rollups.summary(coaches=["coach1"]).set_index("metric").loc["chakra_Heart"]
+    assert s["n"] == len(heart)
+    assert s["mean"] == pytest.approx(heart.mean()) and s["std"] == pytest.approx(heart.std())
+    assert rollups.submissions(start="2026-03-01", end="2026-03-07") == sum(1 + i % 28 <= 7 for i in range(60))
+    assert rollups.coaches() == ["coach0", "coach1", "coach2"]
+    assert rollups.day_range() == ("2026-03-01", "2026-03-28")
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_labels_follow_each_rows_instrument(tmp_path, soulful_v2, batch):
+    rows = [record_row({"coach": "Asha", "date": "01-03-2026"}, {t: 0.3 for t in TRAITS},
+                       {ch: 3.0 for ch in CHAKRAS}, instrument) for instrument in ("soulful@1", "soulful@2")] * 60
+    rollups = Rollups(tmp_path / "rollups.db")
+    if batch: rollups.update(rows)
+    else:
+        for row in rows: rollups.update([row])
+    assert rollups.instruments() == ["soulful@1", "soulful@2"]
+    assert rollups.submissions() == rollups.submissions(instrument="soulful@2") == 60
+    # 3.0 is Blocked on 1..7 (balanced 3.8-5.8) but Balanced on 1..5 (2.5-3.5); 0.3 is Balanced vs Mid
+    assert set(rollups.status_counts().columns) == {"Blocked"}
+    assert set(rollups.status_counts(instrument="soulful@2").columns) == {"Balanced"}
+    assert set(rollups.status_counts(prefix="trait_", instrument="soulful@2").columns) == {"Mid"}
+
+def test_rebuild_matches_incremental_updates(tmp_path):
+    from store import open_store
+    store = open_store(str(tmp_path / "records.db"))
+    rows = _rows(40, seed=2)
+    store.append_many(rows)
+    live, rebuilt = Rollups(tmp_path / "live.db"), Rollups(tmp_path / "rebuilt.db")
+    live.update(rows)
+    assert rebuilt.rebuild(store) == 40
+    assert live.summary().equals(rebuilt.summary())
+    assert live.status_counts().equals(rebuilt.status_counts())
+    store.close()
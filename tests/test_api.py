@@ -0,0 +1,98 @@
+import os, subprocess, sys
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+import api
+from pdf_cache import ReportCache
+from render_pool import RenderPool
+from scoring import get_instrument
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api.create_app(RenderPool(1, 4, cache=ReportCache(None)))) as c:
+        yield c
+
+def _answers(value: int = 4):
+    return [value] * len(get_instrument().answer_columns)
+
+def test_score(client):
+    r = client.post("/score", json={"respondents": [{"answers": _answers(7)}, {"answers": _answers(1)}]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["instrument"] == get_instrument().key
+    assert len(body["results"]) == 2
+    assert set(body["results"][0]) == {"traits", "trait_bands", "chakras", "chakra_status", "verdict", "remedies"}
+    assert body["results"][0]["chakras"]["Heart"] > body["results"][1]["chakras"]["Heart"]
+
+@pytest.mark.parametrize("body, status", [
+    ({"respondents": []}, 422),
+    ({"respondents": [{"answers": [4]}]}, 422),
+    ({"respondents": [{"answers": _answers(9)}]}, 422),
+    ({"instrument": ["soulful@1"], "respondents": [{"answers": _answers()}]}, 422),
+    ({"instrument": {"id": "soulful"}, "respondents": [{"answers": _answers()}]}, 422),
+    ({"instrument": "nope@1", "respondents": [{"answers": _answers()}]}, 404),
+])
+def test_score_rejects_bad_input(client, body, status):
+    r = client.post("/score", json=body)
+    assert r.status_code == status
+    assert "error" in r.json()
+
+def test_score_needs_json_object(client):
+    assert client.post("/score", content=b"not json").status_code == 400
+    assert client.post("/score", json=[1, 2]).status_code == 400
+
+def test_report(client):
+    r = client.post("/report", json={"answers": _answers(), "meta": {"client": "Ann Lee", "coach": "Asha"}})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/pdf"
+    assert r.content.startswith(b"%PDF")
+    assert 'filename="SoulfulAcademy_Report_Ann_Lee.pdf"' in r.headers["content-disposition"]
+
+def test_report_escapes_meta(client):
+    # Paragraph markup in client-typed fields is text, not a render failure
+    r = client.post("/report", json={"answers": _answers(), "meta": {"client": "A <b>x & <i>", "intent": "<para>"}})
+    assert r.status_code == 200
+    assert r.content.startswith(b"%PDF")
+
+def test_report_non_latin_name(client):
+    r = client.post("/report", json={"answers": _answers(), "meta": {"client": "रवि शर्मा"}})
+    assert r.status_code == 200
+    assert "filename*=UTF-8''" in r.headers["content-disposition"]
+
+def test_report_rejects_bad_instrument(client):
+    r = client.post("/report", json={"instrument": ["x"], "answers": _answers()})
+    assert r.status_code == 422
+
+@pytest.mark.parametrize("compact", ["false", 0, None])
+def test_report_compact_must_be_bool(client, compact):
+    r = client.post("/report", json={"answers": _answers(), "compact": compact})
+    assert r.status_code == 400
+    assert "compact" in r.json()["error"]
+
+def test_import_starts_nothing(tmp_path):
+    # No render pool or data/pdf_cache until the app is built (uvicorn api:create_app --factory)
+    env = {**os.environ, "PYTHONPATH": str(Path(api.__file__).parent)}
+    subprocess.run([sys.executable, "-c", "import api; assert not hasattr(api, 'app')"], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / "data").exists()
+
+def test_report_render_failure_is_json(client, monkeypatch):
+    monkeypatch.setattr(RenderPool, "submit", lambda self, *a, **k: _failed_future())
+    r = client.post("/report", json={"answers": _answers()})
+    assert r.status_code == 500
+    assert "boom" in r.json()["error"]
+
+def _failed_future():
+    from concurrent.futures import Future
+    f = Future()
+    f.set_exception(ValueError("boom"))
+    return f
+
+def test_health(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+    assert get_instrument().key in body["instruments"]
+    assert {"render_pending", "render_rejected", "pdf_cache"} <= set(body)
@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import archive
+from archive import Archive, ArchivedStore, compact, with_archive
+from scoring import TRAITS, CHAKRAS
+from store import CsvStore, SqliteStore, record_row
+
+BACKENDS = [(CsvStore, "records.csv"), (SqliteStore, "records.db")]
+
+def _rows(n, month):
+    return [{**record_row({"client": f"c{month}-{i}", "coach": ["Asha", "Ben / Co"][i % 2], "date": "—"},
+                          {t: 0.1 * i for t in TRAITS}, {ch: 4.0 for ch in CHAKRAS}),
+             "created_at": f"{month}-15T10:00:00+00:00"} for i in range(n)]
+
+def _store(tmp_path, backend, name):
+    store = backend(str(tmp_path / name))
+    store.append_many(_rows(30, "2025-11") + _rows(20, "2025-12") + _rows(10, "2026-01"))
+    return store
+
+def _clients(store):
+    return sorted(store.to_dataframe()["client"])
+
+@pytest.mark.parametrize("backend, name", BACKENDS)
+def test_compact_moves_closed_months(tmp_path, backend, name):
+    store = _store(tmp_path, backend, name)
+    everyone = _clients(store)
+    r = compact(store, "2026-01", tmp_path / "archive")
+    assert (r["archived"], r["trimmed"], r["parts"]) == (50, 50, 4)
+    assert store.count() == 10 and set(store.to_dataframe()["created_at"].str[:7]) == {"2026-01"}
+    arch = Archive(tmp_path / "archive")
+    assert arch.months() == {"2025-11": 30, "2025-12": 20}
+    assert len(arch.read(["client"], coaches=["Ben / Co"])) == 25
+    merged = with_archive(store)
+    assert isinstance(merged, ArchivedStore) and merged.count() == 60 and _clients(merged) == everyone
+    assert len(merged.read(["client"], start="2025-12", end="2026-01")) == 30
+
+@pytest.mark.parametrize("backend, name", BACKENDS)
+def test_compact_again_is_a_no_op(tmp_path, backend, name):
+    store = _store(tmp_path, backend, name)
+    compact(store, "2026-01", tmp_path / "archive")
+    assert compact(store, "2026-01", tmp_path / "archive")["archived"] == 0
+    assert with_archive(store).count() == 60 and Archive(tmp_path / "archive").count() == 50
+
+@pytest.mark.parametrize("backend, name", BACKENDS)
+@pytest.mark.parametrize("crash", ["write", "publish", "trim"])
+def test_interrupted_compaction_archives_each_row_once(tmp_path, monkeypatch, backend, name, crash):
+    store = _store(tmp_path, backend, name)
+    everyone = _clients(store)
+    real_commit, real_publish = archive._commit, archive._publish
+    def boom(*a): raise KeyboardInterrupt
+    if crash == "write":      # while parts are being written: nothing journaled
+        monkeypatch.setattr(archive._Writers, "write", boom)
+    elif crash == "publish":  # journal written, one part renamed, the rest still .tmp
+        published = []
+        def publish_one(path):
+            if published: raise KeyboardInterrupt
+            published.append(path); real_publish(path)
+        monkeypatch.setattr(archive, "_publish", publish_one)
+    else:                     # parts published, store not trimmed yet
+        def commit_then_crash(*a):
+            real_commit(*a); raise KeyboardInterrupt
+        monkeypatch.setattr(archive, "_commit", commit_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        compact(store, "2026-01", tmp_path / "archive")
+    monkeypatch.undo()
+    store = backend(str(tmp_path / name))
+    compact(store, "2026-01", tmp_path / "archive")
+    assert not (tmp_path / "archive" / archive.JOURNAL).exists()
+    assert not list((tmp_path / "archive").rglob("*.tmp"))
+    assert Archive(tmp_path / "archive").count() == 50 and store.count() == 10
+    assert _clients(with_archive(store)) == everyone
+
+def test_journal_of_another_store_is_not_dropped(tmp_path):
+    (tmp_path / "archive").mkdir()
+    archive._journal(tmp_path / "archive", {"store": str(tmp_path / "first.csv"), "before": "2026-01", "parts": []})
+    with pytest.raises(RuntimeError, match="first.csv"):
+        compact(_store(tmp_path, CsvStore, "second.csv"), "2026-01", tmp_path / "archive")
+    assert (tmp_path / "archive" / archive.JOURNAL).exists()
@@ -0,0 +1,49 @@
+from history import ClientHistory, client_keys
+from scoring import TRAITS, CHAKRAS
+from store import open_store, record_row
+
+def _row(i, **meta):
+    return record_row({"date": f"{1 + i:02d}-03-2026", **meta},
+                      {t: i / 10 for t in TRAITS}, {ch: 1 + i / 10 for ch in CHAKRAS})
+
+def test_contact_keys_are_normalized():
+    assert client_keys({"email": "  Ann@Example.COM ", "phone": "+91 98765 43210"}) == \
+        ["email:ann@example.com", "phone:9876543210"]
+    assert client_keys({"phone": "098765-43210"}) == ["phone:9876543210"]
+    assert client_keys({"email": "not an address", "phone": "12345"}) == []
+
+def test_sessions_found_by_email_or_phone(tmp_path):
+    history = ClientHistory(tmp_path / "history.db")
+    history.add([_row(0, email="ann@example.com"), _row(1, phone="+91 98765 43210"),
+                 _row(2, email="ANN@example.com", phone="98765 43210"), _row(3, email="bob@example.com")])
+    found = history.sessions({"email": "Ann@Example.com", "phone": "(0) 98765 43210"})
+    assert [s["label"] for s in found] == ["01-03-2026", "02-03-2026", "03-03-2026"]
+    assert found[1]["traits"]["O"] == 0.1 and found[1]["chakras"]["Heart"] == 1.1
+    assert found[1]["instrument"] == "soulful@1"
+    assert [s["label"] for s in history.sessions({"phone": "9876543210"})] == ["02-03-2026", "03-03-2026"]
+    assert history.sessions({"email": "carol@example.com"}) == []
+    assert history.sessions({}) == []
+
+def test_most_recent_sessions_oldest_first(tmp_path):
+    history = ClientHistory(tmp_path / "history.db")
+    for i in range(20): history.add([_row(i, email="ann@example.com")])
+    found = history.sessions({"email": "ann@example.com"}, limit=5)
+    assert [s["label"] for s in found] == [f"{d:02d}-03-2026" for d in range(16, 21)]
+
+def test_rows_without_contact_are_skipped_and_label_falls_back(tmp_path):
+    history = ClientHistory(tmp_path / "history.db")
+    history.add([_row(0), _row(1, email="ann@example.com", date="—")])
+    (s,) = history.sessions({"email": "ann@example.com"})
+    assert s["label"] == s["created_at"][:10]
+    assert history._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+
+def test_rebuild_matches_incremental_adds(tmp_path):
+    rows = [_row(i % 28, email=f"c{i % 7}@example.com", phone=f"98765{i % 5:05d}") for i in range(60)]
+    store = open_store(str(tmp_path / "records.db"))
+    store.append_many(rows)
+    live, rebuilt = ClientHistory(tmp_path / "live.db"), ClientHistory(tmp_path / "rebuilt.db")
+    live.add(rows)
+    assert rebuilt.rebuild(store) == 60
+    for contact in ({"email": "c3@example.com"}, {"phone": "9876500002"}):
+        assert live.sessions(contact) == rebuilt.sessions(contact)
+    store.close()
@@ -0,0 +1,78 @@
+import csv, json
+
+import pytest
+
+from ingest import ingest
+from scoring import get_instrument
+from store import open_store
+
+COLS = get_instrument().answer_columns
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["client", "email"] + COLS)
+        w.writeheader()
+        w.writerows(rows)
+
+def _answers(v=4):
+    return {c: v for c in COLS}
+
+def test_csv_rejects_with_reasons(tmp_path):
+    src = tmp_path / "in.csv"
+    _write_csv(src, [{"client": "Ok", "email": "ok@example.com", **_answers()},
+                     {"client": "Blank", **_answers(), "q3": ""},
+                     {"client": "Half", **_answers(), "q4": "4.5"},
+                     {"client": "Word", **_answers(), "Heart_1": "four"},
+                     {"client": "High", **_answers(), "q1": "9", "Crown_3": "0"},
+                     {"client": "Ok2", **_answers(7)}])
+    store = tmp_path / "data" / "records.db"
+    r = ingest(str(src), str(store), chunksize=2)
+    assert (r["rows"], r["saved"], r["rejected"]) == (6, 2, 4)
+    with open(r["rejects_path"], newline="", encoding="utf-8") as f:
+        rejects = {row["client"]: row for row in csv.DictReader(f)}
+    assert {k: v["_line"] for k, v in rejects.items()} == {"Blank": "3", "Half": "4", "Word": "5", "High": "6"}
+    assert rejects["Blank"]["_reason"] == "q3: missing"
+    assert rejects["Half"]["_reason"] == "q4: '4.5' is not an integer"
+    assert rejects["Word"]["_reason"] == "Heart_1: 'four' is not an integer"
+    assert rejects["High"]["_reason"] == "q1: 9 outside 1..7; Crown_3: 0 outside 1..7"
+    assert rejects["Half"]["q4"] == "4.5"   # the row as it was read
+    saved = open_store(str(store))
+    assert sorted(saved.to_dataframe()["client"]) == ["Ok", "Ok2"]
+    saved.close()
+    for name in ("rollups.db", "history.db", "norms.db"): assert (store.parent / name).exists()
+
+def test_jsonl_rejects_quote_the_values_as_written(tmp_path):
+    lines = [json.dumps({"answers": [4] * len(COLS), "meta": {"client": "Api"}}),
+             json.dumps({"client": "Flat", **_answers(5)}),
+             "{not json",
+             "[1, 2]",
+             json.dumps({"client": "Half", **_answers(), "q2": 4.5}),
+             json.dumps({"client": "Null", **_answers(), "q5": None}),
+             json.dumps({"answers": {c: 4 for c in COLS[1:]}, "meta": {"client": "Short"}}),
+             json.dumps({"client": "High", **_answers(), "Root_1": 9}),
+             ""]
+    src = tmp_path / "in.jsonl"
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    r = ingest(str(src), str(tmp_path / "records.db"))
+    assert (r["rows"], r["saved"], r["rejected"]) == (8, 2, 6)
+    rejects = [json.loads(l) for l in open(r["rejects_path"], encoding="utf-8")]
+    reasons = {rec["_line"]: rec["_reason"] for rec in rejects}
+    assert reasons[3].startswith("invalid JSON") and reasons[4] == "invalid JSON: not an object"
+    assert reasons[5] == "q2: 4.5 is not an integer"
+    assert reasons[6] == "q5: missing" and reasons[7] == "q1: missing"
+    assert reasons[8] == "Root_1: 9 outside 1..7"
+    half = next(rec for rec in rejects if rec["_line"] == 5)
+    assert half["q1"] == 4 and half["q2"] == 4.5   # ints stay ints in the rejects file
+
+def test_dry_run_saves_nothing(tmp_path):
+    src = tmp_path / "in.csv"
+    _write_csv(src, [{"client": "Ok", **_answers()}])
+    r = ingest(str(src), str(tmp_path / "data" / "records.db"), dry_run=True)
+    assert r["saved"] == 1 and r["rejects_path"] is None
+    assert not (tmp_path / "data").exists()
+
+def test_csv_without_answer_columns_stops(tmp_path):
+    src = tmp_path / "in.csv"
+    src.write_text("client,q1\nAnn,4\n", encoding="utf-8")
+    with pytest.raises(SystemExit, match="missing soulful@1 answer columns"):
+        ingest(str(src), str(tmp_path / "records.db"))
@@ -0,0 +1,65 @@
+import socket, threading
+
+import pytest
+
+from mailer import PROBE_AFTER, Mailer, SinkServer, SmtpConfig
+
+@pytest.fixture
+def sink(tmp_path):
+    server = SinkServer(0, tmp_path / "sink")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def mailer(tmp_path, sink):
+    m = Mailer(tmp_path / "outbox.db", SmtpConfig(host="127.0.0.1", port=sink.server_address[1], tls="none"))
+    yield m
+    m.close()
+
+def _enqueue(mailer, n):
+    return [mailer.enqueue(f"client{i}@example.com", "Your report", "Attached.", b"%PDF-1.4 test", "report.pdf")
+            for i in range(n)]
+
+def test_batch_goes_over_one_connection(mailer, sink):
+    _enqueue(mailer, 3)
+    assert mailer.send_pending() == 3
+    assert sink.received == 3 and sink.connections == 1
+    assert mailer.stats() == {"queued": 0, "sending": 0, "sent": 3, "failed": 0}
+    assert len(list(sink.directory.glob("*.eml"))) == 3
+
+def test_temporary_failure_is_queued_for_retry(mailer, sink):
+    sink.tempfail = 1
+    _enqueue(mailer, 2)
+    assert mailer.send_pending() == 1
+    assert mailer.stats() == {"queued": 1, "sending": 0, "sent": 1, "failed": 0}
+    row = mailer._conn.execute("SELECT attempts, error FROM outbox WHERE status = 'queued'").fetchone()
+    assert row[0] == 1 and "451" in row[1]
+
+def test_no_host_keeps_mail_queued(tmp_path):
+    m = Mailer(tmp_path / "outbox.db", SmtpConfig())
+    try:
+        _enqueue(m, 1)
+        assert m.send_pending() == 0
+        assert m.stats()["queued"] == 1
+    finally:
+        m.close()
+
+def test_noop_only_after_idle(mailer, sink):
+    _enqueue(mailer, 3)
+    assert mailer.send_pending() == 3
+    assert sink.noops == 0                      # back-to-back sends reuse the connection unchecked
+    _enqueue(mailer, 1)
+    mailer._smtp_used -= PROBE_AFTER + 1
+    assert mailer.send_pending() == 1
+    assert sink.noops == 1 and sink.connections == 1
+
+def test_dropped_connection_is_retried_once(mailer, sink):
+    _enqueue(mailer, 1)
+    assert mailer.send_pending() == 1
+    mailer._smtp.sock.shutdown(socket.SHUT_RDWR)   # the connection dropped between passes
+    _enqueue(mailer, 1)
+    assert mailer.send_pending() == 1
+    assert sink.received == 2 and sink.connections == 2
+    assert mailer.stats()["sent"] == 2
@@ -0,0 +1,76 @@
+import pytest
+
+from norms import MIN_COUNT, Norms
+from scoring import TRAITS, CHAKRAS
+from store import open_store, record_row
+
+def test_sketches_are_kept_per_instrument(tmp_path, soulful_v2):
+    # The same Heart score is high among 1..5 clients and low among 1..7 clients
+    rows = [record_row({"coach": "Asha"}, {t: 0.0 for t in TRAITS}, {ch: 1.0 + (i % 50) / 10 for ch in CHAKRAS}, "soulful@1")
+            for i in range(50)]
+    rows += [record_row({"coach": "Asha"}, {t: 0.0 for t in TRAITS}, {ch: 1.0 + (i % 50) / 25 for ch in CHAKRAS}, "soulful@2")
+             for i in range(50)]
+    norms = Norms(tmp_path / "norms.db")
+    norms.update(rows)
+    v1 = norms.percentiles({}, {"Heart": 3.0}, instrument="soulful@1")["chakra_Heart"]
+    v2 = norms.percentiles({}, {"Heart": 3.0}, instrument="soulful@2")["chakra_Heart"]
+    assert v1 < 50 < v2
+    assert norms.sketch("chakra_Heart", instrument="soulful@2").hi == 5.0
+    assert norms.sketch("chakra_Heart").n == 50
+    reloaded = Norms(tmp_path / "norms.db")
+    assert reloaded.percentiles({}, {"Heart": 3.0}, instrument="soulful@2")["chakra_Heart"] == v2
+
+def _rows(hearts, **meta):
+    return [record_row(meta, {t: 0.0 for t in TRAITS}, {ch: h for ch in CHAKRAS}) for h in hearts]
+
+def test_percentiles_are_mid_rank(tmp_path):
+    # 100 clients at 1.00, 1.06, ... 6.94: a score's percentile is the share below plus half of its bin
+    hearts = [1 + i * 0.06 for i in range(100)]
+    norms = Norms(tmp_path / "norms.db")
+    norms.update(_rows(hearts))
+    for v in (1.0, 2.5, 4.0, 6.94, 7.0):
+        below = sum(h < v - 1e-9 for h in hearts)
+        same = sum(abs(h - v) < 1e-9 for h in hearts)
+        assert norms.percentiles({}, {"Heart": v})["chakra_Heart"] == round(below + same / 2, 1)
+    assert norms.percentiles({"O": 0.0}, {})["trait_O"] == 50.0
+    sk = norms.sketch("chakra_Heart")
+    assert sk.quantile(0.5) == pytest.approx(hearts[49], abs=0.01)
+
+def test_batch_and_single_updates_agree(tmp_path):
+    rows = _rows([1 + (i % 61) / 10 for i in range(300)], coach="Asha")
+    one, batch = Norms(tmp_path / "one.db"), Norms(tmp_path / "batch.db")
+    for row in rows: one.update([row])
+    batch.update(rows)
+    assert set(one._sketches) == set(batch._sketches)
+    for key, s in one._sketches.items():
+        assert (s.counts == batch._sketches[key].counts).all()
+
+def test_small_groups_fall_back_to_all_clients(tmp_path):
+    # Asha's clients are all low; with fewer than MIN_COUNT of them, compare with everyone instead
+    norms = Norms(tmp_path / "norms.db")
+    norms.update(_rows([6.0] * 50, coach="Ben") + _rows([2.0] * (MIN_COUNT - 1), coach="Asha"))
+    everyone = norms.percentiles({}, {"Heart": 4.0})["chakra_Heart"]
+    assert norms.percentiles({}, {"Heart": 4.0}, {"coach": "Asha"}, "coach")["chakra_Heart"] == everyone
+    norms.update(_rows([2.0], coach="Asha"))
+    assert norms.percentiles({}, {"Heart": 4.0}, {"coach": "Asha"}, "coach")["chakra_Heart"] == 100.0
+    assert norms.percentiles({}, {"Heart": 4.0}, {"coach": "Ben"}, "coach")["chakra_Heart"] == 0.0
+    assert norms.groups() == ["all", "coach:Asha", "coach:Ben"]
+
+def test_no_percentiles_below_min_count(tmp_path):
+    norms = Norms(tmp_path / "norms.db")
+    norms.update(_rows([4.0] * (MIN_COUNT - 1)))
+    assert norms.percentiles({"O": 0.0}, {"Heart": 4.0}) == {}
+
+def test_rebuild_and_refresh(tmp_path):
+    store = open_store(str(tmp_path / "records.db"))
+    rows = _rows([1 + (i % 61) / 10 for i in range(120)], coach="Asha", gender="Female")
+    store.append_many(rows)
+    live = Norms(tmp_path / "live.db")
+    live.update(rows)
+    reader, writer = Norms(tmp_path / "norms.db"), Norms(tmp_path / "norms.db")
+    assert reader.is_empty() and not reader.refresh()
+    assert writer.rebuild(store) == 120
+    assert reader.refresh() and not reader.refresh()   # another connection's commit, then nothing new
+    for key, s in live._sketches.items():
+        assert (reader._sketches[key].counts == s.counts).all()
+    store.close()
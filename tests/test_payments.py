@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from payments import (Checkouts, FakeProvider, PaymentError, PaymentGate, Purchase, StandInServer, StripeProvider,
+                      checkout_url)
+
+PRICE = Purchase(49900, "inr")
+
+@pytest.fixture
+def fake():
+    provider = FakeProvider(PRICE)
+    return provider, PaymentGate(provider, PRICE, secret=b"test")
+
+def test_paid_checkout_unlocks_its_own_report(fake):
+    provider, gate = fake
+    sid = provider.pay("ref-1")
+    token = gate.check(sid, "ref-1")
+    assert token and gate.unlocks(token, "ref-1")
+    assert gate.check(None, "ref-1", token) == token   # reruns: the token, no lookup
+    assert not gate.unlocks(token, "ref-2")
+    assert gate.check(sid, "ref-2") is None             # a reused checkout id opens nothing new
+    assert provider.calls == 1                          # one lookup, then the shared cache
+
+@pytest.mark.parametrize("amount, currency", [(100, "inr"), (49900, "usd")])
+def test_wrong_price_is_rejected(fake, amount, currency):
+    provider, gate = fake
+    sid = provider.pay("ref-1", amount=amount, currency=currency)
+    assert gate.check(sid, "ref-1") is None
+    assert gate.stats()["rejected"] == 1
+
+def test_product_must_match_when_configured():
+    purchase = Purchase(49900, "inr", "plink_report")
+    provider = FakeProvider(purchase)
+    gate = PaymentGate(provider, purchase, secret=b"test")
+    assert gate.check(provider.pay("ref-1"), "ref-1")
+    assert gate.check(provider.pay("ref-2", product="plink_other"), "ref-2") is None
+
+def test_unpaid_and_malformed_ids(fake):
+    _, gate = fake
+    assert gate.check("cs_unpaid_1", "ref-1") is None
+    assert gate.check("../etc", "ref-1") is None
+    assert gate.check(None, "ref-1", "forged.token") is None
+
+@pytest.fixture
+def standin():
+    server = StandInServer(0, amount=49900, currency="inr")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_stripe_lookup_through_standin(standin):
+    api = f"http://127.0.0.1:{standin.server_address[1]}"
+    gate = PaymentGate(StripeProvider("sk_test", api), PRICE, secret=b"test")
+    sid = standin.pay("ref-1")
+    ent = gate.verify(sid)
+    assert ent is not None and ent.reference == "ref-1" and ent.product == "plink_standin"
+    assert gate.check(sid, "ref-1")
+    assert gate.verify("cs_unpaid_1") is None
+    assert gate.verify("pi_unknown") is None   # 404: not paid
+    assert standin.lookups == 3
+
+def test_standin_requires_a_key(standin):
+    provider = StripeProvider("", f"http://127.0.0.1:{standin.server_address[1]}")
+    with pytest.raises(PaymentError):
+        provider.lookup("cs_paid_1")
+
+def test_checkouts_keep_results_until_they_expire(tmp_path):
+    store = Checkouts(tmp_path / "checkouts.db")
+    ref = store.save({"traits": {"O": 1.5}, "meta": {"client": "Ämma"}})
+    assert store.load(ref) == {"traits": {"O": 1.5}, "meta": {"client": "Ämma"}}
+    assert store.load("missing") is None
+    store.ttl = -1
+    assert store.load(ref) is None
+    store.close()
+
+def test_checkout_url_carries_the_reference():
+    assert checkout_url("https://buy.stripe.com/x", "r1") == "https://buy.stripe.com/x?client_reference_id=r1"
+    assert checkout_url("http://h/pay?return=/", "r1") == "http://h/pay?return=/&client_reference_id=r1"
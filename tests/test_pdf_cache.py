@@ -0,0 +1,22 @@
+import os, time
+
+from pdf_cache import ReportCache
+
+def test_rewriting_a_key_counts_its_bytes_once(tmp_path):
+    cache = ReportCache(tmp_path / "cache")
+    cache.put("a" * 64, b"%PDF" * 100)
+    cache.put("a" * 64, b"%PDF" * 100)
+    cache._write_disk("a" * 64, b"%PDF" * 100)
+    assert cache.stats()["disk_bytes"] == 400
+    assert ReportCache(tmp_path / "cache").stats()["disk_bytes"] == 400
+
+def test_unused_entries_expire(tmp_path):
+    cache = ReportCache(tmp_path / "cache", max_age=60)
+    cache.put("old", b"x" * 10)
+    cache.put("new", b"y" * 10)
+    stale = time.time() - 120
+    os.utime(tmp_path / "cache" / "old.pdf", (stale, stale))
+    assert ReportCache(tmp_path / "cache", max_age=60).get("old") is None
+    assert not (tmp_path / "cache" / "old.pdf").exists()
+    fresh = ReportCache(tmp_path / "cache", max_age=60)
+    assert fresh.get("new") == b"y" * 10 and fresh.stats()["disk_bytes"] == 10
@@ -0,0 +1,75 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from scoring import (CHAKRAS, CHAKRA_QUESTIONS, PERSONALITY_ITEMS, TRAITS, TRAIT_BANDS, VERDICTS, band_labels,
+                     chakra_status, get_instrument, score_batch, score_chakras, score_personality,
+                     status_labels, summarize_trait, verdict, verdict_labels)
+
+def _scalar(row, items=PERSONALITY_ITEMS):
+    # The original per-respondent path, one answer row at a time
+    row = [int(v) for v in row]
+    traits = score_personality(list(zip(items, row[:len(items)])))
+    k, answers = len(items), {}
+    for ch, qs in CHAKRA_QUESTIONS.items():
+        answers[ch] = row[k:k + len(qs)]; k += len(qs)
+    return traits, score_chakras(answers)
+
+def _answers(n, seed=0):
+    return np.random.default_rng(seed).integers(1, 8, size=(n, len(get_instrument().answer_columns)))
+
+def test_batch_matches_scalar_scores():
+    x = _answers(500)
+    s = score_batch(x)
+    for i, row in enumerate(x):
+        traits, chakras = _scalar(row)
+        assert s.trait_dict(i) == traits and s.chakra_dict(i) == chakras
+        assert s.trait_bands[i].tolist() == [summarize_trait(t, traits[t]) for t in TRAITS]
+        assert s.chakra_status[i].tolist() == [chakra_status(chakras[ch]) for ch in CHAKRAS]
+        assert s.verdicts[i] == verdict(traits)
+
+def test_matches_the_formula():
+    # (answer - 4), negated for reverse-keyed items, averaged per trait (0 without items: N here);
+    # chakras are plain means
+    x = _answers(50, seed=1)
+    s = get_instrument().score(x)
+    for i, row in enumerate(x):
+        for t in TRAITS:
+            v = [(a - 4) * (-1 if it.reverse else 1) for it, a in zip(PERSONALITY_ITEMS, row) if it.trait == t]
+            assert s.trait_dict(i)[t] == pytest.approx(np.mean(v) if v else 0)
+        k = len(PERSONALITY_ITEMS)
+        for ch, qs in CHAKRA_QUESTIONS.items():
+            assert s.chakra_dict(i)[ch] == pytest.approx(np.mean(row[k:k + len(qs)])); k += len(qs)
+
+def test_trait_without_items_scores_zero():
+    inst = get_instrument()
+    items = [it for it in inst.items if it.trait != "O"]
+    short = dataclasses.replace(inst, items=items)
+    x = np.random.default_rng(2).integers(1, 8, size=(20, len(short.answer_columns)))
+    s = short.score(x)
+    for i, row in enumerate(x):
+        traits, chakras = _scalar(row, items)
+        assert traits["O"] == traits["N"] == 0 and s.trait_dict(i) == traits and s.chakra_dict(i) == chakras
+
+def test_reverse_keyed_neutral_is_zero_not_negative_zero():
+    s = score_batch(np.full((1, len(get_instrument().answer_columns)), 4))
+    assert all(np.copysign(1, v) == 1 for v in s.traits[0])
+
+# Every band edge and the float just below it (bands are lo <= score < hi)
+EDGES = sorted({lo for lo, _, _ in TRAIT_BANDS} | {np.nextafter(hi, -np.inf) for _, hi, _ in TRAIT_BANDS} | {3.0})
+
+@pytest.mark.parametrize("score", EDGES)
+def test_band_edges(score):
+    assert band_labels(np.array([score]))[0] == summarize_trait("O", score)
+
+@pytest.mark.parametrize("v", [1.0, 3.79, 3.8, 4.5, 5.8, 5.81, 7.0])
+def test_status_edges(v):
+    assert status_labels(np.array([v]))[0] == chakra_status(v) == get_instrument().chakra_status(v)
+
+def test_verdicts_cover_every_rule():
+    cases = [({"O": 0.6, "C": 1.1}, 0), ({"E": 1.1, "A": 0.6}, 1), ({"O": 1.3, "C": -0.6}, 2),
+             ({"C": 1.3, "E": -0.6}, 3), ({}, 4), ({"C": 1.0, "O": 0.6}, 4)]
+    for traits, i in cases:
+        assert verdict(traits) == VERDICTS[i]
+        assert verdict_labels(np.array([[traits.get(t, 0.0) for t in TRAITS]]))[0] == VERDICTS[i]
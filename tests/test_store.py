@@ -0,0 +1,14 @@
+import pytest
+
+from store import open_store, stress
+
+@pytest.mark.parametrize("backend, name", [("csv", "records.csv"), ("sqlite", "records.db")])
+def test_stress_keeps_every_row(tmp_path, backend, name):
+    path = str(tmp_path / name)
+    assert stress(backend, procs=2, threads=3, rows=10, path=path)
+    store = open_store(path)
+    try:
+        assert store.count() == 2 * 3 * 10
+        assert store.to_dataframe()["client"].nunique() == 2 * 3 * 10
+    finally:
+        store.close()